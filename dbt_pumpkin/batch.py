@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import glob
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+from dbt_pumpkin.exception import PumpkinError
+from dbt_pumpkin.params import LookupParams, ManifestParams, ProjectParams, ResourceParams, StorageParams
+from dbt_pumpkin.pumpkin import COMMANDS, Pumpkin
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ProjectResult:
+    project_dir: str
+    success: bool
+    actions: int = 0
+    duration: float = 0.0
+    error: str | None = None
+
+
+def expand_project_dirs(patterns: list[str]) -> list[str]:
+    """
+    Expands glob patterns to directories containing dbt_project.yml, other values are returned as is
+    """
+    result: list[str] = []
+    for pattern in patterns:
+        if glob.escape(pattern) == pattern:
+            result.append(pattern)
+            continue
+
+        matched = sorted(p for p in glob.glob(pattern) if (Path(p) / "dbt_project.yml").is_file())
+        if not matched:
+            msg = f"No DBT projects match {pattern}"
+            raise PumpkinError(msg)
+        result += matched
+
+    # Same project may be matched by several patterns
+    return list(dict.fromkeys(result))
+
+
+def _init_worker(log_level: int):
+    from dbt_pumpkin.dbt_compat import suppress_dbt_cli_output
+
+    logging.basicConfig(level=log_level, force=True)
+    suppress_dbt_cli_output()
+
+    # DBT is imported once per worker, not once per project
+    import dbt_pumpkin.loader  # noqa: F401
+
+
+def _execute_project(
+    command: str,
+    project_params: ProjectParams,
+    resource_params: ResourceParams,
+    manifest_params: ManifestParams,
+    lookup_params: LookupParams,
+    storage_params: StorageParams,
+    *,
+    dry_run: bool,
+    incremental: bool,
+) -> ProjectResult:
+    start = time.monotonic()
+    try:
+        pumpkin = Pumpkin(project_params, resource_params, manifest_params, lookup_params, storage_params)
+        plan = getattr(pumpkin, command)(dry_run=dry_run, incremental=incremental)
+    except KeyboardInterrupt as e:
+        raise e  # noqa: TRY201
+    except Exception as e:  # noqa: BLE001
+        # One broken project must not stop the others
+        logger.exception("Failed to %s %s", command, project_params.project_dir)
+        return ProjectResult(project_params.project_dir, success=False, duration=time.monotonic() - start, error=str(e))
+
+    return ProjectResult(
+        project_params.project_dir, success=True, actions=len(plan.actions), duration=time.monotonic() - start
+    )
+
+
+def execute_projects(
+    command: str,
+    project_dirs: list[str],
+    project_params: ProjectParams,
+    resource_params: ResourceParams,
+    manifest_params: ManifestParams | None = None,
+    lookup_params: LookupParams | None = None,
+    storage_params: StorageParams | None = None,
+    *,
+    jobs: int | None = None,
+    dry_run: bool,
+    incremental: bool = False,
+) -> list[ProjectResult]:
+    """
+    Executes command for every project in a pool of worker processes.
+
+    DBT isn't thread safe, so projects are executed in separate processes, each worker imports DBT once and
+    executes several projects one after another. Profiles are read from the project directory if it has profiles.yml
+    and profiles directory isn't specified. Workers running operations with the same profile and target don't share
+    DBT target directory, see ResourceLoader._lock_pumpkin_project.
+    """
+    if command not in COMMANDS:
+        msg = f"Unknown command: {command}"
+        raise PumpkinError(msg)
+
+    manifest_params = manifest_params or ManifestParams()
+    lookup_params = lookup_params or LookupParams()
+    storage_params = storage_params or StorageParams()
+    workers = max(1, min(jobs or os.cpu_count() or 1, len(project_dirs)))
+    logger.info("Executing %s for %s projects using %s workers", command, len(project_dirs), workers)
+
+    results: dict[str, ProjectResult] = {}
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(logging.getLogger().getEffectiveLevel(),)
+    ) as executor:
+        futures = {}
+        for project_dir in project_dirs:
+            params = project_params.with_project_dir(project_dir)
+            if not params.profiles_dir and (Path(project_dir) / "profiles.yml").is_file():
+                params = params.with_profiles_dir(project_dir)
+            future = executor.submit(
+                _execute_project,
+                command,
+                params,
+                resource_params,
+                manifest_params,
+                lookup_params,
+                storage_params,
+                dry_run=dry_run,
+                incremental=incremental,
+            )
+            futures[future] = project_dir
+
+        for future in as_completed(futures):
+            result = future.result()
+            logger.info("Project %s %s", result.project_dir, "succeeded" if result.success else "failed")
+            results[futures[future]] = result
+
+    return [results[p] for p in project_dirs]
+
+
+def log_summary(command: str, results: list[ProjectResult]):
+    failed = [r for r in results if not r.success]
+    logger.info(
+        "Summary of %s: %s projects, %s succeeded, %s failed, %s actions",
+        command,
+        len(results),
+        len(results) - len(failed),
+        len(failed),
+        sum(r.actions for r in results),
+    )
+    for result in results:
+        if result.success:
+            logger.info("  %s: %s actions in %.1fs", result.project_dir, result.actions, result.duration)
+        else:
+            logger.error("  %s: failed in %.1fs: %s", result.project_dir, result.duration, result.error)
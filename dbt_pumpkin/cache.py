@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+from pathlib import Path
+
+import ruamel.yaml
+
+from dbt_pumpkin.data import ResourceID, Table, TableColumn
+
+logger = logging.getLogger(__name__)
+
+_CACHE_VERSION = 1
+
+
+class TableCache:
+    """
+    Keeps columns of looked up tables on disk between runs.
+
+    Entries are keyed by DBT target and relation, expire after `ttl` seconds.
+    When there are more than `max_entries` entries, the oldest ones are evicted on save.
+    """
+
+    def __init__(self, path: Path, ttl: float, max_entries: int):
+        self._path = path
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._entries: dict[str, dict] = None
+        self._dirty = False
+
+    @staticmethod
+    def key(target: str, database: str | None, schema: str | None, identifier: str) -> str:
+        return "/".join((part or "").lower() for part in (target, database, schema, identifier))
+
+    def _load(self) -> dict[str, dict]:
+        if self._entries is not None:
+            return self._entries
+
+        self._entries = {}
+        if not self._path.is_file():
+            return self._entries
+
+        try:
+            with self._path.open(encoding="utf-8") as file:
+                content = json.load(file)
+        except KeyboardInterrupt as e:
+            raise e  # noqa: TRY201
+        except Exception as e:  # noqa: BLE001
+            logger.warning("Failed to read table cache %s, ignoring it: %s", self._path, e)
+            return self._entries
+
+        if content.get("version") != _CACHE_VERSION:
+            logger.debug("Ignoring table cache of version %s", content.get("version"))
+            return self._entries
+
+        self._entries = content["entries"]
+        logger.debug("Table cache read: %s entries", len(self._entries))
+        return self._entries
+
+    def _is_fresh(self, entry: dict, now: float) -> bool:
+        return now - entry["time"] < self._ttl
+
+    def get(self, key: str, resource_id: ResourceID) -> Table | None:
+        entry = self._load().get(key)
+        if entry is None or not self._is_fresh(entry, time.time()):
+            return None
+        return Table(resource_id=resource_id, columns=[TableColumn(**c) for c in entry["columns"]])
+
+    def put(self, key: str, table: Table):
+        self._load()[key] = {"time": time.time(), "columns": [dataclasses.asdict(c) for c in table.columns]}
+        self._dirty = True
+
+    def invalidate(self, key: str):
+        if self._load().pop(key, None) is not None:
+            self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+
+        now = time.time()
+        entries = {k: e for k, e in self._load().items() if self._is_fresh(e, now)}
+        if len(entries) > self._max_entries:
+            newest = sorted(entries.items(), key=lambda item: item[1]["time"], reverse=True)[: self._max_entries]
+            entries = dict(newest)
+
+        logger.debug("Writing table cache %s: %s entries", self._path, len(entries))
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path.with_name(self._path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as file:
+            json.dump({"version": _CACHE_VERSION, "entries": entries}, file)
+        os.replace(tmp_path, self._path)
+
+        self._entries = entries
+        self._dirty = False
+
+
+class YamlCache:
+    """
+    Keeps parsed round-trip YAML documents (including comments and formatting) on disk between runs.
+
+    Entries are keyed by file path, validated by file size and modification time or, if they differ, by content hash.
+    When entries take more than `max_size` bytes, the least recently used ones are evicted.
+    """
+
+    def __init__(self, directory: Path, max_size: int, format_key: str = ""):
+        self._directory = directory
+        self._max_size = max_size
+        # Parsed documents depend on YAML settings and ruamel version
+        self._format_key = f"{ruamel.yaml.__version__}:{format_key}"
+        self._written = False
+
+    def _entry_path(self, file: Path) -> Path:
+        return self._directory / (hashlib.sha256(file.as_posix().encode("utf-8")).hexdigest()[:32] + ".pickle")
+
+    @staticmethod
+    def _hash(resolved_file: Path) -> str:
+        return hashlib.sha256(resolved_file.read_bytes()).hexdigest()
+
+    def get(self, file: Path, resolved_file: Path) -> tuple[bool, any]:
+        """
+        Returns (True, document) if file is not changed since it was cached, (False, None) otherwise
+        """
+        entry_path = self._entry_path(file)
+        try:
+            with entry_path.open("rb") as entry_file:
+                entry = pickle.load(entry_file)  # noqa: S301
+        except FileNotFoundError:
+            return False, None
+        except KeyboardInterrupt as e:
+            raise e  # noqa: TRY201
+        except Exception as e:  # noqa: BLE001
+            logger.debug("Failed to read YAML cache entry %s, ignoring it: %s", entry_path, e)
+            return False, None
+
+        if entry.get("version") != _CACHE_VERSION or entry["format"] != self._format_key or entry["path"] != str(file):
+            return False, None
+
+        stat = resolved_file.stat()
+        if (entry["size"], entry["mtime_ns"]) != (stat.st_size, stat.st_mtime_ns):
+            if entry["size"] != stat.st_size or entry["hash"] != self._hash(resolved_file):
+                return False, None
+            # Content is the same, e.g. file was checked out again
+            self._write(entry_path, {**entry, "mtime_ns": stat.st_mtime_ns})
+        else:
+            # Modification time of entry is used to find the least recently used ones
+            with contextlib.suppress(FileNotFoundError):
+                os.utime(entry_path)
+
+        return True, pickle.loads(entry["document"])  # noqa: S301
+
+    def put(self, file: Path, resolved_file: Path, document: any):
+        stat = resolved_file.stat()
+        entry = {
+            "version": _CACHE_VERSION,
+            "format": self._format_key,
+            "path": str(file),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "hash": self._hash(resolved_file),
+            "document": pickle.dumps(document, protocol=pickle.HIGHEST_PROTOCOL),
+        }
+        self._write(self._entry_path(file), entry)
+
+    def _write(self, entry_path: Path, entry: dict):
+        self._directory.mkdir(parents=True, exist_ok=True)
+        # Entries may be written by several threads and processes at once
+        tmp_path = entry_path.with_name(f"{entry_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with tmp_path.open("wb") as entry_file:
+            pickle.dump(entry, entry_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, entry_path)
+        self._written = True
+
+    def evict(self):
+        """
+        Removes the least recently used entries until entries take no more than `max_size` bytes
+        """
+        if not self._written:
+            return
+        self._written = False
+
+        entries = []
+        for entry in os.scandir(self._directory):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+        total_size = sum(size for _, size, _ in entries)
+        if total_size <= self._max_size:
+            return
+
+        logger.debug("YAML cache takes %s bytes, evicting entries", total_size)
+        for _, size, path in sorted(entries):
+            if total_size <= self._max_size:
+                break
+            Path(path).unlink(missing_ok=True)
+            total_size -= size
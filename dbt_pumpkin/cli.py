@@ -1,20 +1,40 @@
+from __future__ import annotations
+
 import logging
+import sys
 
 import click
 
+from dbt_pumpkin.batch import execute_projects, expand_project_dirs, log_summary
 from dbt_pumpkin.dbt_compat import suppress_dbt_cli_output
-from dbt_pumpkin.params import ProjectParams, ResourceParams
+from dbt_pumpkin.params import LookupParams, ManifestParams, ProjectParams, ResourceParams, StorageParams
 from dbt_pumpkin.pumpkin import Pumpkin
 
 
 class P:
     project_dir = click.option("--project-dir")
+    project_dirs = click.option("--project-dir", "project_dirs", multiple=True)
     profiles_dir = click.option("--profiles-dir")
     target = click.option("--target", "-t")
     profile = click.option("--profile")
     select = click.option("--select", "-s", multiple=True)
     exclude = click.option("--exclude", multiple=True)
+    manifest = click.option("--manifest")
+    reuse_manifest = click.option("--reuse-manifest", is_flag=True, default=False)
+    low_memory = click.option("--low-memory", is_flag=True, default=False)
+    threads = click.option("--threads", type=int)
+    catalog = click.option("--catalog")
+    cache_ttl = click.option("--cache-ttl", type=int)
+    refresh = click.option("--refresh", is_flag=True, default=False)
+    refresh_select = click.option("--refresh-select", multiple=True)
+    incremental = click.option("--incremental", is_flag=True, default=False)
     dry_run = click.option("--dry-run", is_flag=True, default=False)
+    socket_path = click.option("--socket", "socket_path")
+    interval = click.option("--interval", type=float, default=1.0)
+    jobs = click.option("--jobs", "-j", type=int)
+    yaml_workers = click.option("--yaml-workers", type=int)
+    yaml_cache = click.option("--yaml-cache", is_flag=True, default=False)
+    yaml_minimal_edits = click.option("--yaml-minimal-edits", is_flag=True, default=False)
     debug = click.option("--debug", is_flag=True, default=False)
 
 
@@ -25,6 +45,48 @@ def set_up_logging(debug):
     suppress_dbt_cli_output()
 
 
+def execute(
+    command: str,
+    project_dirs: tuple[str, ...],
+    project_params: ProjectParams,
+    resource_params: ResourceParams,
+    manifest_params: ManifestParams,
+    lookup_params: LookupParams,
+    storage_params: StorageParams,
+    *,
+    jobs: int | None,
+    dry_run: bool,
+    incremental: bool,
+):
+    expanded_dirs = expand_project_dirs(list(project_dirs))
+    if len(expanded_dirs) <= 1 and project_dirs == tuple(expanded_dirs):
+        if expanded_dirs:
+            project_params = project_params.with_project_dir(expanded_dirs[0])
+        pumpkin = Pumpkin(project_params, resource_params, manifest_params, lookup_params, storage_params)
+        getattr(pumpkin, command)(dry_run=dry_run, incremental=incremental)
+        return
+
+    if manifest_params.manifest_path:
+        msg = "--manifest can't be used with several projects"
+        raise click.UsageError(msg)
+
+    results = execute_projects(
+        command,
+        expanded_dirs,
+        project_params,
+        resource_params,
+        manifest_params,
+        lookup_params,
+        storage_params,
+        jobs=jobs,
+        dry_run=dry_run,
+        incremental=incremental,
+    )
+    log_summary(command, results)
+    if not all(r.success for r in results):
+        sys.exit(1)
+
+
 @click.group
 @click.version_option()
 def cli():
@@ -32,66 +94,242 @@ def cli():
 
 
 @cli.command
-@P.project_dir
+@P.project_dirs
 @P.profiles_dir
 @P.target
 @P.profile
 @P.select
 @P.exclude
+@P.manifest
+@P.reuse_manifest
+@P.low_memory
+@P.jobs
+@P.yaml_workers
+@P.yaml_cache
+@P.yaml_minimal_edits
+@P.incremental
 @P.dry_run
 @P.debug
-def bootstrap(project_dir, profiles_dir, target, profile, select, exclude, dry_run, debug):
+def bootstrap(
+    project_dirs,
+    profiles_dir,
+    target,
+    profile,
+    select,
+    exclude,
+    manifest,
+    reuse_manifest,
+    low_memory,
+    jobs,
+    yaml_workers,
+    yaml_cache,
+    yaml_minimal_edits,
+    incremental,
+    dry_run,
+    debug,
+):
     """
     Bootstraps project by adding missing YAML definitions
     """
     set_up_logging(debug)
 
-    project_params = ProjectParams(project_dir=project_dir, profiles_dir=profiles_dir, target=target, profile=profile)
+    project_params = ProjectParams(profiles_dir=profiles_dir, target=target, profile=profile)
     resource_params = ResourceParams(select=select, exclude=exclude)
-    pumpkin = Pumpkin(project_params, resource_params)
-    pumpkin.bootstrap(dry_run=dry_run)
+    manifest_params = ManifestParams(manifest_path=manifest, reuse_manifest=reuse_manifest, low_memory=low_memory)
+    execute(
+        "bootstrap",
+        project_dirs,
+        project_params,
+        resource_params,
+        manifest_params,
+        LookupParams(),
+        StorageParams(workers=yaml_workers, yaml_cache=yaml_cache, yaml_minimal_edits=yaml_minimal_edits),
+        jobs=jobs,
+        dry_run=dry_run,
+        incremental=incremental,
+    )
 
 
 @cli.command
-@P.project_dir
+@P.project_dirs
 @P.profiles_dir
 @P.target
 @P.profile
 @P.select
 @P.exclude
+@P.manifest
+@P.reuse_manifest
+@P.low_memory
+@P.jobs
+@P.yaml_workers
+@P.yaml_cache
+@P.yaml_minimal_edits
+@P.incremental
 @P.dry_run
 @P.debug
-def relocate(project_dir, profiles_dir, target, profile, select, exclude, dry_run, debug):
+def relocate(
+    project_dirs,
+    profiles_dir,
+    target,
+    profile,
+    select,
+    exclude,
+    manifest,
+    reuse_manifest,
+    low_memory,
+    jobs,
+    yaml_workers,
+    yaml_cache,
+    yaml_minimal_edits,
+    incremental,
+    dry_run,
+    debug,
+):
     """
     Relocates YAML definitions according to dbt-pumpkin-path configuration
     """
     set_up_logging(debug)
 
-    project_params = ProjectParams(project_dir=project_dir, profiles_dir=profiles_dir, target=target, profile=profile)
+    project_params = ProjectParams(profiles_dir=profiles_dir, target=target, profile=profile)
     resource_params = ResourceParams(select=select, exclude=exclude)
-    pumpkin = Pumpkin(project_params, resource_params)
-    pumpkin.relocate(dry_run=dry_run)
+    manifest_params = ManifestParams(manifest_path=manifest, reuse_manifest=reuse_manifest, low_memory=low_memory)
+    execute(
+        "relocate",
+        project_dirs,
+        project_params,
+        resource_params,
+        manifest_params,
+        LookupParams(),
+        StorageParams(workers=yaml_workers, yaml_cache=yaml_cache, yaml_minimal_edits=yaml_minimal_edits),
+        jobs=jobs,
+        dry_run=dry_run,
+        incremental=incremental,
+    )
 
 
 @cli.command
-@P.project_dir
+@P.project_dirs
 @P.profiles_dir
 @P.target
 @P.profile
 @P.select
 @P.exclude
+@P.manifest
+@P.reuse_manifest
+@P.low_memory
+@P.threads
+@P.catalog
+@P.cache_ttl
+@P.refresh
+@P.refresh_select
+@P.jobs
+@P.yaml_workers
+@P.yaml_cache
+@P.yaml_minimal_edits
+@P.incremental
 @P.dry_run
 @P.debug
-def synchronize(project_dir, profiles_dir, target, profile, select, exclude, dry_run, debug):
+def synchronize(
+    project_dirs,
+    profiles_dir,
+    target,
+    profile,
+    select,
+    exclude,
+    manifest,
+    reuse_manifest,
+    low_memory,
+    threads,
+    catalog,
+    cache_ttl,
+    refresh,
+    refresh_select,
+    jobs,
+    yaml_workers,
+    yaml_cache,
+    yaml_minimal_edits,
+    incremental,
+    dry_run,
+    debug,
+):
     """
     Synchronizes YAML definitions with actual tables in DB
     """
     set_up_logging(debug)
 
+    project_params = ProjectParams(profiles_dir=profiles_dir, target=target, profile=profile)
+    resource_params = ResourceParams(select=select, exclude=exclude)
+    manifest_params = ManifestParams(manifest_path=manifest, reuse_manifest=reuse_manifest, low_memory=low_memory)
+    lookup_params = LookupParams(
+        threads=threads,
+        catalog_path=catalog,
+        cache_ttl=cache_ttl,
+        refresh=refresh,
+        refresh_select=refresh_select,
+    )
+    execute(
+        "synchronize",
+        project_dirs,
+        project_params,
+        resource_params,
+        manifest_params,
+        lookup_params,
+        StorageParams(workers=yaml_workers, yaml_cache=yaml_cache, yaml_minimal_edits=yaml_minimal_edits),
+        jobs=jobs,
+        dry_run=dry_run,
+        incremental=incremental,
+    )
+
+
+@cli.command
+@P.project_dir
+@P.profiles_dir
+@P.target
+@P.profile
+@P.manifest
+@P.reuse_manifest
+@P.low_memory
+@P.threads
+@P.socket_path
+@P.debug
+def serve(
+    project_dir, profiles_dir, target, profile, manifest, reuse_manifest, low_memory, threads, socket_path, debug
+):
+    """
+    Serves bootstrap, relocate and synchronize requests on a Unix socket keeping DBT manifest loaded
+    """
+    set_up_logging(debug)
+
+    from dbt_pumpkin.server import PumpkinServer
+
+    project_params = ProjectParams(project_dir=project_dir, profiles_dir=profiles_dir, target=target, profile=profile)
+    manifest_params = ManifestParams(manifest_path=manifest, reuse_manifest=reuse_manifest, low_memory=low_memory)
+    lookup_params = LookupParams(threads=threads)
+    server = PumpkinServer(project_params, manifest_params, lookup_params)
+    server.serve(socket_path or server.locate_socket())
+
+
+@cli.command
+@P.project_dir
+@P.profiles_dir
+@P.target
+@P.profile
+@P.select
+@P.exclude
+@P.interval
+@P.dry_run
+@P.debug
+def watch(project_dir, profiles_dir, target, profile, select, exclude, interval, dry_run, debug):
+    """
+    Watches project files, bootstraps and relocates changed resources
+    """
+    set_up_logging(debug)
+
+    from dbt_pumpkin.watch import ProjectWatch
+
     project_params = ProjectParams(project_dir=project_dir, profiles_dir=profiles_dir, target=target, profile=profile)
     resource_params = ResourceParams(select=select, exclude=exclude)
-    pumpkin = Pumpkin(project_params, resource_params)
-    pumpkin.synchronize(dry_run=dry_run)
+    ProjectWatch(project_params, resource_params).run(interval, dry_run=dry_run)
 
 
 def main():
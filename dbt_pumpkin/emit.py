@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from dbt_pumpkin.data import YamlFormat
+
+# Scalars which are written by ruamel as is, e.g. names of Resources and columns
+_PLAIN_SCALAR = re.compile(r"[A-Za-z_][A-Za-z0-9_]*\Z")
+# Booleans and nulls of YAML 1.1 or 1.2, ruamel quotes some of them
+_RESERVED_SCALARS = frozenset(["true", "false", "yes", "no", "on", "off", "y", "n", "null"])
+_DEFAULT_MAX_WIDTH = 80
+
+
+def _scalar(value: any) -> str | None:
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if type(value) is int:
+        return str(value)
+    if type(value) is str and _PLAIN_SCALAR.match(value) and value.lower() not in _RESERVED_SCALARS:
+        return value
+    return None
+
+
+class _Emitter:
+    def __init__(self, map_indent: int, sequence_indent: int, sequence_dash_offset: int):
+        self._map_indent = map_indent
+        self._sequence_indent = sequence_indent
+        self._sequence_dash_offset = sequence_dash_offset
+        self.lines: list[str] = []
+
+    def mapping(self, value: dict, indent: int, first_prefix: str | None = None) -> bool:
+        for index, (key, item) in enumerate(value.items()):
+            key_scalar = _scalar(key) if type(key) is str else None
+            if key_scalar is None:
+                return False
+
+            prefix = first_prefix if index == 0 and first_prefix is not None else " " * indent
+            if type(item) in (dict, list) and not item:
+                self.lines.append(f"{prefix}{key_scalar}: {'{}' if type(item) is dict else '[]'}\n")
+            elif type(item) is dict:
+                self.lines.append(f"{prefix}{key_scalar}:\n")
+                if not self.mapping(item, indent + self._map_indent):
+                    return False
+            elif type(item) is list:
+                self.lines.append(f"{prefix}{key_scalar}:\n")
+                if not self.sequence(item, indent):
+                    return False
+            else:
+                item_scalar = _scalar(item)
+                if item_scalar is None:
+                    return False
+                self.lines.append(f"{prefix}{key_scalar}: {item_scalar}\n")
+
+        return True
+
+    def sequence(self, value: list, indent: int) -> bool:
+        dash = " " * (indent + self._sequence_dash_offset) + "-"
+        prefix = dash + " " * (indent + self._sequence_indent - len(dash))
+        for item in value:
+            if type(item) is dict and item:
+                if not self.mapping(item, indent + self._sequence_indent, prefix):
+                    return False
+            else:
+                item_scalar = _scalar(item)
+                if item_scalar is None:
+                    return False
+                self.lines.append(f"{prefix}{item_scalar}\n")
+
+        return True
+
+
+def emit_yaml(content: any, yaml_format: YamlFormat | None) -> str | None:
+    """
+    Emits a document of plain dicts, lists and simple scalars (e.g. bootstrapped Resources) exactly as round-trip
+    ruamel does, but much faster. Returns None if the document has anything else, it must be dumped by ruamel then.
+    """
+    map_indent, sequence_indent, sequence_dash_offset = 2, 2, 0
+    if yaml_format and yaml_format.indent is not None and yaml_format.offset is not None:
+        map_indent = yaml_format.indent
+        sequence_indent = yaml_format.indent + yaml_format.offset
+        sequence_dash_offset = yaml_format.offset
+
+    # ruamel places the first key of a mapping differently if it doesn't fit after the dash
+    if sequence_indent - sequence_dash_offset < 2 or type(content) is not dict or not content:
+        return None
+
+    emitter = _Emitter(map_indent, sequence_indent, sequence_dash_offset)
+    if not emitter.mapping(content, 0):
+        return None
+
+    # ruamel moves scalars to the next line if the line is too long
+    max_width = (yaml_format.max_width if yaml_format else None) or _DEFAULT_MAX_WIDTH
+    if any(len(line) - 1 > max_width for line in emitter.lines):
+        return None
+
+    return "".join(emitter.lines)
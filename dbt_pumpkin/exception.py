@@ -27,3 +27,7 @@ class PropertyNotAllowedError(PumpkinError):
     def __init__(self, property_name, details):
         msg = f"Property  {property_name} is not allowed: {details}"
         super().__init__(msg)
+
+
+class UnsupportedSelectorError(PumpkinError):
+    pass
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+# Directories with DBT artifacts and dependencies, changes there don't affect the project
+_IGNORED_DIRS = frozenset(["target", "dbt_packages", "dbt_modules", "logs", "__pycache__"])
+
+
+def snapshot_files(path: Path) -> dict[str, tuple[int, int]]:
+    """
+    Returns modification time and size of a file or every file in a directory, used to detect changes
+    """
+    if path.is_file():
+        stat = path.stat()
+        return {str(path): (stat.st_mtime_ns, stat.st_size)}
+
+    result = {}
+    for root, dirs, files in os.walk(path):
+        dirs[:] = [d for d in dirs if d not in _IGNORED_DIRS and not d.startswith(".")]
+        for file in files:
+            file_path = Path(root) / file
+            try:
+                stat = file_path.stat()
+            except OSError:
+                # removed in the meantime
+                continue
+            result[str(file_path)] = (stat.st_mtime_ns, stat.st_size)
+    return result
@@ -1,23 +1,51 @@
 from __future__ import annotations
 
+import gc
+import hashlib
 import json
 import logging
 import os
 import shutil
 import tempfile
+import time
 from collections import Counter
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import chain
 from pathlib import Path
-from typing import TYPE_CHECKING, Callable
+from typing import TYPE_CHECKING, Callable, Iterator
 
+from dbt.adapters.factory import FACTORY, reset_adapters
 from dbt.cli.main import (
     EventMsg,
     Manifest,
     dbtRunner,
     dbtRunnerResult,
 )
-from dbt.cli.resolvers import default_project_dir
+from dbt.cli.resolvers import default_profiles_dir, default_project_dir
+from dbt.contracts.graph.manifest import WritableManifest
+from dbt.version import __version__ as dbt_version
 from ruamel.yaml import YAML
 
+try:
+    from dbt_common.clients.jinja import extract_toplevel_blocks
+except ImportError:
+    # DBT 1.7 and earlier
+    from dbt.clients.jinja import extract_toplevel_blocks
+
+try:
+    from dbt_common.exceptions import DbtRuntimeError
+except ImportError:
+    # DBT 1.7 and earlier
+    from dbt.exceptions import DbtRuntimeError
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+
+from dbt_pumpkin.cache import TableCache
 from dbt_pumpkin.data import (
     Resource,
     ResourceColumn,
@@ -28,27 +56,376 @@ from dbt_pumpkin.data import (
     TableColumn,
     YamlFormat,
 )
-from dbt_pumpkin.exception import PumpkinError
+from dbt_pumpkin.exception import PumpkinError, UnsupportedSelectorError
+from dbt_pumpkin.manifest import macro_sql_checksum, read_compact_manifest, read_run_results_args
+from dbt_pumpkin.params import LookupParams, ManifestParams, ResourceParams
+from dbt_pumpkin.selector import ResourceSelector
 
 if TYPE_CHECKING:
     from dbt.contracts.graph.nodes import ModelNode, SeedNode, SnapshotNode, SourceDefinition
 
-    from dbt_pumpkin.params import ProjectParams, ResourceParams
+    from dbt_pumpkin.manifest import CompactManifest, CompactNode
+    from dbt_pumpkin.params import ProjectParams
 
 logger = logging.getLogger(__name__)
 
 
+def _get_memory_usage() -> int | None:
+    """
+    Returns current resident set size in bytes, unlike peak usage it goes down when memory is released
+    """
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        # Linux only
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+_RESOURCE_FILE_SUFFIXES = {".sql", ".py", ".csv"}
+_YAML_FILE_SUFFIXES = {".yml", ".yaml"}
+_RESULT_PREFIX = "dbt-pumpkin:"
+_PUMPKIN_PROJECT_PREFIX = "dbt_pumpkin_"
+_PUMPKIN_PROJECT_MAX_AGE = 7 * 24 * 60 * 60
+# Arguments DBT project was parsed with, manifest.json doesn't have them
+_MANIFEST_STATE_FILE = "dbt_pumpkin_manifest_state.json"
+
+
 class ResourceLoader:
-    def __init__(self, project_params: ProjectParams, resource_params: ResourceParams) -> None:
+    def __init__(
+        self,
+        project_params: ProjectParams,
+        resource_params: ResourceParams,
+        manifest_params: ManifestParams | None = None,
+        lookup_params: LookupParams | None = None,
+        manifest: Manifest | CompactManifest | None = None,
+    ) -> None:
         self._project_params = project_params
         self._resource_params = resource_params
-        self._manifest: Manifest = None
+        self._manifest_params = manifest_params or ManifestParams()
+        self._lookup_params = lookup_params or LookupParams()
+        # Manifest may be loaded in advance, e.g. by a long-running server
+        self._manifest: Manifest | CompactManifest = manifest
         self._resource_ids: dict[ResourceType, set[ResourceID]] = None
+        self._refresh_resource_ids: set[ResourceID] = None
         self._resources: list[Resource] = None
         self._tables: list[Table] = None
+        # Kept when Manifest is released, catalog columns are built with Column class of the adapter
+        self._manifest_adapter_type: str | None = None
         self._yaml = YAML(typ="safe")
 
-    def _do_load_manifest(self) -> Manifest:
+    def locate_target_dir(self) -> Path:
+        target_path = os.environ.get("DBT_TARGET_PATH") or self._parse_project_yml().get("target-path", "target")
+        return self.locate_project_dir() / target_path
+
+    def _locate_default_manifest_artifact(self) -> Path:
+        return self.locate_target_dir() / "manifest.json"
+
+    def _locate_manifest_artifact(self) -> Path:
+        if self._manifest_params.manifest_path:
+            return Path(self._manifest_params.manifest_path)
+        return self._locate_default_manifest_artifact()
+
+    def _locate_profiles_dir(self) -> Path:
+        profiles_dir = self._project_params.profiles_dir or os.environ.get("DBT_PROFILES_DIR") or default_profiles_dir()
+        return Path(profiles_dir).expanduser().resolve()
+
+    def _locate_packages_install_dir(self) -> Path:
+        install_path = os.environ.get("DBT_PACKAGES_INSTALL_PATH") or self._parse_project_yml().get(
+            "packages-install-path", "dbt_packages"
+        )
+        return self.locate_project_dir() / install_path
+
+    def _locate_package_dirs(self) -> dict[str, Path]:
+        """
+        Returns root directories of the project and installed packages by package name
+        """
+        result = {self.get_project_name(): self.locate_project_dir()}
+
+        install_dir = self._locate_packages_install_dir()
+        if install_dir.is_dir():
+            for package_dir in sorted(install_dir.iterdir()):
+                package_yml_path = package_dir / "dbt_project.yml"
+                if package_yml_path.is_file():
+                    package_name = (self._yaml.load(package_yml_path) or {}).get("name")
+                    if package_name:
+                        result.setdefault(package_name, package_dir)
+
+        return result
+
+    def _get_invocation_state(self) -> dict[str, any]:
+        """
+        Returns DBT arguments which change the manifest but are not reflected in project files
+        """
+        return {
+            "profiles_dir": str(self._locate_profiles_dir()),
+            "profile": self._project_params.profile or self._parse_project_yml()["profile"],
+            "target": self._project_params.target or os.environ.get("DBT_TARGET"),
+            # dbt-pumpkin doesn't pass --vars to DBT
+            "vars": {},
+        }
+
+    def _write_invocation_state(self, invocation_id: str):
+        state_path = self.locate_target_dir() / _MANIFEST_STATE_FILE
+        state = {"invocation_id": invocation_id, **self._get_invocation_state()}
+        state_path.write_text(json.dumps(state, indent=2), encoding="utf-8")
+
+    def _read_invocation_state(self, manifest_dir: Path, invocation_id: str | None) -> dict[str, any] | None:
+        """
+        Returns DBT arguments the manifest was built with, or None if they are unknown.
+
+        They are recorded by dbt-pumpkin when it parses the project, DBT commands other than parse
+        record them in run_results.json
+        """
+        if not invocation_id:
+            return None
+
+        state_path = manifest_dir / _MANIFEST_STATE_FILE
+        if state_path.is_file():
+            state = json.loads(state_path.read_text(encoding="utf-8"))
+            if state.get("invocation_id") == invocation_id:
+                return state
+
+        run_results_path = manifest_dir / "run_results.json"
+        if run_results_path.is_file():
+            run_results_invocation_id, args = read_run_results_args(run_results_path)
+            if run_results_invocation_id == invocation_id:
+                profiles_dir = args.get("profiles_dir") or default_profiles_dir()
+                return {
+                    "profiles_dir": str(Path(profiles_dir).expanduser().resolve()),
+                    "profile": args.get("profile") or self._parse_project_yml()["profile"],
+                    "target": args.get("target"),
+                    "vars": args.get("vars") or {},
+                }
+
+        return None
+
+    def _get_profile_target(self) -> tuple[str | None, dict[str, any]]:
+        """
+        Returns name of the target after applying the default of the profile and its unrendered output settings
+        """
+        state = self._get_invocation_state()
+        profiles_yml_path = Path(state["profiles_dir"]) / "profiles.yml"
+        profile = {}
+        if profiles_yml_path.is_file():
+            profile = (self._yaml.load(profiles_yml_path) or {}).get(state["profile"]) or {}
+
+        target = state["target"] or profile.get("target")
+        return target, (profile.get("outputs") or {}).get(target) or {}
+
+    def _get_profile_adapter_type(self) -> str | None:
+        """
+        Returns adapter type of the target, or None if it can't be determined without rendering profiles.yml
+        """
+        _, output = self._get_profile_target()
+        adapter_type = output.get("type")
+        if not isinstance(adapter_type, str) or "{{" in adapter_type:
+            return None
+        return adapter_type
+
+    def _detect_stale_invocation(self, manifest: Manifest | CompactManifest, manifest_path: Path) -> str | None:
+        """
+        Compares DBT version, profile, target and vars the manifest was built with to the current ones
+        """
+        metadata = manifest.metadata
+
+        manifest_dbt_version = getattr(metadata, "dbt_version", None)
+        if manifest_dbt_version and manifest_dbt_version != dbt_version:
+            return f"built with DBT {manifest_dbt_version}"
+
+        state = self._read_invocation_state(manifest_path.parent, getattr(metadata, "invocation_id", None))
+        if state is None:
+            return "profile, target and vars it was built with are unknown"
+
+        for key, value in self._get_invocation_state().items():
+            if state.get(key) != value:
+                return f"built with another {key.replace('_', ' ')}"
+
+        manifest_adapter_type = getattr(metadata, "adapter_type", None)
+        adapter_type = self._get_profile_adapter_type()
+        if manifest_adapter_type and adapter_type and manifest_adapter_type != adapter_type:
+            return f"built for {manifest_adapter_type} adapter"
+
+        return None
+
+    @staticmethod
+    def _macro_sql_checksums(path: Path) -> Counter[str]:
+        # The same way DBT extracts macro_sql from macro files
+        blocks = extract_toplevel_blocks(
+            path.read_text(encoding="utf-8"),
+            allowed_blocks={"macro", "materialization", "test", "data_test"},
+            collect_raw_data=False,
+        )
+        return Counter(macro_sql_checksum(b.full_block) for b in blocks if getattr(b, "full_block", None))
+
+    def _detect_stale_macros(self, manifest: Manifest | CompactManifest, package_dirs: dict[str, Path]) -> str | None:
+        """
+        Compares macros of the project and installed packages with macro files. Macros of DBT and adapters change
+        only with DBT version
+        """
+        project_dir = self.locate_project_dir()
+        project_name = self.get_project_name()
+        checksums_by_file: dict[tuple[str, str], Counter[str]] = {}
+
+        for macro in manifest.macros.values():
+            if macro.package_name not in package_dirs:
+                continue
+            checksum = getattr(macro, "sql_checksum", None) or macro_sql_checksum(macro.macro_sql)
+            checksums_by_file.setdefault((macro.package_name, macro.original_file_path), Counter())[checksum] += 1
+
+        for (package_name, path_str), checksums in sorted(checksums_by_file.items()):
+            path = Path(path_str) if package_name == project_name else f"{package_name}://{path_str}"
+            resolved_path = package_dirs[package_name] / path_str
+            if not resolved_path.is_file():
+                return f"{path} was removed"
+            if self._macro_sql_checksums(resolved_path) != checksums:
+                return f"{path} was modified"
+
+        known_paths = {Path(p) for n, p in checksums_by_file if n == project_name}
+        for macro_dir in self._parse_project_yml().get("macro-paths", ["macros"]):
+            for file in sorted((project_dir / macro_dir).rglob("*.sql")):
+                path = file.relative_to(project_dir)
+                if path not in known_paths and self._macro_sql_checksums(file):
+                    return f"{path} was added"
+
+        return None
+
+    def _detect_stale_manifest(
+        self, manifest: Manifest | CompactManifest, manifest_path: Path, manifest_mtime: float
+    ) -> str | None:
+        """
+        Compares manifest with files in DBT project, returns the reason why manifest is stale or None.
+
+        Resource and macro files are compared by checksum (the same way DBT does it), YAML files, packages
+        and profiles - by modification time. Profile, target and vars are compared with the ones manifest was built
+        with.
+        """
+        project_dir = self.locate_project_dir()
+        project_name = self.get_project_name()
+
+        manifest_project_name = getattr(manifest.metadata, "project_name", None)
+        if manifest_project_name and manifest_project_name != project_name:
+            return f"built for project {manifest_project_name}"
+
+        stale_reason = self._detect_stale_invocation(manifest, manifest_path)
+        if stale_reason:
+            return stale_reason
+
+        config_paths = [
+            project_dir / "dbt_project.yml",
+            project_dir / "packages.yml",
+            project_dir / "dependencies.yml",
+            project_dir / "package-lock.yml",
+            self._locate_profiles_dir() / "profiles.yml",
+        ]
+        for config_path in config_paths:
+            if config_path.is_file() and config_path.stat().st_mtime > manifest_mtime:
+                return f"{config_path.name} was modified"
+
+        # `dbt deps` re-creates installed packages
+        install_dir = self._locate_packages_install_dir()
+        if install_dir.is_dir() and install_dir.stat().st_mtime > manifest_mtime:
+            return "packages were installed"
+
+        known_paths: set[Path] = set()
+        disabled_nodes = chain.from_iterable(manifest.disabled.values())
+
+        for node in chain(manifest.nodes.values(), manifest.sources.values(), disabled_nodes):
+            if node.package_name != project_name:
+                continue
+
+            path = Path(node.original_file_path)
+            known_paths.add(path)
+
+            resolved_path = project_dir / path
+            if not resolved_path.is_file():
+                return f"{path} was removed"
+
+            checksum = getattr(node, "checksum", None)
+            if checksum and checksum.name == "sha256":
+                # DBT calculates checksum of stripped file content
+                content = resolved_path.read_bytes().decode("utf-8").strip()
+                if hashlib.sha256(content.encode("utf-8")).hexdigest() != checksum.checksum:
+                    return f"{path} was modified"
+            elif checksum and checksum.name in {"path", "none"}:
+                # DBT doesn't calculate checksum of big seeds and Resources defined in YAML (e.g. Sources)
+                if resolved_path.stat().st_mtime > manifest_mtime:
+                    return f"{path} was modified"
+            elif checksum:
+                return f"{path} has unknown checksum {checksum.name}"
+
+            patch_path = getattr(node, "patch_path", None)
+            if patch_path and patch_path.startswith(project_name + "://"):
+                yaml_path = Path(patch_path.split("://")[-1])
+                if not (project_dir / yaml_path).is_file():
+                    return f"{yaml_path} was removed"
+
+        stale_reason = self._detect_stale_macros(manifest, self._locate_package_dirs())
+        if stale_reason:
+            return stale_reason
+
+        # Resource directories are configured in dbt_project.yml and may contain Jinja,
+        # so we scan top level directories which are known to contain resources
+        resource_dirs = {p.parts[0] for p in known_paths if len(p.parts) > 1} | {"models", "seeds", "snapshots"}
+
+        for resource_dir in sorted(resource_dirs):
+            for file in (project_dir / resource_dir).rglob("*"):
+                if file.suffix in _RESOURCE_FILE_SUFFIXES and file.relative_to(project_dir) not in known_paths:
+                    return f"{file.relative_to(project_dir)} was added"
+                if file.suffix in _YAML_FILE_SUFFIXES and file.stat().st_mtime > manifest_mtime:
+                    return f"{file.relative_to(project_dir)} was modified"
+
+        return None
+
+    def _read_manifest_artifact(self, manifest_path: Path) -> Manifest | CompactManifest:
+        if self._manifest_params.low_memory:
+            return read_compact_manifest(manifest_path, self.get_project_name())
+
+        writable_manifest = WritableManifest.read_and_check_versions(str(manifest_path))
+        return Manifest.from_writable_manifest(writable_manifest)
+
+    def _do_read_manifest(self) -> Manifest | CompactManifest | None:
+        """
+        Reads previously generated manifest.json. Returns None if the manifest can't be reused.
+        """
+        manifest_path = self._locate_manifest_artifact()
+
+        if not self._manifest_params.low_memory and not hasattr(Manifest, "from_writable_manifest"):
+            logger.warning("Installed DBT version can't reuse manifest.json, manifest will be parsed")
+            return None
+
+        if not manifest_path.is_file():
+            logger.warning("Manifest not found, manifest will be parsed: %s", manifest_path)
+            return None
+
+        logger.debug("Reading manifest %s", manifest_path)
+        manifest_mtime = manifest_path.stat().st_mtime
+
+        try:
+            result = self._read_manifest_artifact(manifest_path)
+        except KeyboardInterrupt as e:
+            raise e  # noqa: TRY201
+        except Exception as e:  # noqa: BLE001
+            # Incompatible schema versions or malformed manifest
+            logger.warning("Failed to read manifest %s, manifest will be parsed: %s", manifest_path, e)
+            return None
+
+        stale_reason = self._detect_stale_manifest(result, manifest_path, manifest_mtime)
+        if stale_reason:
+            logger.warning("Manifest is stale (%s), manifest will be parsed: %s", stale_reason, manifest_path)
+            return None
+
+        logger.info("Manifest reused. Sources: %s, Nodes: %s", len(result.sources), len(result.nodes))
+
+        return result
+
+    def _do_load_manifest(self) -> Manifest | CompactManifest:
+        if self._manifest_params.enabled:
+            result = self._do_read_manifest()
+            if result is not None:
+                return result
+
         logger.debug("Parsing manifest")
 
         args = ["parse", *self._project_params.to_args()]
@@ -63,35 +440,70 @@ class ResourceLoader:
         result: Manifest = res.result
 
         logger.info("Manifest parsed. Sources: %s, Nodes: %s", len(result.sources), len(result.nodes))
+        self._write_invocation_state(result.metadata.invocation_id)
+
+        if self._manifest_params.low_memory:
+            # dbt parse has just written manifest.json, don't keep full Manifest in memory
+            del res, result
+            # Registered DBT adapter keeps a reference to the Manifest it was used with
+            reset_adapters()
+            gc.collect()
+            return read_compact_manifest(self._locate_default_manifest_artifact(), self.get_project_name())
 
         return result
 
-    def load_manifest(self) -> Manifest:
+    def load_manifest(self) -> Manifest | CompactManifest:
         if self._manifest is None:
             self._manifest = self._do_load_manifest()
+            self._manifest_adapter_type = getattr(self._manifest.metadata, "adapter_type", None)
         return self._manifest
 
-    def _do_list_all_resource_ids(self) -> dict[ResourceType, set[ResourceID]]:
+    def release_manifest(self):
         """
-        Returns a dictionary mapping resource type to a set of resource identifiers
+        Drops DBT Manifest so that it can be garbage collected before YAML files are processed.
+
+        Should be called once Resources are selected, Manifest is loaded again if needed.
+        """
+        if self._manifest is None:
+            return
+
+        logger.debug("Releasing manifest")
+        memory_usage = _get_memory_usage()
+        self._manifest = None
+        # Registered DBT adapter keeps a reference to the Manifest it was used with
+        reset_adapters()
+        gc.collect()
+
+        if memory_usage is not None:
+            logger.info(
+                "Memory usage before releasing manifest: %.1f MiB, after: %.1f MiB",
+                memory_usage / 1024 / 1024,
+                _get_memory_usage() / 1024 / 1024,
+            )
+
+    def _do_dbt_list_resource_ids(self, resource_params: ResourceParams) -> dict[ResourceType, set[ResourceID]]:
+        """
+        Lists selected resources with `dbt list` command
         """
         manifest = self.load_manifest()
-        logger.debug("Listing selected resources")
-        args = ["list", *self._project_params.to_args(), *self._resource_params.to_args(), "--output", "json"]
+        logger.debug("Listing selected resources with DBT")
+        args = ["list", *self._project_params.to_args(), *resource_params.to_args(), "--output", "json"]
 
         logger.debug("Command line: %s", args)
-        res: dbtRunnerResult = dbtRunner(manifest).invoke(args)
+        # DBT can't use compact manifest and will parse the project
+        res: dbtRunnerResult = dbtRunner(manifest if isinstance(manifest, Manifest) else None).invoke(args)
 
         if not res.success:
             logger.error("Listing failed, dbt exception %s", res.exception)
             raise res.exception
 
         result: dict[ResourceType, set[ResourceID]] = {}
+        supported_types = ResourceType.values()
 
         for raw_resource in res.result:
             resource = json.loads(raw_resource)
             resource_type_str = resource["resource_type"]
-            if resource_type_str in ResourceType.values():
+            if resource_type_str in supported_types:
                 res_type = ResourceType(resource_type_str)
                 res_id = ResourceID(resource["unique_id"])
 
@@ -101,6 +513,42 @@ class ResourceLoader:
 
         return result
 
+    def _do_list_all_resource_ids(self) -> dict[ResourceType, set[ResourceID]]:
+        """
+        Returns a dictionary mapping resource type to a set of resource identifiers
+        """
+        manifest = self.load_manifest()
+        logger.debug("Listing selected resources")
+
+        nodes_by_id = {**manifest.nodes, **manifest.sources}
+
+        selector = ResourceSelector(manifest, self.get_project_name(), self.locate_project_dir())
+        try:
+            selected_ids = selector.select(self._resource_params.select, self._resource_params.exclude)
+        except UnsupportedSelectorError as e:
+            logger.info("%s, falling back to dbt list", e)
+            return self._do_dbt_list_resource_ids(self._resource_params)
+
+        result: dict[ResourceType, set[ResourceID]] = {}
+        supported_types = ResourceType.values()
+
+        for unique_id in selected_ids:
+            # Compact manifest doesn't keep package nodes and unsupported resource types
+            node = nodes_by_id.get(unique_id)
+            if node is None:
+                continue
+
+            resource_type_str = str(node.resource_type)
+            if resource_type_str in supported_types:
+                res_type = ResourceType(resource_type_str)
+                res_id = ResourceID(unique_id)
+
+                result.setdefault(res_type, set()).add(res_id)
+
+                logger.debug("Selected %s", res_id)
+
+        return result
+
     def list_all_resource_ids(self) -> dict[ResourceType, set[ResourceID]]:
         """
         Returns all Resource Identifiers (grouped by Resource type) defined in DBT project (including packages)
@@ -110,14 +558,40 @@ class ResourceLoader:
 
         return self._resource_ids
 
-    def select_raw_resources(self) -> list[SourceDefinition | SeedNode | ModelNode | SnapshotNode]:
+    def _do_select_refresh_resource_ids(self) -> set[ResourceID]:
+        refresh_params = ResourceParams(select=self._lookup_params.refresh_select)
+        manifest = self.load_manifest()
+
+        selector = ResourceSelector(manifest, self.get_project_name(), self.locate_project_dir())
+        try:
+            return {ResourceID(i) for i in selector.select(refresh_params.select, None)}
+        except UnsupportedSelectorError as e:
+            logger.info("%s, falling back to dbt list", e)
+            resource_ids = self._do_dbt_list_resource_ids(refresh_params)
+            return set(chain.from_iterable(resource_ids.values()))
+
+    def select_refresh_resource_ids(self) -> set[ResourceID]:
+        """
+        Returns Resource Identifiers selected by --refresh-select, their tables are looked up bypassing the cache.
+
+        Requires Manifest, so should be called before it's released.
+        """
+        if self._refresh_resource_ids is None:
+            if self._lookup_params.refresh_select:
+                self._refresh_resource_ids = self._do_select_refresh_resource_ids()
+            else:
+                self._refresh_resource_ids = set()
+
+        return self._refresh_resource_ids
+
+    def select_raw_resources(self) -> list[SourceDefinition | SeedNode | ModelNode | SnapshotNode | CompactNode]:
         """
         Returns a list of raw Resources that can be processed by dbt-pumpkin.
 
         Resources defined in a package or having YAML description defined in a package are filtered out.
         """
         manifest = self.load_manifest()
-        results: list[SourceDefinition | SeedNode | ModelNode | SnapshotNode] = []
+        results: list[SourceDefinition | SeedNode | ModelNode | SnapshotNode | CompactNode] = []
 
         project_name = self.get_project_name()
         project_path_path_prefix = project_name + "://"
@@ -214,6 +688,12 @@ class ResourceLoader:
 
         return self._resources
 
+    def skip_resources(self, resource_ids: set[ResourceID]):
+        """
+        Removes Resources from selection, so they are neither planned nor looked up
+        """
+        self._resources = [r for r in self.select_resources() if r.unique_id not in resource_ids]
+
     def locate_project_dir(self) -> Path:
         """
         Locates project directory according to DBT project look up rules.
@@ -225,10 +705,28 @@ class ResourceLoader:
             self._project_params.project_dir or os.environ.get("DBT_PROJECT_DIR", None) or default_project_dir()
         )
 
-    def _create_pumpkin_project(self, project_vars: dict[str, any]) -> Path:
+    @staticmethod
+    def _remove_stale_pumpkin_projects(temp_dir: Path, current_dir: Path):
+        expiration_time = time.time() - _PUMPKIN_PROJECT_MAX_AGE
+        for path in temp_dir.glob(_PUMPKIN_PROJECT_PREFIX + "*"):
+            try:
+                if path != current_dir and path.is_dir() and path.stat().st_mtime < expiration_time:
+                    logger.debug("Removing stale temp DBT project %s", path)
+                    shutil.rmtree(path)
+            except OSError as e:
+                # Can be used or removed by another process
+                logger.debug("Failed to remove stale temp DBT project %s: %s", path, e)
+
+    def _prepare_pumpkin_project(self) -> Path:
         """
-        Creates fake DBT project with provided "vars" section.
+        Returns fake DBT project with dbt-pumpkin macros.
         Allows hacking into DBT without using any internal DBT API.
+
+        Project directory name is a hash of its content and of profile and target it's run with, so the project
+        is reused between runs and DBT can partially parse it. Projects which were not used for a while are removed.
+
+        Macro arguments are passed directly from Python while operation is running, not as project "vars",
+        so the project doesn't grow with the number of resources.
         """
         src_macros_path = Path(__file__).parent / "macros"
 
@@ -242,26 +740,73 @@ class ResourceLoader:
             "name": "dbt_pumpkin",
             "version": "0.1.0",
             "profile": project_yml["profile"],
-            # TODO: copy vars?
-            "vars": project_vars,
         }
 
-        # OS may delete temp directory, keep fingers crossed
-        pumpkin_dir_str = tempfile.mkdtemp(prefix="dbt_pumpkin_")
-        pumpkin_dir = Path(pumpkin_dir_str)
-        target_macros_dir = pumpkin_dir / "macros"
+        # Partial parsing state in target directory is valid only for the same profile and target
+        invocation_state = {k: v for k, v in self._get_invocation_state().items() if k != "vars"}
+        content_hash = hashlib.sha256(json.dumps([pumpkin_yml, invocation_state], sort_keys=True).encode("utf-8"))
+        for path in sorted(src_macros_path.rglob("*")):
+            if path.is_file():
+                content_hash.update(path.relative_to(src_macros_path).as_posix().encode("utf-8"))
+                content_hash.update(path.read_bytes())
+
+        temp_dir = Path(tempfile.gettempdir())
+        pumpkin_dir = temp_dir / f"{_PUMPKIN_PROJECT_PREFIX}{content_hash.hexdigest()[:16]}"
+
+        self._remove_stale_pumpkin_projects(temp_dir, pumpkin_dir)
+
+        if pumpkin_dir.is_dir():
+            logger.debug("Reusing temp DBT project %s", pumpkin_dir)
+            # Keep it from being removed as stale
+            os.utime(pumpkin_dir)
+            return pumpkin_dir
+
+        # Project is built aside and moved in place at once, other runs may be doing the same
+        build_dir = Path(tempfile.mkdtemp(prefix=_PUMPKIN_PROJECT_PREFIX))
+        target_macros_dir = build_dir / "macros"
 
         logger.debug("Copying macros to %s", target_macros_dir)
         shutil.copytree(src_macros_path, target_macros_dir)
 
-        target_project_yml = pumpkin_dir / "dbt_project.yml"
+        target_project_yml = build_dir / "dbt_project.yml"
         logger.debug("Creating temp dbt_project.yml at %s", target_project_yml)
         self._yaml.dump(pumpkin_yml, target_project_yml)
 
-        logger.debug("Created temp DBT project %s", pumpkin_dir)
+        try:
+            build_dir.rename(pumpkin_dir)
+        except OSError:
+            logger.debug("Temp DBT project was created concurrently %s", pumpkin_dir)
+            shutil.rmtree(build_dir, ignore_errors=True)
+        else:
+            logger.debug("Created temp DBT project %s", pumpkin_dir)
 
         return pumpkin_dir
 
+    @staticmethod
+    @contextmanager
+    def _lock_pumpkin_project(pumpkin_dir: Path) -> Iterator[list[str]]:
+        """
+        Yields DBT arguments to run an operation in the fake DBT project with.
+
+        DBT writes target and logs directories of the project while running. The process which locks the project
+        uses them and keeps partial parsing state there, concurrent processes use their own temp directories.
+        """
+        with (pumpkin_dir / ".lock").open("a") as lock_file:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    logger.debug("Temp DBT project is used by another process %s", pumpkin_dir)
+                else:
+                    yield []
+                    return
+
+            run_dir = Path(tempfile.mkdtemp(prefix=_PUMPKIN_PROJECT_PREFIX + "run_"))
+            try:
+                yield ["--target-path", str(run_dir / "target"), "--log-path", str(run_dir / "logs")]
+            finally:
+                shutil.rmtree(run_dir, ignore_errors=True)
+
     def _parse_project_yml(self) -> dict[str, any]:
         logger.debug("Parsing dbt_project.yml")
 
@@ -297,54 +842,198 @@ class ResourceLoader:
         return YamlFormat.from_dict(yaml_format)
 
     def _run_operation(
-        self, operation_name: str, project_vars: dict[str, any] | None, result_callback: Callable[[any], None]
+        self,
+        operation_name: str,
+        result_callback: Callable[[any], None],
+        extra_args: list[str] | None = None,
     ):
-        pumpkin_dir = self._create_pumpkin_project(project_vars)
+        pumpkin_dir = self._prepare_pumpkin_project()
+
+        with self._lock_pumpkin_project(pumpkin_dir) as path_args:
+            self._do_run_operation(pumpkin_dir, operation_name, result_callback, [*path_args, *(extra_args or [])])
 
+    def _do_run_operation(
+        self, pumpkin_dir: Path, operation_name: str, result_callback: Callable[[any], None], extra_args: list[str]
+    ):
         project_params = self._project_params.with_project_dir(str(pumpkin_dir))
 
-        args = ["run-operation", operation_name, *project_params.to_args()]
+        args = ["run-operation", operation_name, *project_params.to_args(), *extra_args]
         logger.debug("Command line: %s", args)
 
+        callback_errors: list[Exception] = []
+        # See pumpkin_result macro
+        result_prefix = f"{_RESULT_PREFIX}{operation_name}:"
+
         def event_callback(event: EventMsg):
-            if event.info.name in {"JinjaLogInfo", "JinjaLogDebug"}:
-                try:
-                    potential_result = json.loads(str(event.info.msg))
-                    if operation_name in potential_result:
-                        result_callback(potential_result[operation_name])
-                    else:
-                        logger.debug("Ignoring potential result: no '%s' key: %s", operation_name, potential_result)
-                except KeyboardInterrupt as e:
-                    raise e  # noqa: TRY201
-                except Exception:  # noqa: BLE001
-                    # We DO need to catch any exceptions while handling events
-                    # otherwise dbtRunner will exit with exception
-                    logger.warning("Failed to parse potential result %s", event.info)
+            if event.info.name not in {"JinjaLogInfo", "JinjaLogDebug"}:
+                return
+
+            msg = str(event.info.msg)
+            # Cheap check first, only results of the operation are parsed
+            if not msg.startswith(result_prefix):
+                return
+
+            try:
+                result_callback(json.loads(msg[len(result_prefix) :]))
+            except KeyboardInterrupt as e:
+                raise e  # noqa: TRY201
+            except Exception as e:
+                # DBT reports only a message of an exception raised by operation, keep the original one
+                callback_errors.append(e)
+                raise
 
         res: dbtRunnerResult = dbtRunner(callbacks=[event_callback]).invoke(args)
 
+        if callback_errors:
+            raise callback_errors[0]
+
         if not res.success:
             msg = f"Run operation failure: {operation_name}. Exception: {res.exception}"
             raise PumpkinError(msg)
 
-    def _do_lookup_tables(self) -> list[Table]:
-        logger.info("Looking up tables")
+    @staticmethod
+    def _lookup_schema_tables(adapter: any, database: str, schema: str, identifiers: dict[str, str]) -> list[dict]:
+        """
+        Looks up tables in one schema with a dedicated adapter connection, runs in a worker thread
+        """
+        with adapter.connection_named(f"dbt_pumpkin_lookup_{schema}"):
+            columns_by_resource_id = adapter.execute_macro(
+                "lookup_schema_tables", kwargs={"database": database, "schema": schema, "identifiers": identifiers}
+            )
 
-        raw_resources = self.select_raw_resources()
-        project_vars = {
-            "lookup_tables_args": {
-                str(resource.unique_id): [resource.database, resource.schema, resource.identifier]
-                for resource in raw_resources
-            },
-        }
+        results = []
+        for resource_id in identifiers:
+            columns = columns_by_resource_id.get(resource_id)
+            results.append(
+                {
+                    "resource_id": resource_id,
+                    "columns": None
+                    if columns is None
+                    else [
+                        {
+                            "name": c.name,
+                            "is_string": c.is_string(),
+                            "is_numeric": c.is_numeric(),
+                            "dtype": c.dtype,
+                            "data_type": c.data_type,
+                        }
+                        for c in columns
+                    ],
+                }
+            )
+        return results
+
+    def _lookup_tables_concurrently(
+        self, adapter_type: str, resources: list[Resource], on_result: Callable[[dict], None]
+    ):
+        """
+        Looks up tables using DBT adapter registered by running operation.
 
-        tables: list[Table] = []
+        Resources are grouped by schema, large schemas are split in chunks, so that every thread has some work.
+        Results are reported to on_result from the calling thread as soon as a chunk is looked up.
+        """
+        adapter = FACTORY.lookup_adapter(adapter_type)
+        threads = self._lookup_params.threads or adapter.config.threads or 1
+
+        identifiers_by_schema: dict[tuple[str, str], dict[str, str]] = {}
+        for resource in resources:
+            identifiers_by_schema.setdefault((resource.database, resource.schema), {})[str(resource.unique_id)] = (
+                resource.identifier
+            )
+
+        chunk_size = max(1, -(-len(resources) // threads))
+        chunks: list[tuple[str, str, dict[str, str]]] = []
+        for (database, schema), identifiers in identifiers_by_schema.items():
+            items = list(identifiers.items())
+            for start in range(0, len(items), chunk_size):
+                chunks.append((database, schema, dict(items[start : start + chunk_size])))
+
+        logger.debug("Looking up %s tables in %s chunks using %s threads", len(resources), len(chunks), threads)
+
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="dbt_pumpkin_lookup") as executor:
+            futures = [executor.submit(self._lookup_schema_tables, adapter, *chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                for result in future.result():
+                    on_result(result)
+
+    def _get_catalog_column_class(self) -> type | None:
+        """
+        Returns Column class of the adapter, the same one the adapter builds looked up columns with
+        """
+        adapter_type = self._get_profile_adapter_type() or self._manifest_adapter_type
+        if adapter_type is None:
+            return None
+
+        try:
+            FACTORY.load_plugin(adapter_type)
+        except DbtRuntimeError as e:
+            msg = f"Failed to load {adapter_type} adapter: {e}"
+            raise PumpkinError(msg) from e
+        return FACTORY.get_adapter_class_by_name(adapter_type).Column
+
+    def _read_catalog_tables(self, resources: list[Resource]) -> dict[ResourceID, Table]:
+        """
+        Builds Tables from catalog.json generated by `dbt docs generate`, returns only Tables found in the catalog.
+
+        Catalog entries are matched by relation, so the catalog may be generated for a different selection.
+        """
+        catalog_path = Path(self._lookup_params.catalog_path)
+        if not catalog_path.is_file():
+            msg = f"Catalog not found: {catalog_path}"
+            raise PumpkinError(msg)
+
+        column_class = self._get_catalog_column_class()
+        if column_class is None:
+            # Base Column renders types differently than some adapters, which would churn YAML files
+            logger.warning("Adapter type is unknown, catalog is not used: %s", catalog_path)
+            return {}
+
+        logger.info("Reading catalog %s", catalog_path)
+        with catalog_path.open(encoding="utf-8") as file:
+            catalog = json.load(file)
+
+        def relation_key(database: str | None, schema: str | None, identifier: str) -> tuple:
+            return tuple(part.lower() if part else None for part in (database, schema, identifier))
+
+        catalog_columns_by_relation: dict[tuple, list[dict]] = {}
+        for entry in chain(catalog.get("nodes", {}).values(), catalog.get("sources", {}).values()):
+            metadata = entry["metadata"]
+            key = relation_key(metadata.get("database"), metadata.get("schema"), metadata["name"])
+            catalog_columns_by_relation[key] = sorted(entry["columns"].values(), key=lambda c: c["index"])
+
+        results: dict[ResourceID, Table] = {}
+        for resource in resources:
+            catalog_columns = catalog_columns_by_relation.get(
+                relation_key(resource.database, resource.schema, resource.identifier)
+            )
+            if not catalog_columns:
+                continue
+
+            columns: list[TableColumn] = []
+            for catalog_column in catalog_columns:
+                # Same as information_schema based lookup: type as is, without size, precision and scale
+                column = column_class(catalog_column["name"], catalog_column["type"])
+                columns.append(
+                    TableColumn(
+                        name=column.name,
+                        dtype=column.dtype,
+                        data_type=column.data_type,
+                        is_numeric=column.is_numeric(),
+                        is_string=column.is_string(),
+                    )
+                )
+
+            results[resource.unique_id] = Table(resource_id=resource.unique_id, columns=columns)
+
+        return results
+
+    def _do_lookup_database_tables(self, resources: list[Resource], on_table: Callable[[Table], None]):
         processed: list[str] = []
 
         def on_result(result: dict):
             resource_id: str = result["resource_id"]
             processed.append(resource_id)
-            logger.info("Processing %s / %s: %s", len(processed), len(raw_resources), resource_id)
+            logger.info("Processing %s / %s: %s", len(processed), len(resources), resource_id)
 
             columns: list[dict] = result["columns"]
             # If tables doesn't exist columns is None
@@ -352,20 +1041,108 @@ class ResourceLoader:
                 logger.warning("Relation doesn't exist: %s", resource_id)
                 return
 
-            tables.append(
+            on_table(
                 Table(
                     resource_id=ResourceID(resource_id),
                     columns=[TableColumn(**c) for c in columns],
                 )
             )
 
-        self._run_operation("lookup_tables", project_vars, on_result)
+        def on_adapter_type(adapter_type: str):
+            self._lookup_tables_concurrently(adapter_type, resources, on_result)
+
+        self._run_operation("lookup_tables", on_adapter_type, self._lookup_params.to_args())
+
+    def _open_table_cache(self) -> TableCache:
+        return TableCache(
+            self.locate_target_dir() / "dbt_pumpkin_tables.json",
+            ttl=self._lookup_params.cache_ttl,
+            max_entries=self._lookup_params.cache_max_entries,
+        )
+
+    def _get_cache_target(self) -> str:
+        """
+        Identifies the target tables are looked up in: profile, target name and connection settings of profiles.yml
+        """
+        state = self._get_invocation_state()
+        target, output = self._get_profile_target()
+        # Profiles with the same name in different profiles.yml may connect to different databases
+        connection = json.dumps([state["profiles_dir"], output], sort_keys=True, default=str)
+        return f"{state['profile']}:{target or ''}:{hashlib.sha256(connection.encode('utf-8')).hexdigest()[:16]}"
+
+    def _do_lookup_tables(self, on_table: Callable[[Table], None]):
+        logger.info("Looking up tables")
+
+        # Resources don't need Manifest, so it may be already released
+        resources = self.select_resources()
+        found = 0
+
+        cache: TableCache | None = None
+        cache_keys: dict[ResourceID, str] = {}
+        if self._lookup_params.cache_ttl:
+            cache = self._open_table_cache()
+            cache_target = self._get_cache_target()
+            refresh_ids = self.select_refresh_resource_ids()
+            not_cached: list[Resource] = []
+            cached = 0
+
+            for resource in resources:
+                key = TableCache.key(cache_target, resource.database, resource.schema, resource.identifier)
+                cache_keys[resource.unique_id] = key
+
+                if self._lookup_params.refresh or resource.unique_id in refresh_ids:
+                    cache.invalidate(key)
+                    not_cached.append(resource)
+                    continue
+
+                table = cache.get(key, resource.unique_id)
+                if table is None:
+                    not_cached.append(resource)
+                else:
+                    cached += 1
+                    on_table(table)
+
+            logger.info("Found %s tables in cache, %s tables to look up", cached, len(not_cached))
+            found += cached
+            resources = not_cached
+
+        if self._lookup_params.catalog_path and resources:
+            catalog_tables = self._read_catalog_tables(resources)
+            for table in catalog_tables.values():
+                on_table(table)
+            resources = [r for r in resources if r.unique_id not in catalog_tables]
+            logger.info("Found %s tables in catalog, %s tables to look up", len(catalog_tables), len(resources))
+            found += len(catalog_tables)
+
+        if resources:
+
+            def on_database_table(table: Table):
+                nonlocal found
+                found += 1
+                if cache is not None:
+                    cache.put(cache_keys[table.resource_id], table)
+                on_table(table)
+
+            self._do_lookup_database_tables(resources, on_database_table)
 
-        logger.info("Found %s tables", len(tables))
+        if cache is not None:
+            cache.save()
 
-        return tables
+        logger.info("Found %s tables", found)
+
+    def lookup_tables(self, on_table: Callable[[Table], None] | None = None) -> list[Table] | None:
+        """
+        Looks up tables of selected Resources.
+
+        If on_table is passed, every Table is passed to it as soon as it's found (and not kept in memory),
+        otherwise all Tables are returned.
+        """
+        if on_table is not None:
+            self._do_lookup_tables(on_table)
+            return None
 
-    def lookup_tables(self):
         if self._tables is None:
-            self._tables = self._do_lookup_tables()
+            tables: list[Table] = []
+            self._do_lookup_tables(tables.append)
+            self._tables = tables
         return self._tables
@@ -1,27 +1,72 @@
+{#
+    Reports adapter type. While this operation is running dbt-pumpkin looks up tables
+    with lookup_schema_tables from multiple threads, see ResourceLoader._lookup_tables_concurrently
+#}
 {% macro lookup_tables() %}
-    {% for resource_id, database_schema_identifier in var('lookup_tables_args').items() %}
-        {% set database, schema, identifier = database_schema_identifier %}
-        {% set relation = adapter.get_relation(database, schema, identifier) %}
+    {{ pumpkin_result('lookup_tables', adapter.type()) }}
+{% endmacro %}
+
+
+{#
+    Returns a dictionary mapping resource ID to a list of columns of its relation in the given schema.
+    Resources without relation are omitted.
+#}
+{% macro lookup_schema_tables(database, schema, identifiers) %}
+    {{ return(adapter.dispatch('lookup_schema_tables', 'dbt_pumpkin')(database, schema, identifiers)) }}
+{% endmacro %}
 
-        {% set result = {
-            'resource_id': resource_id,
-            'columns': none
-        } %}
 
+{# Looks up every relation separately, works with any adapter #}
+{% macro default__lookup_schema_tables(database, schema, identifiers) %}
+    {% set result = {} %}
+    {% for resource_id, identifier in identifiers.items() %}
+        {% set relation = adapter.get_relation(database, schema, identifier) %}
         {% if relation is not none %}
-            {% set columns = [] %}
-            {% for column in adapter.get_columns_in_relation(relation) %}
-                {% do columns.append({
-                    'name': column.name,
-                    'is_string': column.is_string(),
-                    'is_numeric': column.is_numeric(),
-                    'dtype': column.dtype,
-                    'data_type': column.data_type,
-                }) %}
-            {% endfor %}
-            {% do result.update({'columns': columns}) %}
+            {% do result.update({resource_id: adapter.get_columns_in_relation(relation)}) %}
         {% endif %}
+    {% endfor %}
+    {{ return(result) }}
+{% endmacro %}
 
-        {{ log(tojson( {'lookup_tables': result} )) }}
+
+{# Looks up columns of all relations in a schema with a single query #}
+{% macro duckdb__lookup_schema_tables(database, schema, identifiers) %}
+    {% call statement('lookup_schema_tables', fetch_result=True) %}
+        select
+            table_name,
+            column_name,
+            data_type,
+            character_maximum_length,
+            numeric_precision,
+            numeric_scale
+        from system.information_schema.columns
+        where lower(table_name) in (
+            {%- for identifier in identifiers.values() | map('lower') | unique -%}
+                '{{ identifier | replace("'", "''") }}'{{ ", " if not loop.last }}
+            {%- endfor -%}
+        )
+        {% if schema %}
+        and lower(table_schema) = '{{ schema | lower | replace("'", "''") }}'
+        {% endif %}
+        {% if database %}
+        and lower(table_catalog) = '{{ database | lower | replace("'", "''") }}'
+        {% endif %}
+        order by table_name, ordinal_position
+    {% endcall %}
+
+    {% set columns_by_identifier = {} %}
+    {% for row in load_result('lookup_schema_tables').table %}
+        {% set table_name, column_name, data_type, char_size, numeric_precision, numeric_scale = row %}
+        {% do columns_by_identifier.setdefault(table_name | lower, []).append(
+            api.Column(column_name, data_type, char_size, numeric_precision, numeric_scale)
+        ) %}
+    {% endfor %}
+
+    {% set result = {} %}
+    {% for resource_id, identifier in identifiers.items() %}
+        {% if (identifier | lower) in columns_by_identifier %}
+            {% do result.update({resource_id: columns_by_identifier[identifier | lower]}) %}
+        {% endif %}
     {% endfor %}
+    {{ return(result) }}
 {% endmacro %}
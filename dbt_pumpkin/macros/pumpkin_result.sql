@@ -0,0 +1,7 @@
+{#
+    Reports operation result to dbt-pumpkin. Results are logged with a prefix, so that dbt-pumpkin
+    doesn't need to parse unrelated log messages. Can be called multiple times to stream results.
+#}
+{% macro pumpkin_result(operation_name, result) %}
+    {{ log('dbt-pumpkin:' ~ operation_name ~ ':' ~ tojson(result)) }}
+{% endmacro %}
@@ -0,0 +1,361 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from typing import TYPE_CHECKING, NamedTuple
+
+from dbt_pumpkin.data import ResourceType
+from dbt_pumpkin.exception import PumpkinError
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+    from typing import TextIO
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = "0123456789.eE+-"
+
+
+class _JsonStream:
+    """
+    Minimal pull parser for JSON documents which are too big to be loaded at once.
+
+    Objects can be iterated entry by entry, every value is either decoded or skipped,
+    so memory usage is bounded by the biggest single value actually decoded.
+    """
+
+    def __init__(self, file: TextIO, chunk_size: int):
+        self._file = file
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size: int) -> bool:
+        if self._eof:
+            return False
+        chunk = self._file.read(size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill(self._chunk_size):
+                return ""
+
+    def _expect(self, expected: str) -> str:
+        char = self._peek()
+        if char not in expected:
+            msg = f"Malformed JSON: expected one of '{expected}', got '{char}'"
+            raise PumpkinError(msg)
+        self._pos += 1
+        return char
+
+    def value(self) -> any:
+        self._peek()
+        size = self._chunk_size
+        while True:
+            try:
+                result, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill(size):
+                    raise
+                size *= 2
+                continue
+            # A number at the end of buffer may be truncated
+            truncated = end == len(self._buffer) or self._buffer[end] in _NUMBER_CHARS
+            if truncated and self._fill(size):
+                continue
+            self._pos = end
+            return result
+
+    def keys(self) -> Iterator[str]:
+        """
+        Iterates keys of an object, the caller must consume every value with value() or skip()
+        """
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            self._expect(":")
+            yield key
+            if self._expect(",}") == "}":
+                return
+
+    def items(self) -> Iterator[None]:
+        """
+        Iterates items of an array, the caller must consume every item with value() or skip()
+        """
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield
+            if self._expect(",]") == "]":
+                return
+
+    def skip(self):
+        char = self._peek()
+        if char == "{":
+            for _ in self.keys():
+                self.skip()
+        elif char == "[":
+            for _ in self.items():
+                self.skip()
+        else:
+            self.value()
+
+
+class FileChecksum(NamedTuple):
+    name: str
+    checksum: str
+
+
+class DependsOn(NamedTuple):
+    nodes: tuple[str, ...]
+
+
+class CompactColumn(NamedTuple):
+    name: str
+    quote: bool | None
+    data_type: str | None
+    description: str | None
+
+
+class NodeStub(NamedTuple):
+    """
+    Subset of properties of any DBT node (including tests, package nodes and exposures) required to evaluate selection
+    """
+
+    unique_id: str
+    resource_type: str
+    name: str
+    package_name: str
+    source_name: str | None
+    fqn: tuple[str, ...]
+    tags: tuple[str, ...]
+    version: str | None
+    access: str | None
+    original_file_path: str
+    patch_path: str | None
+    config: dict[str, any]
+    depends_on: DependsOn
+
+    @classmethod
+    def from_dict(cls, data: dict[str, any]) -> NodeStub:
+        return NodeStub(
+            unique_id=data["unique_id"],
+            resource_type=data["resource_type"],
+            name=data["name"],
+            package_name=data["package_name"],
+            source_name=data.get("source_name"),
+            fqn=tuple(data["fqn"]),
+            tags=tuple(data.get("tags") or ()),
+            version=data.get("version"),
+            access=data.get("access"),
+            original_file_path=data["original_file_path"],
+            patch_path=data.get("patch_path"),
+            config=data.get("config") or {},
+            depends_on=DependsOn(tuple((data.get("depends_on") or {}).get("nodes") or ())),
+        )
+
+
+class CompactNode(NamedTuple):
+    """
+    Subset of DBT node properties which dbt-pumpkin needs to select and materialize Resources
+    """
+
+    unique_id: str
+    resource_type: str
+    name: str
+    package_name: str
+    source_name: str | None
+    fqn: tuple[str, ...]
+    tags: tuple[str, ...]
+    version: str | None
+    original_file_path: str
+    patch_path: str | None
+    checksum: FileChecksum | None
+    database: str
+    schema: str
+    identifier: str
+    config: dict[str, any]
+    depends_on: DependsOn
+    columns: dict[str, CompactColumn]
+
+    @classmethod
+    def from_dict(cls, data: dict[str, any]) -> CompactNode:
+        checksum = data.get("checksum")
+        return CompactNode(
+            unique_id=data["unique_id"],
+            resource_type=data["resource_type"],
+            name=data["name"],
+            package_name=data["package_name"],
+            source_name=data.get("source_name"),
+            fqn=tuple(data["fqn"]),
+            tags=tuple(data.get("tags") or ()),
+            version=data.get("version"),
+            original_file_path=data["original_file_path"],
+            patch_path=data.get("patch_path"),
+            checksum=FileChecksum(checksum["name"], checksum["checksum"]) if checksum else None,
+            database=data["database"],
+            schema=data["schema"],
+            # sources have identifier, other nodes - alias
+            identifier=data.get("identifier") or data["alias"],
+            config=data.get("config") or {},
+            depends_on=DependsOn(tuple((data.get("depends_on") or {}).get("nodes") or ())),
+            columns={
+                name: CompactColumn(
+                    name=column["name"],
+                    quote=column.get("quote"),
+                    data_type=column.get("data_type"),
+                    description=column.get("description"),
+                )
+                for name, column in (data.get("columns") or {}).items()
+            },
+        )
+
+
+class MacroStub(NamedTuple):
+    unique_id: str
+    package_name: str
+    original_file_path: str
+    # Checksum of macro_sql, macro_sql itself isn't kept
+    sql_checksum: str
+
+    @classmethod
+    def from_dict(cls, data: dict[str, any]) -> MacroStub:
+        return MacroStub(
+            unique_id=data["unique_id"],
+            package_name=data["package_name"],
+            original_file_path=data["original_file_path"],
+            sql_checksum=macro_sql_checksum(data.get("macro_sql") or ""),
+        )
+
+
+def macro_sql_checksum(macro_sql: str) -> str:
+    return hashlib.sha256(macro_sql.encode("utf-8")).hexdigest()
+
+
+class ManifestMetadata(NamedTuple):
+    project_name: str | None
+    dbt_schema_version: str | None
+    dbt_version: str | None = None
+    invocation_id: str | None = None
+    adapter_type: str | None = None
+
+
+class CompactManifest(NamedTuple):
+    """
+    Memory efficient replacement of DBT Manifest for dbt-pumpkin needs.
+
+    Contains only root project Sources, Seeds, Models and Snapshots, and stubs of all nodes, sources, exposures,
+    metrics, semantic models, saved queries and unit tests, so node selection (including graph operators) works
+    the same as with DBT Manifest. Macros are kept as checksums to detect stale manifest.
+    """
+
+    metadata: ManifestMetadata
+    nodes: dict[str, CompactNode]
+    sources: dict[str, CompactNode]
+    disabled: dict[str, list[CompactNode]]
+    selectable: dict[str, NodeStub]
+    macros: dict[str, MacroStub]
+
+
+def read_compact_manifest(path: Path, project_name: str, chunk_size: int = 1024 * 1024) -> CompactManifest:
+    """
+    Streams manifest.json keeping only information required by dbt-pumpkin
+    """
+    supported_types = ResourceType.values()
+
+    def is_required(data: dict[str, any]) -> bool:
+        return data["resource_type"] in supported_types and data["package_name"] == project_name
+
+    metadata = ManifestMetadata(None, None)
+    nodes: dict[str, CompactNode] = {}
+    sources: dict[str, CompactNode] = {}
+    disabled: dict[str, list[CompactNode]] = {}
+    selectable: dict[str, NodeStub] = {}
+    macros: dict[str, MacroStub] = {}
+
+    with path.open(encoding="utf-8") as file:
+        stream = _JsonStream(file, chunk_size)
+
+        for key in stream.keys():
+            if key == "metadata":
+                raw_metadata = stream.value()
+                metadata = ManifestMetadata(
+                    project_name=raw_metadata.get("project_name"),
+                    dbt_schema_version=raw_metadata.get("dbt_schema_version"),
+                    dbt_version=raw_metadata.get("dbt_version"),
+                    invocation_id=raw_metadata.get("invocation_id"),
+                    adapter_type=raw_metadata.get("adapter_type"),
+                )
+            elif key in {"nodes", "sources"}:
+                target = nodes if key == "nodes" else sources
+                for unique_id in stream.keys():
+                    data = stream.value()
+                    selectable[unique_id] = NodeStub.from_dict(data)
+                    if is_required(data):
+                        target[unique_id] = CompactNode.from_dict(data)
+            elif key in {"exposures", "metrics", "semantic_models", "saved_queries", "unit_tests"}:
+                # Not Resources, but they link nodes in the graph
+                for unique_id in stream.keys():
+                    selectable[unique_id] = NodeStub.from_dict(stream.value())
+            elif key == "macros":
+                for unique_id in stream.keys():
+                    macros[unique_id] = MacroStub.from_dict(stream.value())
+            elif key == "disabled":
+                for unique_id in stream.keys():
+                    required = [CompactNode.from_dict(d) for d in stream.value() if is_required(d)]
+                    if required:
+                        disabled[unique_id] = required
+            else:
+                stream.skip()
+
+    logger.debug("Compact manifest read. Sources: %s, Nodes: %s", len(sources), len(nodes))
+
+    return CompactManifest(
+        metadata=metadata,
+        nodes=nodes,
+        sources=sources,
+        disabled=disabled,
+        selectable=selectable,
+        macros=macros,
+    )
+
+
+def read_run_results_args(path: Path, chunk_size: int = 1024 * 1024) -> tuple[str | None, dict[str, any]]:
+    """
+    Streams run_results.json returning invocation ID and arguments of DBT command which wrote it, results are skipped
+    """
+    invocation_id: str | None = None
+    args: dict[str, any] = {}
+
+    with path.open(encoding="utf-8") as file:
+        stream = _JsonStream(file, chunk_size)
+
+        for key in stream.keys():
+            if key == "metadata":
+                invocation_id = stream.value().get("invocation_id")
+            elif key == "args":
+                args = stream.value()
+            else:
+                stream.skip()
+
+    return invocation_id, args
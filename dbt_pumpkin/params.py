@@ -27,6 +27,9 @@ class ProjectParams:
     def with_project_dir(self, project_dir: str) -> ProjectParams:
         return dataclasses.replace(self, project_dir=project_dir)
 
+    def with_profiles_dir(self, profiles_dir: str) -> ProjectParams:
+        return dataclasses.replace(self, profiles_dir=profiles_dir)
+
 
 @dataclass(frozen=True)
 class ResourceParams:
@@ -41,3 +44,39 @@ class ResourceParams:
             args += ["--exclude", exclude]
 
         return args
+
+
+@dataclass(frozen=True)
+class ManifestParams:
+    manifest_path: str | None = None
+    reuse_manifest: bool = False
+    low_memory: bool = False
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.manifest_path) or self.reuse_manifest
+
+
+@dataclass(frozen=True)
+class LookupParams:
+    threads: int | None = None
+    catalog_path: str | None = None
+    cache_ttl: int | None = None
+    cache_max_entries: int = 100_000
+    refresh: bool = False
+    refresh_select: list[str] | None = None
+
+    def to_args(self) -> list[str]:
+        args = []
+        if self.threads:
+            args += ["--threads", str(self.threads)]
+
+        return args
+
+
+@dataclass(frozen=True)
+class StorageParams:
+    workers: int | None = None
+    yaml_cache: bool = False
+    yaml_cache_max_size: int = 256 * 1024 * 1024
+    yaml_minimal_edits: bool = False
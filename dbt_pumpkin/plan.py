@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import logging
 from abc import ABC, abstractmethod
+from collections import Counter, deque
 from dataclasses import dataclass
 from enum import Enum
 from typing import TYPE_CHECKING
@@ -10,12 +11,18 @@ from dbt_pumpkin.data import ResourceType
 from dbt_pumpkin.exception import PropertyNotAllowedError, PropertyRequiredError, PumpkinError, ResourceNotFoundError
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
     from pathlib import Path
 
     from dbt_pumpkin.storage import Storage
 
 logger = logging.getLogger(__name__)
 
+# Files are loaded and saved in batches, so storage can process them in parallel
+_MAX_BATCH_FILES = 256
+# Prefetched files are kept in memory until they are used, only a few files ahead are prefetched
+_MAX_PREFETCH_FILES = 64
+
 
 @dataclass(frozen=True)
 class Action(ABC):
@@ -35,6 +42,19 @@ class Action(ABC):
         Applies changes to files in memory
         """
 
+    def modified_files(self, files: dict[Path, dict]) -> set[Path]:
+        """
+        Returns a set of files (paths) changed by this action, called after the action is executed
+        """
+        return self.affected_files()
+
+    def read_only_files(self) -> set[Path]:
+        """
+        Returns a set of affected files (paths) which content is only inspected by this action, it may be replaced
+        (e.g. with None to delete the file), but not changed
+        """
+        return set()
+
 
 @dataclass(frozen=True)
 class ResourceAction(Action, ABC):
@@ -91,6 +111,15 @@ class DeleteEmptyDescriptor(Action):
         if no_content:
             files[self.path] = None
 
+    def modified_files(self, files: dict[Path, dict]) -> set[Path]:
+        # File is only inspected unless it's deleted
+        if self.path in files and files[self.path] is None:
+            return {self.path}
+        return set()
+
+    def read_only_files(self) -> set[Path]:
+        return {self.path}
+
 
 @dataclass(frozen=True)
 class BootstrapResource(ResourceAction):
@@ -249,7 +278,27 @@ class Plan:
     def _affected_files(self) -> set[Path]:
         return {f for a in self.actions for f in a.affected_files()}
 
+    def _read_only_files(self) -> set[Path]:
+        read_only_files = {f for a in self.actions for f in a.read_only_files()}
+        changed_files = {f for a in self.actions for f in a.affected_files() - a.read_only_files()}
+        return read_only_files - changed_files
+
+    def _next_batch(self, start: int, loaded_files: set[Path]) -> tuple[int, set[Path]]:
+        """
+        Returns end of the batch of actions starting at `start` and files the batch needs to load
+        """
+        end = start
+        batch_files: set[Path] = set()
+        while end < len(self.actions) and len(batch_files) < _MAX_BATCH_FILES:
+            batch_files |= self.actions[end].affected_files() - loaded_files
+            end += 1
+        return end, batch_files
+
     def execute(self, storage: Storage, mode: ExecutionMode):
+        """
+        Executes actions in batches: files are loaded when an action of the batch affects them first time,
+        then saved and evicted from memory as soon as no later action affects them
+        """
         if not self.actions:
             logger.info("Nothing to do")
             return
@@ -257,15 +306,142 @@ class Plan:
         affected_files = self._affected_files()
         logger.info("Files affected by plan: %s", len(affected_files))
 
-        files = storage.load_yaml(affected_files)
-
-        for index, action in enumerate(self.actions):
-            logger.info("Action %s: %s", index + 1, action.describe())
-            action.execute(files)
+        last_actions = {f: index for index, a in enumerate(self.actions) for f in a.affected_files()}
+        # Files which are not going to be saved are loaded faster
+        read_only_files = affected_files if mode == ExecutionMode.DRY_RUN else self._read_only_files()
+
+        files: dict[Path, dict] = {}
+        loaded_files: set[Path] = set()
+        modified_files: set[Path] = set()
+        saved_files = 0
+        start = 0
+
+        while start < len(self.actions):
+            end, batch_files = self._next_batch(start, loaded_files)
+            if batch_files - read_only_files:
+                files.update(storage.load_yaml(batch_files - read_only_files))
+            if batch_files & read_only_files:
+                files.update(storage.load_yaml(batch_files & read_only_files, read_only=True))
+            loaded_files |= batch_files
+
+            for index in range(start, end):
+                action = self.actions[index]
+                logger.info("Action %s: %s", index + 1, action.describe())
+                action.execute(files)
+                modified_files |= action.modified_files(files)
+
+            # Files no later action needs are saved and evicted
+            done = {f: files.pop(f) for f in list(files) if last_actions[f] < end}
+            to_save = {f: c for f, c in done.items() if f in modified_files} if mode == ExecutionMode.RUN else {}
+            storage.release_yaml(done.keys() - to_save.keys())
+            if to_save:
+                logger.debug("Persisting changes to files: %s", len(to_save))
+                storage.save_yaml(to_save)
+                saved_files += len(to_save)
+
+            start = end
 
         if mode == ExecutionMode.RUN:
-            logger.info("Persisting changes to files: %s", len(affected_files))
-            storage.save_yaml(files)
+            logger.info("Persisted changes to files: %s", saved_files)
 
     def describe(self) -> str:
         return "\n".join(a.describe() for a in self.actions)
+
+
+class PlanStream:
+    """
+    Executes actions as soon as they are planned, without waiting for the whole Plan.
+
+    Files are loaded when an action affects them first time and saved as soon as no pending Resource refers to them,
+    so only files of Resources being processed are kept in memory. Up to _MAX_PREFETCH_FILES pending files are
+    prefetched ahead, the window moves as files are processed.
+    """
+
+    def __init__(self, storage: Storage, mode: ExecutionMode, pending_files: Iterable[Path]):
+        self._storage = storage
+        self._mode = mode
+        self._pending_files = Counter(pending_files)
+        self._files: dict[Path, dict] = {}
+        self._read_only_files: set[Path] = set()
+        self._modified_files: set[Path] = set()
+        self._actions: list[Action] = []
+        self._prefetch_queue = deque(self._pending_files)
+        self._prefetching: set[Path] = set()
+
+        # Files are read and parsed while tables are being looked up
+        self._prefetch()
+
+    def _prefetch(self):
+        # Loaded and processed files leave the window
+        self._prefetching = {f for f in self._prefetching if f in self._pending_files and f not in self._files}
+
+        to_prefetch = set()
+        while self._prefetch_queue and len(self._prefetching) < _MAX_PREFETCH_FILES:
+            file = self._prefetch_queue.popleft()
+            if file in self._pending_files and file not in self._files:
+                self._prefetching.add(file)
+                to_prefetch.add(file)
+
+        if to_prefetch:
+            self._storage.prefetch_yaml(to_prefetch, read_only=self._mode == ExecutionMode.DRY_RUN)
+
+    def execute(self, actions: list[Action]):
+        affected_files = {f for a in actions for f in a.affected_files()}
+        changed_files = set()
+        if self._mode == ExecutionMode.RUN:
+            changed_files = {f for a in actions for f in a.affected_files() - a.read_only_files()}
+
+        # Files loaded read only are loaded again when they are going to be changed first time
+        to_load = (affected_files - self._files.keys()) | (changed_files & self._read_only_files)
+        read_only_files = to_load - changed_files
+        self._read_only_files -= to_load
+        self._read_only_files |= read_only_files
+
+        if to_load - read_only_files:
+            self._files.update(self._storage.load_yaml(to_load - read_only_files))
+        if read_only_files:
+            self._files.update(self._storage.load_yaml(read_only_files, read_only=True))
+
+        for action in actions:
+            self._actions.append(action)
+            logger.info("Action %s: %s", len(self._actions), action.describe())
+            action.execute(self._files)
+            self._modified_files |= action.modified_files(self._files)
+
+    def release(self, path: Path):
+        """
+        Marks that one of pending Resources referring to the file is processed
+        """
+        self._pending_files[path] -= 1
+        if self._pending_files[path] <= 0:
+            del self._pending_files[path]
+            self._flush([path])
+        self._prefetch()
+
+    def _flush(self, paths: Iterable[Path]):
+        paths = set(paths)
+        # Files not affected by any action are not needed anymore
+        self._storage.cancel_prefetch(paths - self._files.keys())
+
+        files = {p: self._files.pop(p) for p in paths if p in self._files}
+        self._read_only_files -= paths
+        # Files only inspected by actions are not saved
+        self._storage.release_yaml({p for p in files if p not in self._modified_files})
+        files = {p: c for p, c in files.items() if p in self._modified_files}
+        self._modified_files -= paths
+        if files and self._mode == ExecutionMode.RUN:
+            logger.debug("Persisting changes to files: %s", len(files))
+            self._storage.save_yaml(files)
+
+    def close(self) -> Plan:
+        """
+        Saves files of Resources which were never processed, returns all executed actions
+        """
+        self._flush(set(self._files) | set(self._pending_files))
+        self._pending_files.clear()
+        self._prefetch_queue.clear()
+        self._prefetching.clear()
+
+        if not self._actions:
+            logger.info("Nothing to do")
+        return Plan(self._actions)
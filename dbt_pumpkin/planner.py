@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 import logging
 import re
 from abc import ABC, abstractmethod
@@ -132,9 +134,10 @@ class RelocationPlanner(ActionPlanner):
 
 
 class SynchronizationPlanner(ActionPlanner):
-    def __init__(self, resources: list[Resource], tables: list[Table]):
+    def __init__(self, resources: list[Resource], tables: list[Table] | None = None):
         self._resources = resources
-        self._tables = tables
+        self._resource_by_id = {r.unique_id: r for r in resources}
+        self._tables = tables or []
         self._dont_quote_re = re.compile("^[a-zA-Z_][a-zA-Z0-9_]*$")
 
     def _quote(self, name: str) -> bool:
@@ -231,6 +234,27 @@ class SynchronizationPlanner(ActionPlanner):
 
         return result
 
+    def _plan_resource(self, resource: Resource, table: Table) -> list[Action]:
+        if not resource.yaml_path:
+            logger.warning(
+                "Resource has no YAML path defined: %s. Consider using bootstrap command first",
+                resource.unique_id,
+            )
+            return []
+
+        return self._resource_plan(resource, table)
+
+    def plan_table(self, table: Table) -> list[Action]:
+        """
+        Plans actions for a single Table, allows planning Tables as soon as they are looked up
+        """
+        resource = self._resource_by_id.get(table.resource_id)
+        if not resource:
+            logger.warning("Resource not found for table: %s", table.resource_id)
+            return []
+
+        return self._plan_resource(resource, table)
+
     def plan(self) -> Plan:
         logger.info("Planning actions for %s resources", len(self._resources))
 
@@ -243,13 +267,7 @@ class SynchronizationPlanner(ActionPlanner):
             if not table:
                 logger.warning("Table not found for resource: %s", resource.unique_id)
                 continue
-            if not resource.yaml_path:
-                logger.warning(
-                    "Resource has no YAML path defined: %s. Consider using bootstrap command first",
-                    resource.unique_id,
-                )
-                continue
 
-            actions += self._resource_plan(resource, table)
+            actions += self._plan_resource(resource, table)
 
         return Plan(actions)
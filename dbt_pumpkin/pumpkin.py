@@ -1,51 +1,189 @@
+from __future__ import annotations
+
+import dataclasses
+import json
 import logging
-from typing import Callable
+import sys
+from typing import TYPE_CHECKING, Callable
 
-from dbt_pumpkin.loader import ResourceLoader
-from dbt_pumpkin.params import ProjectParams, ResourceParams
-from dbt_pumpkin.plan import ExecutionMode
+from dbt_pumpkin.cache import YamlCache
+from dbt_pumpkin.params import LookupParams, ManifestParams, ProjectParams, ResourceParams, StorageParams
+from dbt_pumpkin.plan import ExecutionMode, Plan, PlanStream
 from dbt_pumpkin.planner import ActionPlanner, BootstrapPlanner, RelocationPlanner, SynchronizationPlanner
-from dbt_pumpkin.storage import DiskStorage
+from dbt_pumpkin.storage import DiskStorage, ParallelDiskStorage, Storage
+
+if TYPE_CHECKING:
+    from dbt_pumpkin.data import Resource, Table
+    from dbt_pumpkin.loader import ResourceLoader
+    from dbt_pumpkin.state import ProjectState
 
 logger = logging.getLogger(__name__)
 
+# Pumpkin methods which can be executed by name, e.g. by server and for a batch of projects
+COMMANDS = frozenset(["bootstrap", "relocate", "synchronize"])
+
+
+def _log_peak_memory_usage(stage: str):
+    try:
+        import resource
+    except ImportError:
+        # Not available on Windows
+        return
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS - bytes
+    max_rss_mib = max_rss / 1024 / 1024 if sys.platform == "darwin" else max_rss / 1024
+    logger.info("Peak memory usage after %s: %.1f MiB", stage, max_rss_mib)
+
 
 class Pumpkin:
-    def __init__(self, project_params: ProjectParams, resource_params: ResourceParams) -> None:
+    def __init__(
+        self,
+        project_params: ProjectParams,
+        resource_params: ResourceParams,
+        manifest_params: ManifestParams | None = None,
+        lookup_params: LookupParams | None = None,
+        storage_params: StorageParams | None = None,
+        manifest: any = None,
+    ) -> None:
         self.project_params = project_params
         self.resource_params = resource_params
+        self.manifest_params = manifest_params or ManifestParams()
+        self.lookup_params = lookup_params or LookupParams()
+        self.storage_params = storage_params or StorageParams()
+        self.manifest = manifest
+
+    def _open_state(self, command: str) -> ProjectState:
+        from dbt_pumpkin.state import ProjectState, locate_project_dir
+
+        run_key = json.dumps(
+            [
+                dataclasses.asdict(self.project_params),
+                dataclasses.asdict(self.resource_params),
+                dataclasses.asdict(self.lookup_params),
+            ]
+        )
+        return ProjectState(locate_project_dir(self.project_params), command, run_key)
+
+    def _create_storage(self, loader: ResourceLoader) -> Storage:
+        project_dir = loader.locate_project_dir()
+        yaml_format = loader.detect_yaml_format()
+
+        yaml_cache: YamlCache | None = None
+        if self.storage_params.yaml_cache:
+            yaml_cache = YamlCache(
+                loader.locate_target_dir() / "dbt_pumpkin_yaml",
+                max_size=self.storage_params.yaml_cache_max_size,
+                format_key=repr(yaml_format),
+            )
+
+        minimal_edits = self.storage_params.yaml_minimal_edits
+        if self.storage_params.workers and self.storage_params.workers > 1:
+            return ParallelDiskStorage(
+                project_dir, yaml_format, self.storage_params.workers, yaml_cache, minimal_edits=minimal_edits
+            )
+        return DiskStorage(project_dir, yaml_format, yaml_cache, minimal_edits=minimal_edits)
 
-    def _execute(self, create_planner: Callable[[ResourceLoader], ActionPlanner], *, dry_run: bool):
-        loader = ResourceLoader(self.project_params, self.resource_params)
+    @staticmethod
+    def _plan_then_execute(
+        create_planner: Callable[[ResourceLoader], ActionPlanner],
+    ) -> Callable[[ResourceLoader, Storage, ExecutionMode], Plan]:
+        def execute_plan(loader: ResourceLoader, storage: Storage, mode: ExecutionMode) -> Plan:
+            logger.debug("Creating action planner")
+            planner = create_planner(loader)
+            plan = planner.plan()
+            _log_peak_memory_usage("planning")
 
-        logger.debug("Creating action planner")
-        planner = create_planner(loader)
-        plan = planner.plan()
+            logger.info("Plan execution mode: %s", mode)
+            plan.execute(storage, mode)
+            return plan
 
-        storage = DiskStorage(loader.locate_project_dir(), loader.detect_yaml_format())
+        return execute_plan
+
+    def _execute(
+        self,
+        command: str,
+        execute_plan: Callable[[ResourceLoader, Storage, ExecutionMode], Plan],
+        *,
+        dry_run: bool,
+        incremental: bool,
+    ) -> Plan:
+        state: ProjectState | None = None
+        if incremental:
+            # Checked before DBT is imported, so unchanged project is processed in no time
+            state = self._open_state(command)
+            if state.is_project_unchanged():
+                logger.info("Project files are not changed since the last run, nothing to do")
+                return Plan([])
+
+        # DBT takes a while to import, it's not needed for CLI help and argument errors
+        from dbt_pumpkin.loader import ResourceLoader
+
+        loader = ResourceLoader(
+            self.project_params, self.resource_params, self.manifest_params, self.lookup_params, self.manifest
+        )
+
+        selected_resources: list[Resource] = []
+        if state is not None:
+            selected_resources = loader.select_resources()
+            unchanged_ids = state.select_unchanged(selected_resources)
+            logger.info("Skipping %s resources not changed since the last run", len(unchanged_ids))
+            loader.skip_resources(unchanged_ids)
+
+        storage = self._create_storage(loader)
         mode = ExecutionMode.DRY_RUN if dry_run else ExecutionMode.RUN
 
-        logger.info("Plan execution mode: %s", mode)
-        plan.execute(storage, mode)
+        try:
+            plan = execute_plan(loader, storage, mode)
+        finally:
+            storage.close()
+        _log_peak_memory_usage("execution")
+
+        if state is not None and mode == ExecutionMode.RUN:
+            state.save(selected_resources)
 
-    def bootstrap(self, *, dry_run: bool):
+        return plan
+
+    def bootstrap(self, *, dry_run: bool, incremental: bool = False) -> Plan:
         def create_planner(loader: ResourceLoader) -> ActionPlanner:
             resources = loader.select_resources()
+            loader.release_manifest()
             return BootstrapPlanner(resources)
 
-        self._execute(create_planner, dry_run=dry_run)
+        return self._execute(
+            "bootstrap", self._plan_then_execute(create_planner), dry_run=dry_run, incremental=incremental
+        )
 
-    def relocate(self, *, dry_run: bool):
+    def relocate(self, *, dry_run: bool, incremental: bool = False) -> Plan:
         def create_planner(loader: ResourceLoader) -> ActionPlanner:
             resources = loader.select_resources()
+            loader.release_manifest()
             return RelocationPlanner(resources)
 
-        self._execute(create_planner, dry_run=dry_run)
+        return self._execute(
+            "relocate", self._plan_then_execute(create_planner), dry_run=dry_run, incremental=incremental
+        )
 
-    def synchronize(self, *, dry_run: bool):
-        def create_planner(loader: ResourceLoader) -> ActionPlanner:
+    def synchronize(self, *, dry_run: bool, incremental: bool = False) -> Plan:
+        def execute_plan(loader: ResourceLoader, storage: Storage, mode: ExecutionMode) -> Plan:
             resources = loader.select_resources()
-            tables = loader.lookup_tables()
-            return SynchronizationPlanner(resources, tables)
+            # refresh selection is evaluated against Manifest
+            loader.select_refresh_resource_ids()
+            loader.release_manifest()
+
+            # Tables are planned and applied as soon as they are looked up, so YAML files are processed
+            # while other tables are still being looked up
+            planner = SynchronizationPlanner(resources)
+            yaml_paths = {r.unique_id: r.yaml_path for r in resources if r.yaml_path}
+            stream = PlanStream(storage, mode, yaml_paths.values())
+
+            def on_table(table: Table):
+                stream.execute(planner.plan_table(table))
+                if table.resource_id in yaml_paths:
+                    stream.release(yaml_paths[table.resource_id])
+
+            logger.info("Plan execution mode: %s", mode)
+            loader.lookup_tables(on_table)
+            return stream.close()
 
-        self._execute(create_planner, dry_run=dry_run)
+        return self._execute("synchronize", execute_plan, dry_run=dry_run, incremental=incremental)
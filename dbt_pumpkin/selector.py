@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass
+from fnmatch import fnmatch
+from itertools import chain
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from ruamel.yaml import YAML
+
+from dbt_pumpkin.exception import PumpkinError, UnsupportedSelectorError
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+# Same as in DBT: dbt.graph.selector_spec.RAW_SELECTOR_PATTERN
+_RAW_SELECTOR_PATTERN = re.compile(
+    r"\A"
+    r"(?P<childrens_parents>(\@))?"
+    r"(?P<parents>((?P<parents_depth>(\d*))\+))?"
+    r"((?P<method>([\w.]+)):)?(?P<value>(.*?))"
+    r"(?P<children>(\+(?P<children_depth>(\d*))))?"
+    r"\Z"
+)
+_WILDCARDS = ("*", "?", "[", "]")
+# Resources DBT links into the graph besides nodes and sources, they are selected by generic methods only
+_GRAPH_RESOURCES = ("exposures", "metrics", "semantic_models", "saved_queries", "unit_tests")
+_GRAPH_RESOURCE_TYPES = frozenset(["exposure", "metric", "semantic_model", "saved_query", "unit_test"])
+
+
+def _to_depth(value: str | None) -> int | None:
+    return int(value) if value else None
+
+
+@dataclass(frozen=True)
+class SelectionCriteria:
+    raw: str
+    method: str
+    arguments: tuple[str, ...]
+    value: str
+    parents: bool
+    parents_depth: int | None
+    children: bool
+    children_depth: int | None
+    childrens_parents: bool
+
+    @property
+    def has_graph_operators(self) -> bool:
+        return self.parents or self.children or self.childrens_parents
+
+    @classmethod
+    def parse(cls, raw: str) -> SelectionCriteria:
+        match = _RAW_SELECTOR_PATTERN.match(raw)
+        if match is None:
+            msg = f"Invalid selector spec: {raw}"
+            raise PumpkinError(msg)
+
+        value = match["value"]
+        if match["method"]:
+            method, *arguments = match["method"].split(".")
+        elif os.path.sep in value or (os.path.altsep and os.path.altsep in value):
+            method, arguments = "path", []
+        elif value.lower().endswith((".sql", ".py", ".csv")):
+            method, arguments = "file", []
+        else:
+            method, arguments = "fqn", []
+
+        result = SelectionCriteria(
+            raw=raw,
+            method=method,
+            arguments=tuple(arguments),
+            value=value,
+            parents=bool(match["parents"]),
+            parents_depth=_to_depth(match["parents_depth"]),
+            children=bool(match["children"]),
+            children_depth=_to_depth(match["children_depth"]),
+            childrens_parents=bool(match["childrens_parents"]),
+        )
+
+        if result.children and result.childrens_parents:
+            msg = f'Invalid selector spec {raw}: "@" prefix and "+" suffix are incompatible'
+            raise PumpkinError(msg)
+
+        return result
+
+
+def _is_selected_fqn(fqn: list[str], selector: str, *, is_versioned: bool) -> bool:
+    """
+    Port of dbt.graph.selector_methods.is_selected_node
+    """
+    selector_parts = selector.split(".")
+
+    if is_versioned:
+        if fqn[-2] == selector or "_".join(fqn[-2:]) == "_".join(selector_parts[-2:]):
+            return True
+    elif fqn[-1] == selector:
+        return True
+
+    flat_fqn = [item for segment in fqn for item in segment.split(".")]
+    if len(flat_fqn) < len(selector_parts):
+        return False
+
+    for index, selector_part in enumerate(selector_parts):
+        if any(wildcard in selector_part for wildcard in _WILDCARDS):
+            return fnmatch(".".join(flat_fqn[index:]), ".".join(selector_parts[index:]))
+        if flat_fqn[index] != selector_part:
+            return False
+
+    return True
+
+
+def _config_value(config: any, arguments: tuple[str, ...]) -> any:
+    value = config
+    for argument in arguments:
+        try:
+            value = getattr(value, argument)
+        except AttributeError:
+            # config is either DBT NodeConfig or a plain dict
+            value = value[argument]
+    return value
+
+
+def _config_matches(value: any, selector: str) -> bool:
+    candidates = value if isinstance(value, list) else [value]
+    for candidate in candidates:
+        if candidate is True and selector.lower() == "true":
+            return True
+        if candidate is False and selector.lower() == "false":
+            return True
+        if candidate == selector:
+            return True
+    return False
+
+
+class ResourceSelector:
+    """
+    Evaluates DBT node selection syntax (--select and --exclude) against parsed Manifest.
+
+    Supports the most popular selector methods, set and graph operators. Raises UnsupportedSelectorError
+    for anything else, in that case DBT should be used to select resources.
+    """
+
+    SUPPORTED_METHODS = frozenset(
+        ["fqn", "tag", "source", "path", "file", "package", "config", "resource_type", "group", "access"]
+    )
+
+    def __init__(self, manifest: any, project_name: str, project_dir: Path):
+        # Compact manifest keeps only root project Resources, and stubs of all nodes for selection
+        selectable = getattr(manifest, "selectable", None)
+        if selectable is None:
+            selectable = {**manifest.nodes, **manifest.sources}
+            for key in _GRAPH_RESOURCES:
+                selectable.update(getattr(manifest, key, None) or {})
+        self._nodes: dict[str, any] = selectable
+        self._project_name = project_name
+        self._project_dir = project_dir
+        self._parents: dict[str, set[str]] = None
+        self._children: dict[str, set[str]] = None
+
+    def select(self, select: Iterable[str] | None, exclude: Iterable[str] | None) -> set[str]:
+        """
+        Returns unique IDs of all nodes matching the selection. All nodes are selected if nothing is selected,
+        unless the project has a default selector
+        """
+        select_specs = self._parse(select)
+        exclude_specs = self._parse(exclude)
+
+        if not select_specs and not exclude_specs and self._has_default_selector():
+            msg = "Default selector is not supported"
+            raise UnsupportedSelectorError(msg)
+
+        for criteria in chain.from_iterable(chain(select_specs, exclude_specs)):
+            if criteria.method not in self.SUPPORTED_METHODS:
+                msg = f"Selector method is not supported: {criteria.raw}"
+                raise UnsupportedSelectorError(msg)
+
+        selected = self._evaluate(select_specs) if select_specs else set(self._nodes.keys())
+        if exclude_specs:
+            selected -= self._evaluate(exclude_specs)
+
+        return selected
+
+    def _has_default_selector(self) -> bool:
+        selectors_path = self._project_dir / "selectors.yml"
+        if not selectors_path.is_file():
+            return False
+        selectors = (YAML(typ="safe").load(selectors_path) or {}).get("selectors") or []
+        # default may be a Jinja expression, DBT renders it
+        return any(s.get("default", False) is not False for s in selectors)
+
+    def _parse(self, raw_selectors: Iterable[str] | None) -> list[list[SelectionCriteria]]:
+        """
+        Returns union (list) of intersections (list) of selection criteria
+        """
+        return [
+            [SelectionCriteria.parse(raw) for raw in union_part.split(",")]
+            for raw_selector in raw_selectors or []
+            for union_part in raw_selector.split()
+        ]
+
+    def _evaluate(self, union: list[list[SelectionCriteria]]) -> set[str]:
+        result: set[str] = set()
+        for intersection in union:
+            selected = self._evaluate_criteria(intersection[0])
+            for criteria in intersection[1:]:
+                selected &= self._evaluate_criteria(criteria)
+            result |= selected
+        return result
+
+    def _evaluate_criteria(self, criteria: SelectionCriteria) -> set[str]:
+        search = getattr(self, "_search_" + criteria.method)
+        selected: set[str] = set(search(criteria))
+
+        if not criteria.has_graph_operators:
+            return selected
+
+        self._build_graph()
+        result = set(selected)
+
+        if criteria.childrens_parents:
+            descendants = self._traverse(selected, self._children, depth=None) | selected
+            result |= descendants | self._traverse(descendants, self._parents, depth=None)
+        if criteria.parents:
+            result |= self._traverse(selected, self._parents, criteria.parents_depth)
+        if criteria.children:
+            result |= self._traverse(selected, self._children, criteria.children_depth)
+
+        return result
+
+    def _build_graph(self):
+        if self._parents is not None:
+            return
+
+        self._parents = {unique_id: set() for unique_id in self._nodes}
+        self._children = {unique_id: set() for unique_id in self._nodes}
+
+        for unique_id, node in self._nodes.items():
+            depends_on = getattr(node, "depends_on", None)
+            for parent_id in getattr(depends_on, "nodes", None) or []:
+                if parent_id in self._nodes:
+                    self._parents[unique_id].add(parent_id)
+                    self._children[parent_id].add(unique_id)
+
+    @staticmethod
+    def _traverse(start: set[str], edges: dict[str, set[str]], depth: int | None) -> set[str]:
+        result: set[str] = set()
+        frontier = start
+        while frontier and (depth is None or depth > 0):
+            frontier = {n for f in frontier for n in edges[f]} - result
+            result |= frontier
+            if depth is not None:
+                depth -= 1
+        return result
+
+    def _non_source_nodes(self):
+        return ((i, n) for i, n in self._nodes.items() if n.resource_type != "source")
+
+    def _search_fqn(self, criteria: SelectionCriteria):
+        for unique_id, node in self._non_source_nodes():
+            is_versioned = getattr(node, "version", None) is not None
+            if _is_selected_fqn(node.fqn, criteria.value, is_versioned=is_versioned) or _is_selected_fqn(
+                node.fqn[1:], criteria.value, is_versioned=is_versioned
+            ):
+                yield unique_id
+
+    def _search_tag(self, criteria: SelectionCriteria):
+        for unique_id, node in self._nodes.items():
+            if any(fnmatch(tag, criteria.value) for tag in getattr(node, "tags", None) or []):
+                yield unique_id
+
+    def _search_source(self, criteria: SelectionCriteria):
+        parts = criteria.value.split(".")
+        if len(parts) == 1:
+            target_package, target_source, target_table = "*", parts[0], "*"
+        elif len(parts) == 2:  # noqa: PLR2004
+            target_package, target_source, target_table = "*", *parts
+        elif len(parts) == 3:  # noqa: PLR2004
+            target_package, target_source, target_table = parts
+        else:
+            msg = f"Invalid source selector value: {criteria.value}"
+            raise PumpkinError(msg)
+
+        for unique_id, node in self._nodes.items():
+            if (
+                node.resource_type == "source"
+                and fnmatch(node.package_name, target_package)
+                and fnmatch(node.source_name, target_source)
+                and fnmatch(node.name, target_table)
+            ):
+                yield unique_id
+
+    def _search_path(self, criteria: SelectionCriteria):
+        paths = {p.relative_to(self._project_dir) for p in self._project_dir.glob(criteria.value)}
+
+        for unique_id, node in self._nodes.items():
+            original_file_path = Path(node.original_file_path)
+            patch_path = getattr(node, "patch_path", None)
+
+            if original_file_path in paths or any(parent in paths for parent in original_file_path.parents):
+                yield unique_id
+            elif patch_path and Path(patch_path.split("://")[-1]) in paths:
+                yield unique_id
+
+    def _search_file(self, criteria: SelectionCriteria):
+        for unique_id, node in self._nodes.items():
+            original_file_path = Path(node.original_file_path)
+            if fnmatch(original_file_path.name, criteria.value) or fnmatch(original_file_path.stem, criteria.value):
+                yield unique_id
+
+    def _search_package(self, criteria: SelectionCriteria):
+        package = self._project_name if criteria.value == "this" else criteria.value
+        for unique_id, node in self._nodes.items():
+            if fnmatch(node.package_name, package):
+                yield unique_id
+
+    def _search_config(self, criteria: SelectionCriteria):
+        for unique_id, node in self._nodes.items():
+            if node.resource_type in _GRAPH_RESOURCE_TYPES:
+                continue
+            try:
+                value = _config_value(node.config, criteria.arguments)
+            except (AttributeError, KeyError, TypeError):
+                continue
+            if _config_matches(value, criteria.value):
+                yield unique_id
+
+    def _search_resource_type(self, criteria: SelectionCriteria):
+        for unique_id, node in self._nodes.items():
+            if node.resource_type == criteria.value:
+                yield unique_id
+
+    def _search_group(self, criteria: SelectionCriteria):
+        for unique_id, node in self._nodes.items():
+            if node.resource_type in _GRAPH_RESOURCE_TYPES and node.resource_type != "metric":
+                continue
+            config = getattr(node, "config", None)
+            group = config.get("group") if config is not None else None
+            if group and fnmatch(group, criteria.value):
+                yield unique_id
+
+    def _search_access(self, criteria: SelectionCriteria):
+        for unique_id, node in self._nodes.items():
+            if node.resource_type == "model" and getattr(node, "access", None) == criteria.value:
+                yield unique_id
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import stat
+import threading
+from pathlib import Path
+from typing import Callable
+
+from dbt_pumpkin.exception import PumpkinError
+from dbt_pumpkin.files import snapshot_files
+from dbt_pumpkin.params import LookupParams, ManifestParams, ProjectParams, ResourceParams
+from dbt_pumpkin.pumpkin import COMMANDS, Pumpkin
+
+logger = logging.getLogger(__name__)
+
+SOCKET_FILE = "dbt_pumpkin.sock"
+
+
+def _validate_request(request: any) -> str | None:
+    """
+    Returns an error if request doesn't match {"command": str, "select": list[str], "exclude": list[str], ...}
+    """
+    if not isinstance(request, dict):
+        return "Request must be a JSON object"
+
+    command = request.get("command")
+    if command not in COMMANDS:
+        return f"Unknown command: {command}"
+
+    for key in ("select", "exclude"):
+        value = request.get(key)
+        if value is not None and not (isinstance(value, list) and all(isinstance(v, str) for v in value)):
+            return f"{key} must be a list of strings"
+
+    if not isinstance(request.get("dry_run", False), bool):
+        return "dry_run must be a boolean"
+
+    return None
+
+
+class PumpkinServer:
+    """
+    Keeps DBT imported and project Manifest loaded between requests.
+
+    Requests are executed one at a time, as DBT isn't thread safe. Manifest is parsed again only if project files
+    have changed since it was parsed (including YAML files changed by previous requests).
+    """
+
+    def __init__(
+        self,
+        project_params: ProjectParams,
+        manifest_params: ManifestParams | None = None,
+        lookup_params: LookupParams | None = None,
+    ):
+        self._project_params = project_params
+        self._manifest_params = manifest_params or ManifestParams()
+        self._lookup_params = lookup_params or LookupParams()
+        self._lock = threading.Lock()
+        self._manifest: any = None
+        self._snapshot: dict[str, tuple[int, int]] = None
+
+    def _load_manifest(self) -> any:
+        from dbt_pumpkin.loader import ResourceLoader
+
+        loader = ResourceLoader(self._project_params, ResourceParams(), self._manifest_params)
+        snapshot = snapshot_files(loader.locate_project_dir())
+
+        if self._manifest is not None and snapshot == self._snapshot:
+            logger.debug("Project files are not changed, reusing manifest")
+            return self._manifest
+
+        logger.info("Project files are changed, loading manifest")
+        # Snapshot is taken before parsing, so changes made during parsing are not missed
+        self._manifest = None
+        self._manifest = loader.load_manifest()
+        self._snapshot = snapshot
+
+        return self._manifest
+
+    def locate_socket(self) -> Path:
+        from dbt_pumpkin.loader import ResourceLoader
+
+        return ResourceLoader(self._project_params, ResourceParams()).locate_target_dir() / SOCKET_FILE
+
+    def execute(self, request: dict[str, any]) -> dict[str, any]:
+        """
+        Executes request {"command": ..., "select": [...], "exclude": [...], "dry_run": ...}
+        """
+        error = _validate_request(request)
+        if error is not None:
+            return {"success": False, "error": error}
+
+        command = request["command"]
+        resource_params = ResourceParams(select=request.get("select"), exclude=request.get("exclude"))
+
+        with self._lock:
+            logger.info("Executing %s", request)
+            try:
+                pumpkin = Pumpkin(
+                    self._project_params,
+                    resource_params,
+                    self._manifest_params,
+                    self._lookup_params,
+                    manifest=self._load_manifest(),
+                )
+                getattr(pumpkin, command)(dry_run=request.get("dry_run", False))
+            except KeyboardInterrupt as e:
+                raise e  # noqa: TRY201
+            except Exception as e:  # noqa: BLE001
+                # Server must survive any failure of a request
+                logger.exception("Failed to execute %s", request)
+                return {"success": False, "error": str(e)}
+
+        return {"success": True}
+
+    def serve(self, socket_path: Path, ready_callback: Callable[[socketserver.BaseServer], None] | None = None):
+        """
+        Serves newline-delimited JSON requests until interrupted, every request gets a JSON response line.
+
+        Requests may change project files, so they are accepted only on a Unix socket readable and writable
+        by the current user.
+        """
+        pumpkin_server = self
+
+        class RequestHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+                    try:
+                        request = json.loads(line)
+                    except ValueError as e:
+                        response = {"success": False, "error": f"Malformed request: {e}"}
+                    else:
+                        response = pumpkin_server.execute(request)
+                    self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+                    self.wfile.flush()
+
+        socket_path = Path(socket_path)
+        if socket_path.exists() or socket_path.is_symlink():
+            if not stat.S_ISSOCK(socket_path.lstat().st_mode):
+                msg = f"Not a socket: {socket_path}"
+                raise PumpkinError(msg)
+            # Left by a server which wasn't shut down
+            socket_path.unlink()
+        socket_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Socket is created with 0600 mode, so that other users can't connect even before chmod
+        umask = os.umask(0o177)
+        try:
+            server = socketserver.ThreadingUnixStreamServer(str(socket_path), RequestHandler)
+        finally:
+            os.umask(umask)
+
+        try:
+            with server:
+                socket_path.chmod(0o600)
+                server.daemon_threads = True
+                logger.info("Serving on %s", socket_path)
+                if ready_callback:
+                    ready_callback(server)
+                server.serve_forever()
+        finally:
+            socket_path.unlink(missing_ok=True)
+
+
+def send_request(socket_path: Path, request: dict[str, any], timeout: float | None = None) -> dict[str, any]:
+    """
+    Sends a request to PumpkinServer and waits for the response
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(socket_path))
+        with sock.makefile("rwb") as stream:
+            stream.write(json.dumps(request).encode("utf-8") + b"\n")
+            stream.flush()
+            return json.loads(stream.readline())
@@ -0,0 +1,359 @@
+from __future__ import annotations
+
+import io
+import json
+import logging
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from ruamel.yaml import YAML
+from ruamel.yaml.comments import CommentedMap, CommentedSeq
+from ruamel.yaml.tokens import CommentToken
+
+from dbt_pumpkin.data import ResourceType
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_RESOURCE_KEYS = frozenset(t.plural_name for t in ResourceType)
+# Block scalars keeping trailing blank lines can't be told apart from blank lines between Resources
+_KEEP_CHOMPING_INDICATORS = ("|+", ">+")
+
+
+def _fingerprint(value: any) -> str:
+    return json.dumps(value, default=str)
+
+
+def _split_gap(lines: list[str], max_indent: int) -> int:
+    """
+    Returns index of the first of trailing blank lines and comments, comments indented deeper than `max_indent`
+    may be a part of a block scalar
+    """
+    end = len(lines)
+    while end > 0:
+        stripped = lines[end - 1].lstrip(" ")
+        indent = len(lines[end - 1]) - len(stripped)
+        if stripped.strip() and not (stripped.startswith("#") and indent <= max_indent):
+            break
+        end -= 1
+    return end
+
+
+def _has_comments(lines: list[str]) -> bool:
+    return any(line.lstrip().startswith("#") for line in lines)
+
+
+@dataclass
+class _GapComment:
+    # List of comment tokens ruamel attaches to a node and index of the token the gap is a part of
+    tokens: list
+    index: int
+    # Tokens of node items are positional, trailing tokens of a node (`ca.end`) are not
+    positional: bool
+    text: str
+
+    @contextmanager
+    def detached(self) -> Iterator[None]:
+        """
+        Removes the gap from the token for a while, so it isn't dumped with the Resource
+        """
+        token = self.tokens[self.index]
+        original_value = token.value
+        value = original_value[: max(len(original_value) - len(self.text), 0)]
+        try:
+            if value:
+                token.value = value
+            elif self.positional:
+                self.tokens[self.index] = None
+            else:
+                self.tokens.pop(self.index)
+            yield
+        finally:
+            token.value = original_value
+            if value or self.positional:
+                self.tokens[self.index] = token
+            else:
+                self.tokens.insert(self.index, token)
+
+
+def _comment_tokens(value: any) -> Iterator[tuple[list, int, bool]]:
+    """
+    Yields lists of comment tokens ruamel attaches to nodes, indexes of tokens in them and if they are positional
+    """
+    if isinstance(value, (CommentedMap, CommentedSeq)):
+        for tokens in value.ca.items.values():
+            for index, token in enumerate(tokens):
+                if isinstance(token, CommentToken):
+                    yield tokens, index, True
+        for index, token in enumerate(value.ca.end or []):
+            if isinstance(token, CommentToken):
+                yield value.ca.end, index, False
+        for item in value.values() if isinstance(value, CommentedMap) else value:
+            yield from _comment_tokens(item)
+
+
+def _gap_comment(value: any, gap: list[str], gap_line: int) -> _GapComment | None:
+    """
+    Returns comment token which ends with the gap following a Resource, ruamel attaches it to the last node
+    of the Resource
+    """
+    text = "".join(gap)
+    result: _GapComment | None = None
+    result_line = -1
+    for tokens, index, positional in _comment_tokens(value):
+        token = tokens[index]
+        # The first line of a token is written at its column
+        token_text = " " * token.start_mark.column + token.value
+        prefix = token_text[: len(token_text) - len(text)]
+        if (
+            token_text.endswith(text)
+            and (not prefix or prefix.endswith("\n"))
+            and result_line < token.start_mark.line <= gap_line
+        ):
+            result = _GapComment(tokens, index, positional, text)
+            result_line = token.start_mark.line
+    return result
+
+
+def _dash_column(line: str, column: int) -> int | None:
+    prefix = line[:column].rstrip()
+    if not prefix.endswith("-") or prefix[:-1].strip():
+        return None
+    return len(prefix) - 1
+
+
+@dataclass
+class _Item:
+    value: any
+    fingerprint: str
+    lines: list[str]
+    # Blank lines and comments between this Resource and the next one or the next top level key
+    gap: list[str]
+    # Comment token the gap is a part of, the gap stays in place and must not be dumped with the Resource
+    gap_comment: _GapComment | None
+
+
+@dataclass
+class _Sequence:
+    value: CommentedSeq
+    start: int
+    end: int
+    dash_column: int
+    items: dict[int, _Item]
+
+
+@dataclass
+class _Source:
+    content: CommentedMap
+    lines: list[str]
+    keys: list[str]
+    fingerprints: dict[str, str]
+    sequences: dict[str, _Sequence]
+
+
+class YamlSplicer:
+    """
+    Saves YAML files by splicing changed Resources into the text they were loaded from.
+
+    Positions of Resources are recorded when a file is loaded. On save only Resources which were added or changed
+    are dumped, the rest of the file is copied as is, so the cost depends on the size of the change and not the size
+    of the file. Files which can't be edited this way (e.g. top level keys are added, Resource list becomes empty,
+    anchors are used) must be dumped as a whole.
+    """
+
+    def __init__(self, yaml: YAML):
+        self._yaml = yaml
+        # YAML instances dumping sequences at dash columns of recorded files
+        self._dash_yamls: dict[int, YAML] = {yaml.sequence_dash_offset: yaml}
+        self._sources: dict[Path, _Source] = {}
+        # Resources of recorded files by id, Resources may be moved to another file
+        self._items: dict[int, _Item] = {}
+        self._item_ids: dict[Path, list[int]] = {}
+
+    def record(self, file: Path, content: any, text: str):
+        source = self._parse(content, text)
+        if source is None:
+            logger.debug("File can't be edited in place: %s", file)
+            return
+        self.forget(file)
+        self._sources[file] = source
+        self._item_ids[file] = [i for s in source.sequences.values() for i in s.items]
+        for sequence in source.sequences.values():
+            self._items.update(sequence.items)
+
+    @staticmethod
+    def _parse_sequence(value: CommentedSeq, lines: list[str], end: int) -> _Sequence | None:
+        if not value or value.fa.flow_style():
+            return None
+
+        starts = [value.lc.item(i) for i in range(len(value))]
+        dash_columns = {_dash_column(lines[line], column) for line, column in starts}
+        if len(dash_columns) != 1 or None in dash_columns:
+            return None
+
+        items: dict[int, _Item] = {}
+        for index, (line, column) in enumerate(starts):
+            item_end = starts[index + 1][0] if index + 1 < len(starts) else end
+            item_lines = lines[line:item_end]
+            gap_start = _split_gap(item_lines, column)
+            if gap_start == 0:
+                return None
+
+            gap = item_lines[gap_start:]
+            items[id(value[index])] = _Item(
+                value=value[index],
+                fingerprint=_fingerprint(value[index]),
+                lines=item_lines[:gap_start],
+                gap=gap,
+                gap_comment=_gap_comment(value[index], gap, line + gap_start) if gap else None,
+            )
+
+        return _Sequence(value=value, start=starts[0][0], end=end, dash_column=dash_columns.pop(), items=items)
+
+    def _parse(self, content: any, text: str) -> _Source | None:
+        if not isinstance(content, CommentedMap) or not text.endswith("\n") or "\r" in text or "&" in text:
+            return None
+
+        lines = text.splitlines(keepends=True)
+        keys = list(content)
+        fingerprints: dict[str, str] = {}
+        sequences: dict[str, _Sequence] = {}
+
+        for index, key in enumerate(keys):
+            value = content[key]
+            if key in _RESOURCE_KEYS and isinstance(value, CommentedSeq) and value:
+                end = content.lc.key(keys[index + 1])[0] if index + 1 < len(keys) else len(lines)
+                sequence = self._parse_sequence(value, lines, end)
+                if sequence is None:
+                    return None
+                sequences[key] = sequence
+            else:
+                fingerprints[key] = _fingerprint(value)
+
+        return _Source(content=content, lines=lines, keys=keys, fingerprints=fingerprints, sequences=sequences)
+
+    def _get_dash_yaml(self, dash_column: int) -> YAML:
+        """
+        Returns YAML dumping Resources at the dash column of a file, so dumped lines don't have to be shifted
+        """
+        yaml = self._dash_yamls.get(dash_column)
+        if yaml is None:
+            # Same space after dash as configured
+            dash_space = (self._yaml.sequence_indent or 2) - self._yaml.sequence_dash_offset
+            yaml = YAML(typ="rt")
+            yaml.map_indent = self._yaml.map_indent
+            yaml.sequence_indent = dash_column + max(dash_space, 2)
+            yaml.sequence_dash_offset = dash_column
+            yaml.preserve_quotes = self._yaml.preserve_quotes
+            yaml.width = self._yaml.width
+            self._dash_yamls[dash_column] = yaml
+        return yaml
+
+    def _dump_item(self, key: str, value: any, dash_column: int, origin: _Item | None) -> tuple[list[str], int] | None:
+        stream = io.StringIO()
+        gap_comment = origin.gap_comment if origin is not None else None
+        with gap_comment.detached() if gap_comment is not None else nullcontext():
+            self._get_dash_yaml(dash_column).dump({key: [value]}, stream)
+            # Tokens may keep only blank lines which aren't moved
+            has_comments = any("#" in tokens[index].value for tokens, index, _ in _comment_tokens(value))
+
+        text = stream.getvalue()
+        if any(i in text for i in _KEEP_CHOMPING_INDICATORS):
+            return None
+        # Gap which can't be detached would be duplicated
+        if origin is not None and _has_comments(origin.gap) and "".join(origin.gap) in text:
+            return None
+
+        # The first line is the key
+        lines = text.splitlines(keepends=True)[1:]
+        first_line = lines[0].lstrip(" ")
+        if not first_line.startswith("- "):
+            return None
+
+        shift = dash_column - (len(lines[0]) - len(first_line))
+        # Comments are dumped at columns they were loaded from, shifted lines would move them on every save
+        if shift != 0 and has_comments:
+            return None
+        if shift < 0 and any(line.strip() and not line.startswith(" " * -shift) for line in lines):
+            return None
+        lines = [(" " * shift + line if shift > 0 else line[-shift:]) if line.strip() else line for line in lines]
+
+        column = dash_column + 1 + len(first_line[1:]) - len(first_line[1:].lstrip(" "))
+        return lines, column
+
+    def _origin(self, value: any) -> _Item | None:
+        """
+        Returns the Resource as it was recorded in this or another file
+        """
+        item = self._items.get(id(value))
+        return item if item is not None and item.value is value else None
+
+    def _splice_sequence(self, key: str, sequence: _Sequence) -> list[str] | None:
+        result: list[str] = []
+        for value in sequence.value:
+            item = sequence.items.get(id(value))
+            if item is not None and item.value is not value:
+                item = None
+
+            if item is not None and _fingerprint(value) == item.fingerprint:
+                result += item.lines
+                result += item.gap
+                continue
+
+            # Blank lines and comments between Resources stay in place
+            dumped = self._dump_item(key, value, sequence.dash_column, self._origin(value))
+            if dumped is None:
+                return None
+
+            lines, column = dumped
+            result += lines[: _split_gap(lines, column)]
+            if item is not None:
+                result += item.gap
+
+        kept = {id(v) for v in sequence.value}
+        items = list(sequence.items.values())
+        for item in items:
+            if id(item.value) not in kept and (item is items[-1] or _has_comments(item.gap)):
+                result += item.gap
+
+        return result
+
+    def splice(self, file: Path, content: any) -> str | None:
+        """
+        Returns new text of the file, or None if it must be dumped as a whole
+        """
+        source = self._sources.pop(file, None)
+        if source is None or content is not source.content or list(content) != source.keys:
+            return None
+
+        for key in source.keys:
+            sequence = source.sequences.get(key)
+            if sequence is None:
+                if _fingerprint(content[key]) != source.fingerprints[key]:
+                    return None
+            elif content[key] is not sequence.value or not sequence.value:
+                return None
+
+        result: list[str] = []
+        position = 0
+        for key, sequence in sorted(source.sequences.items(), key=lambda s: s[1].start):
+            lines = self._splice_sequence(key, sequence)
+            if lines is None:
+                return None
+
+            result += source.lines[position : sequence.start]
+            result += lines
+            position = sequence.end
+
+        result += source.lines[position:]
+        logger.debug("Spliced changes into %s", file)
+        return "".join(result)
+
+    def forget(self, file: Path):
+        self._sources.pop(file, None)
+        for item_id in self._item_ids.pop(file, []):
+            self._items.pop(item_id, None)
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from ruamel.yaml import YAML
+
+from dbt_pumpkin.data import ResourceType
+from dbt_pumpkin.exception import PumpkinError
+from dbt_pumpkin.files import snapshot_files
+from dbt_pumpkin.resolver import PathResolver
+
+if TYPE_CHECKING:
+    from dbt_pumpkin.data import Resource, ResourceID
+    from dbt_pumpkin.params import ProjectParams
+
+logger = logging.getLogger(__name__)
+
+_STATE_VERSION = 1
+_STATE_FILE_NAME = "dbt_pumpkin_state.json"
+# Other files, e.g. DuckDB database, may change on every run without affecting Resources
+_PROJECT_FILE_SUFFIXES = {".sql", ".py", ".csv", ".yml", ".yaml", ".md"}
+
+
+def locate_project_dir(project_params: ProjectParams) -> Path:
+    """
+    Locates project directory by the same rules as DBT does, but without importing DBT
+    """
+    project_dir = project_params.project_dir or os.environ.get("DBT_PROJECT_DIR", None)
+    if project_dir:
+        return Path(project_dir)
+
+    cwd = Path.cwd()
+    return next((p for p in [cwd, *cwd.parents] if (p / "dbt_project.yml").exists()), cwd)
+
+
+class ProjectState:
+    """
+    Keeps fingerprints of project files and Resources processed by the last run of every command.
+
+    Allows skipping the whole run if no project file has changed, or skipping Resources which SQL/CSV file,
+    YAML file and configuration are the same as on the last run.
+    """
+
+    def __init__(self, project_dir: Path, command: str, run_key: str):
+        self._project_dir = project_dir
+        self._command = command
+        self._run_key = run_key
+        self._target_dir = project_dir / self._read_target_path()
+        self._path = self._target_dir / _STATE_FILE_NAME
+        self._content: dict = None
+        self._file_checksums: dict[Path, str | None] = {}
+
+    def _read_target_path(self) -> str:
+        if os.environ.get("DBT_TARGET_PATH"):
+            return os.environ["DBT_TARGET_PATH"]
+
+        project_yml_path = self._project_dir / "dbt_project.yml"
+        if not project_yml_path.is_file():
+            msg = f"dbt_project.yml not found: {project_yml_path}"
+            raise PumpkinError(msg)
+        return YAML(typ="safe").load(project_yml_path).get("target-path", "target")
+
+    def _load(self) -> dict:
+        if self._content is not None:
+            return self._content
+
+        self._content = {"version": _STATE_VERSION, "commands": {}}
+        if not self._path.is_file():
+            return self._content
+
+        try:
+            with self._path.open(encoding="utf-8") as file:
+                content = json.load(file)
+        except KeyboardInterrupt as e:
+            raise e  # noqa: TRY201
+        except Exception as e:  # noqa: BLE001
+            logger.warning("Failed to read state %s, ignoring it: %s", self._path, e)
+            return self._content
+
+        if content.get("version") == _STATE_VERSION:
+            self._content = content
+        return self._content
+
+    def _command_state(self) -> dict:
+        return self._load()["commands"].get(self._command, {})
+
+    def fingerprint_files(self) -> str:
+        """
+        Returns fingerprint of modification time and size of all project files
+        """
+        snapshot = snapshot_files(self._project_dir)
+        target_prefix = str(self._target_dir) + os.sep
+        files = sorted(
+            (p, s)
+            for p, s in snapshot.items()
+            if Path(p).suffix in _PROJECT_FILE_SUFFIXES and not p.startswith(target_prefix)
+        )
+        return hashlib.sha256(json.dumps(files).encode("utf-8")).hexdigest()
+
+    def is_project_unchanged(self) -> bool:
+        state = self._command_state()
+        return state.get("run_key") == self._run_key and state.get("files") == self.fingerprint_files()
+
+    def _checksum(self, path: Path | None) -> str | None:
+        if path is None:
+            return None
+        if path not in self._file_checksums:
+            resolved_path = self._project_dir / path
+            self._file_checksums[path] = (
+                hashlib.sha256(resolved_path.read_bytes()).hexdigest() if resolved_path.is_file() else None
+            )
+        return self._file_checksums[path]
+
+    @staticmethod
+    def _resolve_yaml_path(resource: Resource) -> Path | None:
+        if not resource.config or not resource.config.yaml_path_template:
+            return None
+
+        try:
+            if resource.type == ResourceType.SOURCE:
+                return PathResolver().resolve(resource.config.yaml_path_template, resource.source_name, None)
+            return PathResolver().resolve(resource.config.yaml_path_template, resource.name, resource.path)
+        except PumpkinError:
+            # Planner reports the error
+            return None
+
+    def _yaml_path_after_run(self, resource: Resource, resolved_yaml_path: Path | None) -> Path | None:
+        # Resource YAML is moved by the run, but Resource still has the path it had before
+        if resolved_yaml_path is None:
+            return resource.yaml_path
+        if self._command == "relocate" and resource.yaml_path:
+            return resolved_yaml_path
+        if self._command == "bootstrap" and not resource.yaml_path and resource.type != ResourceType.SOURCE:
+            return resolved_yaml_path
+        return resource.yaml_path
+
+    def fingerprint_resource(self, resource: Resource, *, after_run: bool = False) -> str:
+        resolved_yaml_path = self._resolve_yaml_path(resource)
+        yaml_path = self._yaml_path_after_run(resource, resolved_yaml_path) if after_run else resource.yaml_path
+
+        fingerprint = [
+            str(resource.type),
+            resource.database,
+            resource.schema,
+            resource.identifier,
+            str(resource.path),
+            self._checksum(resource.path),
+            str(yaml_path),
+            self._checksum(yaml_path),
+            str(resolved_yaml_path),
+            dataclasses.asdict(resource.config) if resource.config else None,
+        ]
+        return hashlib.sha256(json.dumps(fingerprint).encode("utf-8")).hexdigest()
+
+    def select_unchanged(self, resources: list[Resource]) -> set[ResourceID]:
+        fingerprints = self._command_state().get("resources", {})
+        return {r.unique_id for r in resources if fingerprints.get(str(r.unique_id)) == self.fingerprint_resource(r)}
+
+    def save(self, resources: list[Resource]):
+        """
+        Records fingerprints of project files and Resources, must be called after changes are written
+        """
+        # Files are changed by the run, so checksums are calculated again
+        self._file_checksums.clear()
+
+        content = self._load()
+        state = content["commands"].setdefault(self._command, {})
+        fingerprints = state.get("resources", {})
+        fingerprints.update({str(r.unique_id): self.fingerprint_resource(r, after_run=True) for r in resources})
+        state.update(run_key=self._run_key, files=self.fingerprint_files(), resources=fingerprints)
+
+        logger.debug("Writing state %s", self._path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path.with_name(self._path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as file:
+            json.dump(content, file)
+        os.replace(tmp_path, self._path)
@@ -1,66 +1,346 @@
 from __future__ import annotations
 
+import io
 import logging
+import multiprocessing
 import os
 from abc import abstractmethod
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from typing import TYPE_CHECKING
 
 from ruamel.yaml import YAML
 
+from dbt_pumpkin.emit import emit_yaml
+from dbt_pumpkin.splice import YamlSplicer
+
 if TYPE_CHECKING:
     from pathlib import Path
 
+    from dbt_pumpkin.cache import YamlCache
     from dbt_pumpkin.data import YamlFormat
 
 logger = logging.getLogger(__name__)
 
+# Starting worker processes and passing YAML between them isn't worth it for a few files
+_MIN_FILES_PER_WORKER = 16
+
 
 class Storage:
     @abstractmethod
-    def load_yaml(self, files: set[Path]) -> dict[Path, any]:
+    def load_yaml(self, files: set[Path], *, read_only: bool = False) -> dict[Path, any]:
+        """
+        Loads files, files loaded with `read_only` are loaded faster but must not be changed and saved
+        """
         raise NotImplementedError
 
     @abstractmethod
     def save_yaml(self, files: dict[Path, any]):
         raise NotImplementedError
 
+    def prefetch_yaml(self, files: set[Path], *, read_only: bool = False):  # noqa: B027
+        """
+        Hints that files will be loaded soon, storage may start loading them in background
+        """
+
+    def cancel_prefetch(self, files: set[Path]):  # noqa: B027
+        """
+        Hints that files won't be loaded anymore
+        """
+
+    def release_yaml(self, files: set[Path]):  # noqa: B027
+        """
+        Hints that loaded files won't be saved
+        """
+
+    def close(self):  # noqa: B027
+        """
+        Releases background threads and processes, storage must not be used afterwards
+        """
+
 
 class DiskStorage(Storage):
-    def __init__(self, root_dir: Path, yaml_format: YamlFormat | None):
+    def __init__(
+        self,
+        root_dir: Path,
+        yaml_format: YamlFormat | None,
+        yaml_cache: YamlCache | None = None,
+        *,
+        minimal_edits: bool = False,
+    ):
         self._root_dir = root_dir
+        self._yaml_format = yaml_format
+        self._yaml_cache = yaml_cache
+        self._yaml = self._create_yaml()
+        # Uses C-accelerated loader if available, doesn't keep comments and formatting
+        self._safe_yaml = YAML(typ="safe")
+        self._yaml_splicer = YamlSplicer(self._yaml) if minimal_edits else None
+        # ruamel YAML instance isn't thread safe, background thread has its own
+        self._prefetch_yaml: YAML = None
+        self._prefetch_safe_yaml: YAML = None
+        self._prefetch_executor: ThreadPoolExecutor = None
+        self._prefetched: dict[Path, Future] = {}
+        self._prefetched_read_only: set[Path] = set()
 
-        self._yaml = YAML(typ="rt")
+    def _create_yaml(self) -> YAML:
+        yaml = YAML(typ="rt")
+        yaml_format = self._yaml_format
         if yaml_format:
             if yaml_format.indent is not None and yaml_format.offset is not None:
-                self._yaml.map_indent = yaml_format.indent
-                self._yaml.sequence_indent = yaml_format.indent + yaml_format.offset
-                self._yaml.sequence_dash_offset = yaml_format.offset
+                yaml.map_indent = yaml_format.indent
+                yaml.sequence_indent = yaml_format.indent + yaml_format.offset
+                yaml.sequence_dash_offset = yaml_format.offset
+
+            yaml.preserve_quotes = yaml_format.preserve_quotes
+            yaml.width = yaml_format.max_width
+
+        return yaml
+
+    def _load_file(self, yaml: YAML, file: Path) -> tuple[bool, any]:
+        resolved_file = self._root_dir / file
+        if not resolved_file.exists():
+            logger.debug("File doesn't exist, skipping: %s", resolved_file)
+            return False, None
+
+        if self._yaml_cache is None:
+            logger.debug("Loading file: %s", resolved_file)
+            return True, yaml.load(resolved_file)
+
+        found, content = self._yaml_cache.get(file, resolved_file)
+        if found:
+            logger.debug("Loading file from cache: %s", resolved_file)
+            return True, content
+
+        logger.debug("Loading file: %s", resolved_file)
+        content = yaml.load(resolved_file)
+        self._yaml_cache.put(file, resolved_file, content)
+        return True, content
+
+    def prefetch_yaml(self, files: set[Path], *, read_only: bool = False):
+        """
+        Loads files in a background thread, e.g. while tables are being looked up
+        """
+        if self._prefetch_executor is None:
+            self._prefetch_yaml = self._create_yaml()
+            self._prefetch_safe_yaml = YAML(typ="safe")
+            self._prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dbt_pumpkin_prefetch")
 
-            self._yaml.preserve_quotes = yaml_format.preserve_quotes
-            self._yaml.width = yaml_format.max_width
+        logger.debug("Prefetching %s files", len(files))
+        for file in sorted(files - self._prefetched.keys()):
+            if read_only:
+                self._prefetched_read_only.add(file)
+                future = self._prefetch_executor.submit(self._load_file_read_only, self._prefetch_safe_yaml, file)
+            else:
+                future = self._prefetch_executor.submit(self._load_file, self._prefetch_yaml, file)
+            self._prefetched[file] = future
 
-    def load_yaml(self, files: set[Path]) -> dict[Path, any]:
+    def cancel_prefetch(self, files: set[Path]):
+        for file in files:
+            future = self._prefetched.pop(file, None)
+            self._prefetched_read_only.discard(file)
+            if future is not None:
+                future.cancel()
+
+    def _load_file_read_only(self, yaml: YAML, file: Path) -> tuple[bool, any]:
+        resolved_file = self._root_dir / file
+        if not resolved_file.exists():
+            logger.debug("File doesn't exist, skipping: %s", resolved_file)
+            return False, None
+
+        logger.debug("Loading file read only: %s", resolved_file)
+        return True, yaml.load(resolved_file)
+
+    def load_yaml(self, files: set[Path], *, read_only: bool = False) -> dict[Path, any]:
         result: dict[Path, any] = {}
 
         for file in files:
-            resolved_file = self._root_dir / file
-            if not resolved_file.exists():
-                logger.debug("File doesn't exist, skipping: %s", resolved_file)
-                continue
+            # Prefetched content is used once, file may be changed afterwards
+            future = self._prefetched.pop(file, None)
+            if future is not None and file in self._prefetched_read_only and not read_only:
+                # Content loaded read only can't be changed
+                future.cancel()
+                future = None
+            self._prefetched_read_only.discard(file)
 
-            logger.debug("Loading file: %s", resolved_file)
-            result[file] = self._yaml.load(resolved_file)
+            if future is not None:
+                exists, content = future.result()
+            elif read_only:
+                exists, content = self._load_file_read_only(self._safe_yaml, file)
+            else:
+                exists, content = self._load_file(self._yaml, file)
+            if exists:
+                result[file] = content
+
+        if read_only:
+            return result
+
+        if self._yaml_cache is not None:
+            self._yaml_cache.evict()
+
+        self._record(result)
+        return result
+
+    def _record(self, files: dict[Path, any]):
+        if self._yaml_splicer is None:
+            return
+        for file, content in files.items():
+            self._yaml_splicer.record(file, content, (self._root_dir / file).read_text(encoding="utf-8"))
+
+    def release_yaml(self, files: set[Path]):
+        if self._yaml_splicer is not None:
+            for file in files:
+                self._yaml_splicer.forget(file)
+
+    def close(self):
+        if self._prefetch_executor is not None:
+            self._prefetch_executor.shutdown(cancel_futures=True)
+            self._prefetch_executor = None
+        self._prefetched.clear()
+        self._prefetched_read_only.clear()
 
+    def _splice(self, files: dict[Path, any]) -> dict[Path, str]:
+        """
+        Returns text of files which changes can be spliced into the text they were loaded from
+        """
+        if self._yaml_splicer is None:
+            return {}
+
+        result: dict[Path, str] = {}
+        for file, content in files.items():
+            text = self._yaml_splicer.splice(file, content) if content is not None else None
+            if text is not None:
+                result[file] = text
         return result
 
+    def _dump(self, content: any) -> str:
+        # New files (e.g. of bootstrapped Resources) don't need slow round-trip emitter
+        text = emit_yaml(content, self._yaml_format)
+        if text is not None:
+            return text
+
+        stream = io.StringIO()
+        self._yaml.dump(content, stream)
+        return stream.getvalue()
+
+    def _save_file(self, resolved_file: Path, text: str):
+        # Same bytes as written to a file opened in text mode
+        data = text.replace("\n", os.linesep).encode("utf-8")
+
+        # Rewriting unchanged file updates its mtime, which invalidates DBT partial parsing
+        if resolved_file.is_file() and resolved_file.read_bytes() == data:
+            logger.debug("File is unchanged, skipping: %s", resolved_file)
+            return
+
+        logger.debug("Saving file: %s", resolved_file)
+        resolved_file.parent.mkdir(exist_ok=True)
+        resolved_file.write_bytes(data)
+
     def save_yaml(self, files: dict[Path, any]):
+        spliced = self._splice(files)
         for file, content in files.items():
             resolved_file = self._root_dir / file
 
             if content is not None:
-                logger.debug("Saving file: %s", resolved_file)
-                resolved_file.parent.mkdir(exist_ok=True)
-                self._yaml.dump(content, resolved_file)
+                self._save_file(resolved_file, spliced[file] if file in spliced else self._dump(content))
             elif resolved_file.exists():
                 logger.debug("Deleting file: %s", resolved_file)
                 os.remove(resolved_file)
+
+
+def _load_shard(
+    root_dir: Path, yaml_format: YamlFormat | None, yaml_cache: YamlCache | None, files: set[Path], read_only: bool
+) -> dict[Path, any]:
+    return DiskStorage(root_dir, yaml_format, yaml_cache).load_yaml(files, read_only=read_only)
+
+
+def _save_shard(root_dir: Path, yaml_format: YamlFormat | None, files: dict[Path, any]):
+    DiskStorage(root_dir, yaml_format).save_yaml(files)
+
+
+class ParallelDiskStorage(DiskStorage):
+    """
+    Loads and saves files in a pool of worker processes, as parsing and dumping YAML is CPU-bound.
+
+    Workers use DiskStorage, so files are exactly the same as saved by DiskStorage. Round-trip YAML objects
+    (including comments and formatting details) are passed between processes with pickle.
+
+    Worker processes are started once per storage and stopped by close(). They are not forked, as forking while
+    prefetch and lookup threads hold locks may deadlock.
+    """
+
+    def __init__(
+        self,
+        root_dir: Path,
+        yaml_format: YamlFormat | None,
+        workers: int,
+        yaml_cache: YamlCache | None = None,
+        *,
+        minimal_edits: bool = False,
+    ):
+        super().__init__(root_dir, yaml_format, yaml_cache, minimal_edits=minimal_edits)
+        self._workers = workers
+        self._executor: ProcessPoolExecutor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            logger.debug("Starting %s worker processes using %s", self._workers, start_method)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers, mp_context=multiprocessing.get_context(start_method)
+            )
+        return self._executor
+
+    def close(self):
+        super().close()
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def _shard(self, files: list[Path]) -> list[list[Path]]:
+        shards = min(self._workers, len(files) // _MIN_FILES_PER_WORKER)
+        if shards <= 1:
+            return [files]
+        return [files[i::shards] for i in range(shards)]
+
+    def load_yaml(self, files: set[Path], *, read_only: bool = False) -> dict[Path, any]:
+        # Prefetched files are already loaded
+        prefetched_files = files & self._prefetched.keys()
+        result = super().load_yaml(prefetched_files, read_only=read_only)
+
+        shards = self._shard(sorted(files - prefetched_files))
+        if len(shards) <= 1:
+            result.update(super().load_yaml(set(shards[0]), read_only=read_only))
+            return result
+
+        logger.debug("Loading %s files using %s processes", len(files) - len(prefetched_files), len(shards))
+        executor = self._get_executor()
+        futures = [
+            executor.submit(_load_shard, self._root_dir, self._yaml_format, self._yaml_cache, set(s), read_only)
+            for s in shards
+        ]
+        for future in futures:
+            loaded = future.result()
+            if not read_only:
+                self._record(loaded)
+            result.update(loaded)
+
+        return result
+
+    def save_yaml(self, files: dict[Path, any]):
+        # Splicing is cheap, only files dumped as a whole are worth passing to workers
+        spliced = self._splice(files)
+        for file, text in spliced.items():
+            self._save_file(self._root_dir / file, text)
+        files = {f: c for f, c in files.items() if f not in spliced}
+
+        shards = self._shard(sorted(files))
+        if len(shards) <= 1:
+            super().save_yaml(files)
+            return
+
+        logger.debug("Saving %s files using %s processes", len(files), len(shards))
+        executor = self._get_executor()
+        futures = [
+            executor.submit(_save_shard, self._root_dir, self._yaml_format, {f: files[f] for f in s}) for s in shards
+        ]
+        for future in futures:
+            future.result()
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import logging
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from dbt_pumpkin.files import snapshot_files
+from dbt_pumpkin.params import LookupParams, ManifestParams, ProjectParams, ResourceParams
+from dbt_pumpkin.pumpkin import Pumpkin
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+logger = logging.getLogger(__name__)
+
+WATCHED_PATHS = ("models", "seeds", "snapshots", "dbt_project.yml")
+
+
+class FileWatcher:
+    """
+    Detects changed files by polling, doesn't depend on any OS specific API
+    """
+
+    def __init__(self, root: Path, paths: Iterable[str]):
+        self._root = root
+        self._paths = tuple(paths)
+        self._snapshot = self._take_snapshot()
+
+    def _take_snapshot(self) -> dict[str, tuple[int, int]]:
+        result = {}
+        for path in self._paths:
+            if (self._root / path).exists():
+                result.update(snapshot_files(self._root / path))
+        return result
+
+    def poll(self) -> set[Path]:
+        """
+        Returns paths (relative to root) of files added, modified or removed since the previous poll
+        """
+        snapshot = self._take_snapshot()
+        changed = {p for p in snapshot.keys() | self._snapshot.keys() if snapshot.get(p) != self._snapshot.get(p)}
+        self._snapshot = snapshot
+        return {Path(p).relative_to(self._root) for p in changed}
+
+    def wait_for_changes(self, interval: float) -> set[Path]:
+        """
+        Blocks until some files are changed and stay unchanged for `interval` seconds
+        """
+        changed: set[Path] = set()
+        while True:
+            time.sleep(interval)
+            recent = self.poll()
+            if recent:
+                changed |= recent
+            elif changed:
+                return changed
+
+
+def select_changed(select: Iterable[str] | None, changed: set[Path]) -> list[str] | None:
+    """
+    Returns selectors of Resources affected by changed files, None if the whole project is affected.
+
+    Resources are selected by their SQL/CSV file or YAML file, user selectors are intersected with that.
+    """
+    if Path("dbt_project.yml") in changed:
+        return list(select) if select else None
+
+    path_selectors = [f"path:{p.as_posix()}" for p in sorted(changed)]
+    user_selectors = [part for s in select or [] for part in s.split()]
+    if not user_selectors:
+        return path_selectors
+
+    return [f"{u},{p}" for u in user_selectors for p in path_selectors]
+
+
+class ProjectWatch:
+    """
+    Bootstraps and relocates Resources affected by changed project files.
+
+    Project is parsed once per change with DBT partial parsing, so only changed files are parsed again.
+    """
+
+    def __init__(
+        self,
+        project_params: ProjectParams,
+        resource_params: ResourceParams,
+        manifest_params: ManifestParams | None = None,
+    ):
+        self._project_params = project_params
+        self._resource_params = resource_params
+        self._manifest_params = manifest_params or ManifestParams()
+
+    def apply(self, changed: set[Path] | None, *, dry_run: bool):
+        """
+        Applies bootstrap and relocation to Resources affected by changed files, to all Resources if changed is None
+        """
+        from dbt_pumpkin.loader import ResourceLoader
+
+        if changed is None:
+            resource_params = self._resource_params
+        else:
+            select = select_changed(self._resource_params.select, changed)
+            resource_params = ResourceParams(select=select, exclude=self._resource_params.exclude)
+
+        logger.info("Applying changes, selection: %s", resource_params.select)
+
+        # Bootstrap only adds YAML for Resources without it, so Manifest parsed before is still good for relocation
+        manifest = ResourceLoader(self._project_params, resource_params, self._manifest_params).load_manifest()
+        for command in ("bootstrap", "relocate"):
+            pumpkin = Pumpkin(
+                self._project_params, resource_params, self._manifest_params, LookupParams(), manifest=manifest
+            )
+            getattr(pumpkin, command)(dry_run=dry_run)
+
+    def run(self, interval: float, *, dry_run: bool):
+        """
+        Applies changes to all Resources, then watches project files and applies changes to affected Resources
+        """
+        from dbt_pumpkin.loader import ResourceLoader
+
+        project_dir = ResourceLoader(self._project_params, self._resource_params).locate_project_dir()
+        watcher = FileWatcher(project_dir, WATCHED_PATHS)
+        self.apply(None, dry_run=dry_run)
+
+        logger.info("Watching %s in %s", ", ".join(WATCHED_PATHS), project_dir)
+        while True:
+            changed = watcher.wait_for_changes(interval)
+            logger.info("Changed: %s", ", ".join(sorted(str(p) for p in changed)))
+            try:
+                self.apply(changed, dry_run=dry_run)
+            except KeyboardInterrupt as e:
+                raise e  # noqa: TRY201
+            except Exception:  # noqa: BLE001
+                # Project may be broken while it's being edited, keep watching
+                logger.exception("Failed to apply changes")
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from dbt_pumpkin.batch import execute_projects, expand_project_dirs
+from dbt_pumpkin.exception import PumpkinError
+from dbt_pumpkin.params import ProjectParams, ResourceParams
+
+from .mock import mock_project
+
+
+def pumpkin_project(name: str, *, build: bool = False) -> Path:
+    return mock_project(
+        files={
+            "dbt_project.yml": f"""\
+                name: {name}
+                version: "0.1.0"
+                profile: test_pumpkin
+                models:
+                  {name}:
+                    +dbt-pumpkin-path: _models.yml
+            """,
+            "models/customers.sql": "select 1 as id",
+        },
+        build=build,
+    )
+
+
+def test_expand_project_dirs(tmp_path):
+    for name in ["b", "a"]:
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "dbt_project.yml").touch()
+    (tmp_path / "not_a_project").mkdir()
+
+    assert expand_project_dirs([str(tmp_path / "*"), str(tmp_path / "a"), "other"]) == [
+        str(tmp_path / "a"),
+        str(tmp_path / "b"),
+        "other",
+    ]
+
+
+def test_expand_project_dirs_no_match(tmp_path):
+    with pytest.raises(PumpkinError):
+        expand_project_dirs([str(tmp_path / "*")])
+
+
+def test_execute_projects():
+    first = pumpkin_project("first_pumpkin")
+    second = pumpkin_project("second_pumpkin")
+    broken = mock_project(
+        files={
+            "dbt_project.yml": """\
+                name: broken_pumpkin
+                version: "0.1.0"
+                profile: test_pumpkin
+            """,
+            "models/customers.sql": "select 1 as id from {{ ref('missing') }}",
+        }
+    )
+
+    results = execute_projects(
+        "bootstrap",
+        [str(first), str(broken), str(second)],
+        ProjectParams(),
+        ResourceParams(),
+        jobs=2,
+        dry_run=False,
+    )
+
+    assert [r.project_dir for r in results] == [str(first), str(broken), str(second)]
+    assert [r.success for r in results] == [True, False, True]
+    assert [r.actions for r in results] == [1, 0, 1]
+    assert results[1].error
+    assert (first / "models" / "_models.yml").exists()
+    assert (second / "models" / "_models.yml").exists()
+
+
+def test_execute_projects_synchronize():
+    projects = [pumpkin_project(name, build=True) for name in ["first_pumpkin", "second_pumpkin", "third_pumpkin"]]
+    for project in projects:
+        (project / "models" / "_models.yml").write_text("version: 2\nmodels:\n  - name: customers\n")
+
+    results = execute_projects(
+        "synchronize", [str(p) for p in projects], ProjectParams(), ResourceParams(), jobs=3, dry_run=False
+    )
+
+    assert [r.success for r in results] == [True, True, True]
+    for project in projects:
+        assert "name: id" in (project / "models" / "_models.yml").read_text()
+
+
+def test_execute_unknown_command():
+    with pytest.raises(PumpkinError):
+        execute_projects("drop", ["project"], ProjectParams(), ResourceParams(), dry_run=True)
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import io
+import os
+import time
+from pathlib import Path
+
+import pytest
+from ruamel.yaml import YAML
+
+from dbt_pumpkin.cache import TableCache, YamlCache
+from dbt_pumpkin.data import ResourceID, Table, TableColumn
+
+
+def table(unique_id: str, *column_names: str) -> Table:
+    return Table(
+        resource_id=ResourceID(unique_id),
+        columns=[
+            TableColumn(name=name, dtype="INTEGER", data_type="INTEGER", is_numeric=False, is_string=False)
+            for name in column_names
+        ],
+    )
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return tmp_path / "target" / "tables.json"
+
+
+def test_key():
+    assert TableCache.key("pumpkin:dev", "DB", "Main", "Customers") == "pumpkin:dev/db/main/customers"
+    assert TableCache.key("pumpkin:", None, "main", "customers") == "pumpkin://main/customers"
+
+
+def test_roundtrip(cache_path):
+    cache = TableCache(cache_path, ttl=60, max_entries=10)
+    cache.put("customers", table("model.my_pumpkin.customers", "id", "name"))
+    cache.save()
+
+    cache = TableCache(cache_path, ttl=60, max_entries=10)
+    assert cache.get("customers", ResourceID("source.my_pumpkin.customers")) == table(
+        "source.my_pumpkin.customers", "id", "name"
+    )
+    assert cache.get("orders", ResourceID("model.my_pumpkin.orders")) is None
+
+
+def test_expired(cache_path, monkeypatch):
+    cache = TableCache(cache_path, ttl=60, max_entries=10)
+    cache.put("customers", table("model.my_pumpkin.customers", "id"))
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+
+    assert cache.get("customers", ResourceID("model.my_pumpkin.customers")) is None
+
+    cache.save()
+    assert TableCache(cache_path, ttl=3600, max_entries=10).get("customers", ResourceID("x")) is None
+
+
+def test_invalidate(cache_path):
+    cache = TableCache(cache_path, ttl=60, max_entries=10)
+    cache.put("customers", table("model.my_pumpkin.customers", "id"))
+    cache.save()
+
+    cache = TableCache(cache_path, ttl=60, max_entries=10)
+    cache.invalidate("customers")
+    cache.save()
+
+    assert TableCache(cache_path, ttl=60, max_entries=10).get("customers", ResourceID("x")) is None
+
+
+def test_oldest_evicted(cache_path, monkeypatch):
+    now = time.time()
+    cache = TableCache(cache_path, ttl=60, max_entries=2)
+    for i, key in enumerate(["a", "b", "c"]):
+        monkeypatch.setattr(time, "time", lambda i=i: now + i)
+        cache.put(key, table(f"model.my_pumpkin.{key}", "id"))
+    cache.save()
+
+    cache = TableCache(cache_path, ttl=60, max_entries=2)
+    assert cache.get("a", ResourceID("x")) is None
+    assert cache.get("b", ResourceID("x")) is not None
+    assert cache.get("c", ResourceID("x")) is not None
+
+
+@pytest.mark.parametrize("content", ["not a json", '{"version": 0, "entries": {"a": {}}}'])
+def test_unreadable_cache_ignored(cache_path, content):
+    cache_path.parent.mkdir(parents=True)
+    cache_path.write_text(content)
+
+    cache = TableCache(cache_path, ttl=60, max_entries=10)
+    assert cache.get("a", ResourceID("x")) is None
+
+    cache.put("a", table("model.my_pumpkin.a", "id"))
+    cache.save()
+    assert TableCache(cache_path, ttl=60, max_entries=10).get("a", ResourceID("x")) is not None
+
+
+@pytest.fixture
+def yaml_cache(tmp_path) -> YamlCache:
+    return YamlCache(tmp_path / "target" / "yaml", max_size=1024 * 1024)
+
+
+def load_cached(yaml_cache: YamlCache, root: Path, file: Path) -> tuple[bool, any]:
+    return yaml_cache.get(file, root / file)
+
+
+def test_yaml_cache_roundtrip(tmp_path, yaml_cache):
+    file = Path("schema.yml")
+    (tmp_path / file).write_text("version: 2  # comment\n")
+    document = YAML(typ="rt").load(tmp_path / file)
+
+    assert load_cached(yaml_cache, tmp_path, file) == (False, None)
+    yaml_cache.put(file, tmp_path / file, document)
+
+    found, cached = load_cached(yaml_cache, tmp_path, file)
+    assert found
+    output = io.StringIO()
+    YAML(typ="rt").dump(cached, output)
+    assert output.getvalue() == "version: 2  # comment\n"
+
+
+def test_yaml_cache_invalidated(tmp_path, yaml_cache):
+    file = Path("schema.yml")
+    (tmp_path / file).write_text("version: 2\n")
+    yaml_cache.put(file, tmp_path / file, {"version": 2})
+
+    # The same content with different modification time
+    stat = (tmp_path / file).stat()
+    os.utime(tmp_path / file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert load_cached(yaml_cache, tmp_path, file) == (True, {"version": 2})
+
+    (tmp_path / file).write_text("version: 3\n")
+    assert load_cached(yaml_cache, tmp_path, file) == (False, None)
+
+    # Documents parsed with other settings are not used
+    yaml_cache.put(file, tmp_path / file, {"version": 3})
+    other_format_cache = YamlCache(tmp_path / "target" / "yaml", max_size=1024 * 1024, format_key="other")
+    assert load_cached(other_format_cache, tmp_path, file) == (False, None)
+
+
+def test_yaml_cache_least_recently_used_evicted(tmp_path):
+    files = [Path(f"schema_{i}.yml") for i in range(3)]
+    for file in files:
+        (tmp_path / file).write_text("version: 2\n")
+
+    cache = YamlCache(tmp_path / "target" / "yaml", max_size=1024 * 1024)
+    cache.put(files[0], tmp_path / files[0], {"version": 2})
+    entry_size = sum(p.stat().st_size for p in (tmp_path / "target" / "yaml").iterdir())
+
+    cache = YamlCache(tmp_path / "target" / "yaml", max_size=int(entry_size * 2.5))
+    cache.put(files[1], tmp_path / files[1], {"version": 2})
+    # Entries are ordered by modification time, which has limited resolution
+    for i, entry in enumerate(sorted((tmp_path / "target" / "yaml").iterdir(), key=lambda p: p.stat().st_mtime_ns)):
+        os.utime(entry, ns=(i * 1_000_000_000, i * 1_000_000_000))
+
+    # Recently used
+    assert load_cached(cache, tmp_path, files[0])[0]
+    cache.put(files[2], tmp_path / files[2], {"version": 2})
+    cache.evict()
+
+    assert load_cached(cache, tmp_path, files[0])[0]
+    assert not load_cached(cache, tmp_path, files[1])[0]
+    assert load_cached(cache, tmp_path, files[2])[0]
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+
+import pytest
+from click.testing import CliRunner
+
+from dbt_pumpkin.cli import cli
+
+# Cumulative import time of dbt_pumpkin.cli, microseconds. DBT alone takes more than a second to import
+IMPORT_TIME_BUDGET = 500_000
+
+
+def import_times(module: str) -> dict[str, int]:
+    """
+    Imports module in a new interpreter, returns cumulative import time of every imported module
+    """
+    res = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, check=True
+    )
+    result = {}
+    for line in res.stderr.splitlines():
+        if line.startswith("import time:") and "cumulative" not in line:
+            _, cumulative, name = line.split("|")
+            result[name.strip()] = int(cumulative.strip())
+    return result
+
+
+def test_cli_doesnt_import_dbt():
+    imported = import_times("dbt_pumpkin.cli")
+
+    assert "dbt_pumpkin.cli" in imported
+    assert [m for m in imported if m == "dbt" or m.startswith(("dbt.", "dbt_common", "dbt_adapters"))] == []
+
+
+def test_cli_import_time_budget():
+    assert import_times("dbt_pumpkin.cli")["dbt_pumpkin.cli"] < IMPORT_TIME_BUDGET
+
+
+@pytest.mark.parametrize("args", [["--help"], ["synchronize", "--help"], ["bootstrap", "--unknown"]])
+def test_cli_without_command_execution(args):
+    res = CliRunner().invoke(cli, args)
+
+    assert res.exit_code == (2 if "--unknown" in args else 0), res.output
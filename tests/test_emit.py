@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import io
+
+import pytest
+from ruamel.yaml import YAML
+
+from dbt_pumpkin.data import YamlFormat
+from dbt_pumpkin.emit import emit_yaml
+
+
+def ruamel_dump(content: dict, yaml_format: YamlFormat | None) -> str:
+    yaml = YAML(typ="rt")
+    if yaml_format:
+        if yaml_format.indent is not None and yaml_format.offset is not None:
+            yaml.map_indent = yaml_format.indent
+            yaml.sequence_indent = yaml_format.indent + yaml_format.offset
+            yaml.sequence_dash_offset = yaml_format.offset
+        yaml.width = yaml_format.max_width
+
+    stream = io.StringIO()
+    yaml.dump(content, stream)
+    return stream.getvalue()
+
+
+@pytest.mark.parametrize(
+    "yaml_format",
+    [
+        None,
+        YamlFormat(),
+        YamlFormat(indent=2, offset=0),
+        YamlFormat(indent=2, offset=2),
+        YamlFormat(indent=4, offset=2),
+        YamlFormat(indent=4, offset=0, max_width=120),
+        YamlFormat(indent=3, offset=1, preserve_quotes=True),
+    ],
+)
+def test_emit_yaml_same_as_ruamel(yaml_format: YamlFormat | None):
+    content = {
+        "version": 2,
+        "models": [
+            {"name": "customers", "columns": []},
+            {
+                "name": "orders",
+                "columns": [{"name": "id", "data_type": "integer"}, {"name": "customer_id"}],
+                "config": {"tags": ["daily", "finance"], "enabled": True, "meta": {}},
+            },
+        ],
+        "seeds": [{"name": "countries", "columns": []}],
+    }
+
+    actual = emit_yaml(content, yaml_format)
+    assert actual is not None
+    assert actual == ruamel_dump(content, yaml_format)
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        {"models": [{"name": "null"}]},
+        {"models": [{"name": "True"}]},
+        {"models": [{"name": "my model"}]},
+        {"models": [{"name": "1st_model"}]},
+        {"models": [{"name": "customers", "description": None}]},
+        {"models": [{"name": "customers", "precision": 1.5}]},
+        {"models": [[{"name": "customers"}]]},
+        {"models": [{"name": "customers", "columns": [{"name": "x" * 80}]}]},
+        {},
+    ],
+)
+def test_emit_yaml_not_supported(content: dict):
+    assert emit_yaml(content, None) is None
+
+
+def test_emit_yaml_round_trip_content_not_supported():
+    content = YAML(typ="rt").load("version: 2\nmodels:\n- name: customers\n")
+    assert emit_yaml(content, None) is None
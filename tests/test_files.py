@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from dbt_pumpkin.files import snapshot_files
+
+from .mock import mock_project
+
+
+def test_snapshot_files():
+    project_path = mock_project(
+        files={
+            "dbt_project.yml": """\
+                name: test_pumpkin
+                version: "0.1.0"
+                profile: test_pumpkin
+            """,
+            "models/customers.sql": "select 1 as id",
+        },
+    )
+    (project_path / "target").mkdir(exist_ok=True)
+    (project_path / "target" / "manifest.json").write_text("{}")
+
+    snapshot = snapshot_files(project_path)
+
+    assert str(project_path / "models" / "customers.sql") in snapshot
+    assert str(project_path / "target" / "manifest.json") not in snapshot
+    assert set(snapshot_files(project_path / "dbt_project.yml")) == {str(project_path / "dbt_project.yml")}
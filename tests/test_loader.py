@@ -1,8 +1,18 @@
 from __future__ import annotations
 
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import weakref
 from pathlib import Path
 
 import pytest
+from dbt.adapters.duckdb import DuckDBAdapter
+from dbt.cli.main import dbtRunner, dbtRunnerResult
 
 from dbt_pumpkin.data import (
     Resource,
@@ -14,8 +24,11 @@ from dbt_pumpkin.data import (
     TableColumn,
     YamlFormat,
 )
+from dbt_pumpkin.exception import PumpkinError
+from dbt_pumpkin import loader as loader_module
 from dbt_pumpkin.loader import ResourceLoader
-from dbt_pumpkin.params import ProjectParams, ResourceParams
+from dbt_pumpkin.manifest import read_compact_manifest
+from dbt_pumpkin.params import LookupParams, ManifestParams, ProjectParams, ResourceParams
 
 from .mock import mock_project
 
@@ -202,10 +215,11 @@ def loader_only_models(my_pumpkin) -> ResourceLoader:
     )
 
 
-def mock_loader(project_dir: Path) -> ResourceLoader:
+def mock_loader(project_dir: Path, manifest_params: ManifestParams | None = None) -> ResourceLoader:
     return ResourceLoader(
         project_params=ProjectParams(project_dir=str(project_dir), profiles_dir=str(project_dir)),
         resource_params=ResourceParams(),
+        manifest_params=manifest_params,
     )
 
 
@@ -402,6 +416,220 @@ def test_manifest(loader_all):
     assert manifest.sources
 
 
+def test_manifest_reused(my_pumpkin, loader_all, caplog):
+    loader = mock_loader(my_pumpkin, ManifestParams(reuse_manifest=True))
+
+    with caplog.at_level(logging.INFO):
+        assert loader.load_manifest()
+
+    assert "Manifest reused" in caplog.text
+    assert loader.select_resources() == loader_all.select_resources()
+
+
+def test_manifest_reused_explicit_path(my_pumpkin, caplog):
+    loader = mock_loader(my_pumpkin, ManifestParams(manifest_path=str(my_pumpkin / "target" / "manifest.json")))
+
+    with caplog.at_level(logging.INFO):
+        assert loader.load_manifest()
+
+    assert "Manifest reused" in caplog.text
+
+
+@pytest.mark.parametrize(
+    "manifest_params", [ManifestParams(low_memory=True), ManifestParams(reuse_manifest=True, low_memory=True)]
+)
+def test_manifest_low_memory(my_pumpkin, loader_all, manifest_params):
+    loader = mock_loader(my_pumpkin, manifest_params)
+
+    assert loader.list_all_resource_ids() == loader_all.list_all_resource_ids()
+    assert loader.select_resources() == loader_all.select_resources()
+
+
+def test_manifest_low_memory_releases_parsed_manifest(my_pumpkin, monkeypatch):
+    parsed_refs = []
+    invoke = dbtRunner.invoke
+
+    def spy_invoke(self, args, **kwargs):
+        res = invoke(self, args, **kwargs)
+        if args[0] == "parse":
+            parsed_refs.append(weakref.ref(res.result))
+        return res
+
+    def spy_read_compact_manifest(*args, **kwargs):
+        # Full Manifest is collected before the compact one is read
+        assert parsed_refs[0]() is None
+        return read_compact_manifest(*args, **kwargs)
+
+    monkeypatch.setattr(dbtRunner, "invoke", spy_invoke)
+    monkeypatch.setattr(loader_module, "read_compact_manifest", spy_read_compact_manifest)
+
+    loader = mock_loader(my_pumpkin, ManifestParams(low_memory=True))
+
+    assert loader.load_manifest().nodes
+    assert len(parsed_refs) == 1
+
+
+def test_manifest_low_memory_select(my_pumpkin):
+    loader = ResourceLoader(
+        project_params=ProjectParams(str(my_pumpkin), str(my_pumpkin)),
+        resource_params=ResourceParams(select=["+stg_customers", "resource_type:seed"]),
+        manifest_params=ManifestParams(reuse_manifest=True, low_memory=True),
+    )
+
+    assert loader.list_all_resource_ids() == {
+        ResourceType.MODEL: {ResourceID("model.my_pumpkin.stg_customers")},
+        ResourceType.SEED: {ResourceID("seed.my_pumpkin.seed_customers")},
+    }
+
+
+def test_release_manifest(my_pumpkin, loader_all, caplog):
+    loader = mock_loader(my_pumpkin)
+    manifest_ref = weakref.ref(loader.load_manifest())
+    resources = loader.select_resources()
+
+    with caplog.at_level(logging.INFO):
+        loader.release_manifest()
+
+    assert manifest_ref() is None
+    if sys.platform == "linux":
+        assert "Memory usage before releasing manifest" in caplog.text
+    assert loader.select_resources() == resources == loader_all.select_resources()
+
+
+def test_manifest_absent_is_parsed(tmp_path, caplog):
+    project_dir = mock_project(
+        files={
+            "dbt_project.yml": """\
+                name: test_pumpkin
+                version: "0.1.0"
+                profile: test_pumpkin
+            """,
+            "models/customers.sql": "select 1 as id",
+        }
+    )
+    loader = mock_loader(project_dir, ManifestParams(manifest_path=str(tmp_path / "manifest.json")))
+
+    with caplog.at_level(logging.INFO):
+        assert loader.load_manifest().nodes
+
+    assert "Manifest not found" in caplog.text
+    assert "Manifest reused" not in caplog.text
+
+
+def mock_stale_project() -> Path:
+    return mock_project(
+        files={
+            "dbt_project.yml": """\
+                name: test_pumpkin
+                version: "0.1.0"
+                profile: test_pumpkin
+            """,
+            "models/customers.sql": "select 1 as id",
+            "models/_schema.yml": """\
+                version: 2
+                models:
+                  - name: customers
+            """,
+            "macros/generate_schema_name.sql": """\
+                {% macro generate_schema_name(custom_schema_name, node) -%}
+                    {{ target.schema }}
+                {%- endmacro %}
+            """,
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    ("path", "content", "change"),
+    [
+        ("models/customers.sql", "select 2 as id", "modified"),
+        ("models/orders.sql", "select 1 as id", "added"),
+        ("models/_schema.yml", "version: 2", "modified"),
+        (
+            "macros/generate_schema_name.sql",
+            "{% macro generate_schema_name(custom_schema_name, node) %}other{% endmacro %}",
+            "modified",
+        ),
+        ("macros/generate_database_name.sql", "{% macro generate_database_name(name, node) %}{% endmacro %}", "added"),
+        ("packages.yml", "packages: []", "modified"),
+    ],
+)
+def test_manifest_stale_is_parsed(path, content, change, caplog):
+    project_dir = mock_stale_project()
+    # writes target/manifest.json
+    mock_loader(project_dir).load_manifest()
+
+    (project_dir / path).write_text(content)
+    # make sure modification time differs regardless of file system time resolution
+    os.utime(project_dir / path, (time.time() + 10, time.time() + 10))
+
+    loader = mock_loader(project_dir, ManifestParams(reuse_manifest=True))
+    with caplog.at_level(logging.INFO):
+        manifest = loader.load_manifest()
+
+    assert f"{Path(path)} was {change}" in caplog.text
+    assert "Manifest reused" not in caplog.text
+    assert {n.original_file_path for n in manifest.nodes.values()} >= {"models/customers.sql"}
+
+
+def test_manifest_parsed_is_reused(caplog):
+    project_dir = mock_stale_project()
+    # writes target/manifest.json
+    mock_loader(project_dir).load_manifest()
+
+    loader = mock_loader(project_dir, ManifestParams(reuse_manifest=True))
+    with caplog.at_level(logging.INFO):
+        loader.load_manifest()
+
+    assert "Manifest reused" in caplog.text
+
+
+@pytest.mark.parametrize(
+    ("args", "project_params", "reason"),
+    [
+        (["parse"], ProjectParams(), "profile, target and vars it was built with are unknown"),
+        (["build", "--vars", "{schema_suffix: _dev}"], ProjectParams(), "built with another vars"),
+        (["build"], ProjectParams(target="test"), "built with another target"),
+    ],
+)
+def test_manifest_built_with_other_arguments_is_parsed(args, project_params, reason, caplog):
+    project_dir = mock_stale_project()
+    res: dbtRunnerResult = dbtRunner().invoke(
+        [*args, "--project-dir", str(project_dir), "--profiles-dir", str(project_dir)]
+    )
+    assert res.success
+
+    loader = ResourceLoader(
+        project_params=project_params.with_project_dir(str(project_dir)).with_profiles_dir(str(project_dir)),
+        resource_params=ResourceParams(),
+        manifest_params=ManifestParams(reuse_manifest=True),
+    )
+    with caplog.at_level(logging.INFO):
+        loader.load_manifest()
+
+    assert reason in caplog.text
+    assert "Manifest reused" not in caplog.text
+
+
+def test_manifest_unknown_checksum_is_parsed(caplog):
+    project_dir = mock_stale_project()
+    mock_loader(project_dir).load_manifest()
+
+    manifest_path = project_dir / "target" / "manifest.json"
+    manifest_mtime = manifest_path.stat().st_mtime
+    manifest = json.loads(manifest_path.read_text())
+    manifest["nodes"]["model.test_pumpkin.customers"]["checksum"]["name"] = "md5"
+    manifest_path.write_text(json.dumps(manifest))
+    os.utime(manifest_path, (manifest_mtime, manifest_mtime))
+
+    loader = mock_loader(project_dir, ManifestParams(reuse_manifest=True))
+    with caplog.at_level(logging.INFO):
+        loader.load_manifest()
+
+    assert f"{Path('models/customers.sql')} has unknown checksum md5" in caplog.text
+    assert "Manifest reused" not in caplog.text
+
+
 def test_selected_resource_ids(loader_all):
     assert loader_all.list_all_resource_ids() == {
         ResourceType.SEED: {
@@ -691,6 +919,237 @@ def test_selected_resource_tables(loader_all):
     }
 
 
+@pytest.mark.parametrize("threads", [1, 4])
+def test_selected_resource_tables_concurrently(my_pumpkin, loader_all, threads):
+    loader = ResourceLoader(
+        project_params=ProjectParams(str(my_pumpkin), str(my_pumpkin)),
+        resource_params=ResourceParams(),
+        lookup_params=LookupParams(threads=threads),
+    )
+
+    assert set(loader.lookup_tables()) == set(loader_all.lookup_tables())
+
+
+def test_selected_resource_tables_default_lookup(my_pumpkin, loader_all, monkeypatch):
+    expected = loader_all.lookup_tables()
+    macro_names = []
+    execute_macro = DuckDBAdapter.execute_macro
+
+    def execute_default_macro(self, macro_name, *args, **kwargs):
+        # Adapters without own implementation look up every relation separately
+        if macro_name == "lookup_schema_tables":
+            macro_name = "default__lookup_schema_tables"
+        macro_names.append(macro_name)
+        return execute_macro(self, macro_name, *args, **kwargs)
+
+    monkeypatch.setattr(DuckDBAdapter, "execute_macro", execute_default_macro)
+
+    loader = ResourceLoader(
+        project_params=ProjectParams(str(my_pumpkin), str(my_pumpkin)),
+        resource_params=ResourceParams(),
+    )
+
+    assert sorted(loader.lookup_tables(), key=lambda t: str(t.resource_id)) == sorted(
+        expected, key=lambda t: str(t.resource_id)
+    )
+    assert "default__lookup_schema_tables" in macro_names
+
+
+def test_selected_resource_tables_from_catalog(my_pumpkin, loader_all, tmp_path, caplog):
+    res: dbtRunnerResult = dbtRunner().invoke(
+        ["docs", "generate", "--project-dir", str(my_pumpkin), "--profiles-dir", str(my_pumpkin)]
+    )
+    assert res.success
+
+    catalog = json.loads((my_pumpkin / "target" / "catalog.json").read_text())
+    # seed and source share the same relation, both have to be removed
+    del catalog["nodes"]["seed.my_pumpkin.seed_customers"]
+    del catalog["sources"]["source.my_pumpkin.pumpkin.customers"]
+    catalog_path = tmp_path / "catalog.json"
+    catalog_path.write_text(json.dumps(catalog))
+
+    loader = ResourceLoader(
+        project_params=ProjectParams(str(my_pumpkin), str(my_pumpkin)),
+        resource_params=ResourceParams(),
+        lookup_params=LookupParams(catalog_path=str(catalog_path)),
+    )
+
+    with caplog.at_level(logging.INFO):
+        assert set(loader.lookup_tables()) == set(loader_all.lookup_tables())
+
+    assert "Found 2 tables in catalog, 2 tables to look up" in caplog.text
+
+
+def test_selected_resource_tables_from_catalog_same_as_database(my_pumpkin, loader_all):
+    res: dbtRunnerResult = dbtRunner().invoke(
+        ["docs", "generate", "--project-dir", str(my_pumpkin), "--profiles-dir", str(my_pumpkin)]
+    )
+    assert res.success
+
+    catalog_loader = ResourceLoader(
+        project_params=ProjectParams(str(my_pumpkin), str(my_pumpkin)),
+        resource_params=ResourceParams(),
+        lookup_params=LookupParams(catalog_path=str(my_pumpkin / "target" / "catalog.json")),
+    )
+
+    # Columns are built with Column class of the adapter, so types are rendered the same way
+    assert catalog_loader._get_catalog_column_class() is DuckDBAdapter.Column
+    assert sorted(catalog_loader.lookup_tables(), key=lambda t: str(t.resource_id)) == sorted(
+        loader_all.lookup_tables(), key=lambda t: str(t.resource_id)
+    )
+
+
+def test_selected_resource_tables_catalog_not_found(my_pumpkin, tmp_path):
+    loader = ResourceLoader(
+        project_params=ProjectParams(str(my_pumpkin), str(my_pumpkin)),
+        resource_params=ResourceParams(),
+        lookup_params=LookupParams(catalog_path=str(tmp_path / "catalog.json")),
+    )
+
+    with pytest.raises(PumpkinError, match="Catalog not found"):
+        loader.lookup_tables()
+
+
+def test_selected_resource_tables_cached(my_pumpkin, loader_all, caplog):
+    def cached_loader(**kwargs) -> ResourceLoader:
+        return ResourceLoader(
+            project_params=ProjectParams(str(my_pumpkin), str(my_pumpkin)),
+            resource_params=ResourceParams(),
+            lookup_params=LookupParams(cache_ttl=3600, **kwargs),
+        )
+
+    (my_pumpkin / "target" / "dbt_pumpkin_tables.json").unlink(missing_ok=True)
+    expected = set(loader_all.lookup_tables())
+
+    with caplog.at_level(logging.INFO):
+        assert set(cached_loader().lookup_tables()) == expected
+    assert "Found 0 tables in cache, 4 tables to look up" in caplog.text
+
+    caplog.clear()
+    with caplog.at_level(logging.INFO):
+        assert set(cached_loader().lookup_tables()) == expected
+    assert "Found 4 tables in cache, 0 tables to look up" in caplog.text
+
+    caplog.clear()
+    with caplog.at_level(logging.INFO):
+        loader = cached_loader(refresh_select=["stg_customers"])
+        assert loader.select_refresh_resource_ids() == {ResourceID("model.my_pumpkin.stg_customers")}
+        assert set(loader.lookup_tables()) == expected
+    assert "Found 3 tables in cache, 1 tables to look up" in caplog.text
+
+    caplog.clear()
+    with caplog.at_level(logging.INFO):
+        assert set(cached_loader(refresh=True).lookup_tables()) == expected
+    assert "Found 0 tables in cache, 4 tables to look up" in caplog.text
+
+
+def test_cache_target(my_pumpkin, loader_all, tmp_path):
+    def target_loader(profiles_dir: Path, target: str | None = None) -> ResourceLoader:
+        return ResourceLoader(
+            project_params=ProjectParams(str(my_pumpkin), str(profiles_dir), target=target),
+            resource_params=ResourceParams(),
+        )
+
+    cache_target = loader_all._get_cache_target()  # noqa: SLF001
+    # Default target of the profile is the same target
+    assert target_loader(my_pumpkin, "test")._get_cache_target() == cache_target  # noqa: SLF001
+    assert cache_target.startswith("test_pumpkin:test:")
+
+    # Same profile in another profiles.yml connects to another database
+    profiles_yml = (my_pumpkin / "profiles.yml").read_text()
+    (tmp_path / "profiles.yml").write_text(profiles_yml.replace("dev.duckdb", "other.duckdb"))
+    assert target_loader(tmp_path)._get_cache_target() != cache_target  # noqa: SLF001
+
+    # Same settings, but another profiles.yml
+    (tmp_path / "profiles.yml").write_text(profiles_yml)
+    assert target_loader(tmp_path)._get_cache_target() != cache_target  # noqa: SLF001
+
+
+def test_pumpkin_project_doesnt_depend_on_resources(loader_all):
+    pumpkin_dir = loader_all._prepare_pumpkin_project()  # noqa: SLF001
+
+    assert "vars" not in (pumpkin_dir / "dbt_project.yml").read_text()
+
+
+def test_pumpkin_project_reused(loader_all):
+    loader_all.lookup_tables()
+    pumpkin_dir = loader_all._prepare_pumpkin_project()  # noqa: SLF001
+
+    assert (pumpkin_dir / "macros" / "lookup_tables.sql").is_file()
+    # partial parsing state is kept
+    assert (pumpkin_dir / "target" / "partial_parse.msgpack").is_file()
+    assert loader_all._prepare_pumpkin_project() == pumpkin_dir  # noqa: SLF001
+
+
+def test_stale_pumpkin_project_removed(loader_all):
+    stale_dir = Path(tempfile.mkdtemp(prefix="dbt_pumpkin_"))
+    recent_dir = Path(tempfile.mkdtemp(prefix="dbt_pumpkin_"))
+    stale_time = time.time() - 8 * 24 * 60 * 60
+    os.utime(stale_dir, (stale_time, stale_time))
+
+    try:
+        pumpkin_dir = loader_all._prepare_pumpkin_project()  # noqa: SLF001
+
+        assert pumpkin_dir.is_dir()
+        assert not stale_dir.exists()
+        assert recent_dir.exists()
+    finally:
+        shutil.rmtree(stale_dir, ignore_errors=True)
+        shutil.rmtree(recent_dir, ignore_errors=True)
+
+
+def test_pumpkin_project_depends_on_target(my_pumpkin, loader_all, tmp_path):
+    def target_loader(**kwargs) -> ResourceLoader:
+        return ResourceLoader(
+            project_params=ProjectParams(str(my_pumpkin), **kwargs),
+            resource_params=ResourceParams(),
+        )
+
+    pumpkin_dir = loader_all._prepare_pumpkin_project()  # noqa: SLF001
+    other_dirs = [
+        target_loader(profiles_dir=str(my_pumpkin), target="test")._prepare_pumpkin_project(),  # noqa: SLF001
+        target_loader(profiles_dir=str(tmp_path))._prepare_pumpkin_project(),  # noqa: SLF001
+    ]
+
+    try:
+        assert len({pumpkin_dir, *other_dirs}) == 3
+    finally:
+        for other_dir in other_dirs:
+            shutil.rmtree(other_dir, ignore_errors=True)
+
+
+@pytest.mark.skipif(os.name == "nt", reason="Temp DBT project is never shared on Windows")
+def test_locked_pumpkin_project_not_shared(loader_all, caplog):
+    import fcntl
+
+    args = ["--args", json.dumps({"operation_name": "pumpkin_result", "result": 1})]
+    loader_all._run_operation("pumpkin_result", lambda _: None, args)  # noqa: SLF001
+    pumpkin_dir = loader_all._prepare_pumpkin_project()  # noqa: SLF001
+    target_files = {p: p.stat().st_mtime_ns for p in (pumpkin_dir / "target").iterdir()}
+
+    results = []
+    # Another process is running an operation
+    with (pumpkin_dir / ".lock").open("a") as lock_file, caplog.at_level(logging.DEBUG):
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        loader_all._run_operation("pumpkin_result", results.append, args)  # noqa: SLF001
+
+    assert results == [1]
+    assert "Temp DBT project is used by another process" in caplog.text
+    assert {p: p.stat().st_mtime_ns for p in (pumpkin_dir / "target").iterdir()} == target_files
+
+
+@pytest.mark.parametrize(
+    ("reported_operation", "expected"), [("pumpkin_result", [{"a": [1, "b"]}]), ("other_operation", [])]
+)
+def test_run_operation_results(loader_all, reported_operation, expected):
+    results = []
+    args = ["--args", json.dumps({"operation_name": reported_operation, "result": {"a": [1, "b"]}})]
+
+    loader_all._run_operation("pumpkin_result", results.append, args)  # noqa: SLF001
+
+    assert results == expected
+
+
 def test_selected_resource_tables_no_actual_tables(loader_configured_paths):
     assert [] == loader_configured_paths.lookup_tables()
 
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import io
+import json
+from pathlib import Path
+
+import pytest
+from dbt.cli.main import dbtRunner, dbtRunnerResult
+
+from dbt_pumpkin.manifest import CompactColumn, DependsOn, FileChecksum, _JsonStream, read_compact_manifest
+
+from .mock import mock_project
+
+DOCUMENT = {
+    "metadata": {"project_name": "my_pumpkin"},
+    "numbers": [1, 22, 333.5, -4444, 1e10],
+    "nested": {"a": {"b": [{"c": None}, [], {}]}, "d": True, "e": 'with "quotes" and {braces} [brackets], commas'},
+    "empty": {},
+    "last": 1234567890,
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 1024])
+def test_stream_skip_and_decode(chunk_size):
+    stream = _JsonStream(io.StringIO(json.dumps(DOCUMENT, indent=2)), chunk_size)
+
+    actual = {}
+    for key in stream.keys():
+        if key in {"metadata", "numbers", "last"}:
+            actual[key] = stream.value()
+        else:
+            stream.skip()
+
+    assert actual == {"metadata": DOCUMENT["metadata"], "numbers": DOCUMENT["numbers"], "last": DOCUMENT["last"]}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1024])
+def test_stream_nested_iteration(chunk_size):
+    stream = _JsonStream(io.StringIO(json.dumps(DOCUMENT)), chunk_size)
+
+    actual = {}
+    for key in stream.keys():
+        if key == "nested":
+            actual = {nested_key: stream.value() for nested_key in stream.keys()}
+        elif key == "numbers":
+            assert [stream.value() for _ in stream.items()] == DOCUMENT["numbers"]
+        else:
+            stream.skip()
+
+    assert actual == DOCUMENT["nested"]
+
+
+def test_stream_truncated():
+    stream = _JsonStream(io.StringIO('{"a": {"b": [1, 2'), 4)
+
+    with pytest.raises(json.JSONDecodeError):
+        for _ in stream.keys():
+            stream.value()
+
+
+@pytest.fixture(scope="module")
+def project_dir() -> Path:
+    project_dir = mock_project(
+        files={
+            "dbt_project.yml": """\
+                name: my_pumpkin
+                version: 1.0.0
+                profile: test_pumpkin
+                models:
+                  my_pumpkin:
+                    +dbt-pumpkin-path: _schema.yml
+            """,
+            "models/_sources.yml": """\
+                version: 2
+                sources:
+                  - name: pumpkin
+                    tables:
+                      - name: customers
+                        identifier: raw_customers
+                        columns:
+                          - name: id
+                            data_type: int
+                            quote: true
+            """,
+            "models/stg_customers.sql": "select * from {{ source('pumpkin', 'customers') }}",
+            "models/disabled.sql": "{{ config(enabled=false) }} select 1 as id",
+            "models/_schema.yml": """\
+                version: 2
+                models:
+                  - name: stg_customers
+                    config:
+                      alias: customers
+                    columns:
+                      - name: id
+                        description: Identifier
+                        tests:
+                          - not_null
+            """,
+        },
+        local_packages={
+            "extra": {
+                "dbt_project.yml": """\
+                    name: extra
+                    version: 0.1.0
+                    profile: test_pumpkin
+                """,
+                "models/extra_customers.sql": "select * from {{ ref('my_pumpkin', 'stg_customers') }}",
+            },
+        },
+    )
+
+    res: dbtRunnerResult = dbtRunner().invoke(
+        ["parse", "--project-dir", str(project_dir), "--profiles-dir", str(project_dir)]
+    )
+    assert res.success
+
+    return project_dir
+
+
+def test_read_compact_manifest(project_dir):
+    manifest = read_compact_manifest(project_dir / "target" / "manifest.json", "my_pumpkin", chunk_size=100)
+
+    assert manifest.metadata.project_name == "my_pumpkin"
+    # tests and package nodes are dropped
+    assert set(manifest.nodes.keys()) == {"model.my_pumpkin.stg_customers"}
+    assert set(manifest.sources.keys()) == {"source.my_pumpkin.pumpkin.customers"}
+    assert set(manifest.disabled.keys()) == {"model.my_pumpkin.disabled"}
+    # but all nodes are kept as stubs for selection
+    assert manifest.selectable["model.extra.extra_customers"].depends_on == DependsOn(
+        ("model.my_pumpkin.stg_customers",)
+    )
+    assert manifest.selectable["model.extra.extra_customers"].package_name == "extra"
+    assert {s.resource_type for s in manifest.selectable.values()} == {"model", "source", "test"}
+
+    model = manifest.nodes["model.my_pumpkin.stg_customers"]
+    assert model.identifier == "customers"
+    assert model.patch_path == "my_pumpkin://models/_schema.yml"
+    assert model.config["dbt-pumpkin-path"] == "_schema.yml"
+    assert model.depends_on == DependsOn(("source.my_pumpkin.pumpkin.customers",))
+    assert model.checksum.name == "sha256"
+    assert isinstance(model.checksum, FileChecksum)
+    assert model.columns == {"id": CompactColumn(name="id", quote=None, data_type=None, description="Identifier")}
+
+    source = manifest.sources["source.my_pumpkin.pumpkin.customers"]
+    assert source.identifier == "raw_customers"
+    assert source.source_name == "pumpkin"
+    assert source.columns == {"id": CompactColumn(name="id", quote=True, data_type="int", description="")}
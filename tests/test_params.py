@@ -1,4 +1,4 @@
-from dbt_pumpkin.params import ProjectParams, ResourceParams
+from dbt_pumpkin.params import LookupParams, ProjectParams, ResourceParams
 
 
 def test_project_params_to_args():
@@ -45,3 +45,8 @@ def test_resource_params_to_args():
     assert ["--exclude", "abc", "--exclude", "def"] == ResourceParams(exclude=["abc", "def"]).to_args()
 
     assert ["--select", "abc", "--exclude", "def"] == ResourceParams(select=["abc"], exclude=["def"]).to_args()
+
+
+def test_lookup_params_to_args():
+    assert [] == LookupParams().to_args()
+    assert ["--threads", "4"] == LookupParams(threads=4).to_args()
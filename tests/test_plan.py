@@ -3,6 +3,7 @@ from pathlib import Path
 
 import pytest
 
+from dbt_pumpkin import plan as plan_module
 from dbt_pumpkin.data import ResourceType
 from dbt_pumpkin.exception import PumpkinError, ResourceNotFoundError
 from dbt_pumpkin.plan import (
@@ -10,10 +11,14 @@ from dbt_pumpkin.plan import (
     BootstrapResource,
     DeleteEmptyDescriptor,
     DeleteResourceColumn,
+    ExecutionMode,
+    Plan,
+    PlanStream,
     RelocateResource,
     ReorderResourceColumns,
     UpdateResourceColumn,
 )
+from dbt_pumpkin.storage import Storage
 
 
 @pytest.fixture
@@ -137,6 +142,7 @@ def test_delete_empty_descriptor(resource_type: ResourceType):
     }
     action.execute(files)
     assert files == {Path("models/schema.yml"): None}
+    assert action.modified_files(files) == {Path("models/schema.yml")}
 
     files = {
         Path("models/schema.yml"): {
@@ -147,6 +153,7 @@ def test_delete_empty_descriptor(resource_type: ResourceType):
     expected = copy.deepcopy(files)
     action.execute(files)
     assert files == expected
+    assert action.modified_files(files) == set()
 
 
 def test_relocate_resource_error(files):
@@ -556,3 +563,184 @@ def test_reorder_resource_columns_unknown_column_error(files):
 
     with pytest.raises(PumpkinError):
         action.execute(files)
+
+
+class MemoryStorage(Storage):
+    def __init__(self, files: dict[Path, dict]):
+        self.files = files
+        self.prefetched: set[Path] = set()
+        self.loaded: list[set[Path]] = []
+        self.loaded_read_only: list[set[Path]] = []
+        self.saved: list[set[Path]] = []
+
+    def prefetch_yaml(self, files: set[Path], *, read_only: bool = False):
+        self.prefetched |= files
+
+    def cancel_prefetch(self, files: set[Path]):
+        self.prefetched -= files
+
+    def load_yaml(self, files: set[Path], *, read_only: bool = False) -> dict[Path, any]:
+        (self.loaded_read_only if read_only else self.loaded).append(files)
+        # Prefetched content is used once
+        self.prefetched -= files
+        return {f: self.files[f] for f in files if f in self.files}
+
+    def save_yaml(self, files: dict[Path, any]):
+        self.saved.append(set(files))
+        self.files.update(files)
+
+
+def add_column(path: Path, resource_name: str, column_name: str) -> AddResourceColumn:
+    return AddResourceColumn(
+        resource_type=ResourceType.MODEL,
+        resource_name=resource_name,
+        source_name=None,
+        path=path,
+        column_name=column_name,
+        column_quote=False,
+        column_type="INTEGER",
+    )
+
+
+def test_plan_saves_modified_files(files):
+    schema_path = Path("models/staging/_schema.yml")
+    sources_path = Path("models/staging/_sources.yml")
+    storage = MemoryStorage(files)
+
+    Plan([add_column(schema_path, "stg_customers", "age"), DeleteEmptyDescriptor(sources_path)]).execute(
+        storage, ExecutionMode.RUN
+    )
+
+    assert storage.loaded == [{schema_path}]
+    assert storage.loaded_read_only == [{sources_path}]
+    assert storage.saved == [{schema_path}]
+
+
+def test_plan_saves_files_no_longer_needed(files, monkeypatch):
+    monkeypatch.setattr(plan_module, "_MAX_BATCH_FILES", 1)
+    schema_path = Path("models/staging/_schema.yml")
+    marts_path = Path("models/marts/_schema.yml")
+    storage = MemoryStorage({**files, marts_path: {"version": 2, "models": [{"name": "customers"}]}})
+
+    Plan(
+        [
+            add_column(schema_path, "stg_customers", "age"),
+            add_column(marts_path, "customers", "age"),
+            add_column(schema_path, "int_customers", "age"),
+        ]
+    ).execute(storage, ExecutionMode.RUN)
+
+    assert storage.loaded == [{schema_path}, {marts_path}]
+    assert storage.saved == [{marts_path}, {schema_path}]
+    assert storage.files[schema_path]["models"][1]["columns"][-1]["name"] == "age"
+
+
+def test_plan_dry_run_loads_read_only(files):
+    schema_path = Path("models/staging/_schema.yml")
+    storage = MemoryStorage(files)
+
+    Plan([add_column(schema_path, "stg_customers", "age")]).execute(storage, ExecutionMode.DRY_RUN)
+
+    assert storage.loaded == []
+    assert storage.loaded_read_only == [{schema_path}]
+    assert storage.saved == []
+
+
+def test_plan_stream(files):
+    schema_path = Path("models/staging/_schema.yml")
+    storage = MemoryStorage(files)
+    stream = PlanStream(storage, ExecutionMode.RUN, [schema_path, schema_path])
+    assert storage.prefetched == {schema_path}
+
+    stream.execute([add_column(schema_path, "stg_customers", "age")])
+    stream.release(schema_path)
+    assert storage.loaded == [{schema_path}]
+    assert storage.saved == []
+
+    stream.execute([add_column(schema_path, "int_customers", "age")])
+    stream.release(schema_path)
+    assert storage.loaded == [{schema_path}]
+    assert storage.saved == [{schema_path}]
+
+    plan = stream.close()
+    assert len(plan.actions) == 2
+    assert storage.saved == [{schema_path}]
+    assert [c["name"] for c in files[schema_path]["models"][1]["columns"]] == ["id", "name", "age"]
+
+
+def test_plan_stream_loads_changed_file_again(files):
+    schema_path = Path("models/staging/_schema.yml")
+    storage = MemoryStorage(files)
+    stream = PlanStream(storage, ExecutionMode.RUN, [schema_path])
+
+    stream.execute([DeleteEmptyDescriptor(schema_path)])
+    stream.execute([DeleteEmptyDescriptor(schema_path)])
+    assert storage.loaded_read_only == [{schema_path}]
+    assert storage.loaded == []
+
+    stream.execute([add_column(schema_path, "stg_customers", "age")])
+    stream.execute([add_column(schema_path, "int_customers", "age")])
+    assert storage.loaded == [{schema_path}]
+
+    stream.release(schema_path)
+    assert storage.saved == [{schema_path}]
+
+
+def test_plan_stream_cancels_prefetch(files):
+    sources_path = Path("models/staging/_sources.yml")
+    storage = MemoryStorage(files)
+    stream = PlanStream(storage, ExecutionMode.RUN, [sources_path])
+    assert storage.prefetched == {sources_path}
+
+    stream.release(sources_path)
+    assert storage.prefetched == set()
+    assert storage.loaded == []
+    assert storage.saved == []
+
+
+def test_plan_stream_prefetches_window(files, monkeypatch):
+    monkeypatch.setattr(plan_module, "_MAX_PREFETCH_FILES", 2)
+    schema_path = Path("models/staging/_schema.yml")
+    other_paths = [Path(f"models/other_{i}.yml") for i in range(3)]
+    storage = MemoryStorage(files)
+    stream = PlanStream(storage, ExecutionMode.RUN, [schema_path, *other_paths])
+    assert storage.prefetched == {schema_path, other_paths[0]}
+
+    stream.execute([add_column(schema_path, "stg_customers", "age")])
+    assert storage.prefetched == {other_paths[0]}
+
+    stream.release(schema_path)
+    assert storage.prefetched == {other_paths[0], other_paths[1]}
+
+    stream.release(other_paths[0])
+    assert storage.prefetched == {other_paths[1], other_paths[2]}
+
+    stream.close()
+    assert storage.prefetched == set()
+
+
+def test_plan_stream_close_saves_pending(files):
+    schema_path = Path("models/staging/_schema.yml")
+    storage = MemoryStorage(files)
+    stream = PlanStream(storage, ExecutionMode.RUN, [schema_path, schema_path])
+
+    stream.execute([add_column(schema_path, "stg_customers", "age")])
+    stream.release(schema_path)
+    assert storage.saved == []
+
+    stream.close()
+    assert storage.saved == [{schema_path}]
+
+
+def test_plan_stream_dry_run(files):
+    schema_path = Path("models/staging/_schema.yml")
+    storage = MemoryStorage(files)
+    stream = PlanStream(storage, ExecutionMode.DRY_RUN, [schema_path])
+
+    stream.execute([add_column(schema_path, "stg_customers", "age")])
+    stream.release(schema_path)
+
+    assert len(stream.close().actions) == 1
+    assert storage.loaded == []
+    assert storage.loaded_read_only == [{schema_path}]
+    assert storage.saved == []
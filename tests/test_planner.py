@@ -602,3 +602,46 @@ def test_synchronization_all_actions():
             columns_order=["id", "BIRTH_DATE", "name"],
         ),
     ]
+
+
+def test_synchronization_plan_table():
+    resource = Resource(
+        unique_id=ResourceID("model.my_pumpkin.stg_customers"),
+        name="stg_customers",
+        source_name=None,
+        database="dev",
+        schema="main",
+        identifier="stg_customers",
+        type=ResourceType.MODEL,
+        path=Path("models/staging/stg_customers.sql"),
+        yaml_path=Path("models/staging/_schema.yml"),
+        columns=[ResourceColumn(name="id", quote=False, data_type="INTEGER", description="")],
+        config=ResourceConfig(
+            yaml_path_template=None,
+            numeric_precision_and_scale=False,
+            string_length=False,
+        ),
+    )
+
+    table = Table(
+        resource_id=ResourceID("model.my_pumpkin.stg_customers"),
+        columns=[
+            TableColumn(name="id", dtype="INTEGER", data_type="INTEGER", is_numeric=False, is_string=False),
+            TableColumn(name="name", dtype="VARCHAR", data_type="VARCHAR", is_numeric=False, is_string=True),
+        ],
+    )
+    unknown_table = Table(resource_id=ResourceID("model.my_pumpkin.unknown"), columns=table.columns)
+
+    planner = SynchronizationPlanner([resource])
+    assert planner.plan_table(table) == [
+        AddResourceColumn(
+            resource_type=ResourceType.MODEL,
+            resource_name="stg_customers",
+            source_name=None,
+            path=Path("models/staging/_schema.yml"),
+            column_name="name",
+            column_quote=False,
+            column_type="VARCHAR",
+        ),
+    ]
+    assert planner.plan_table(unknown_table) == []
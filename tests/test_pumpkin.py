@@ -3,8 +3,10 @@ from pathlib import Path
 
 import pytest
 
-from dbt_pumpkin.params import ProjectParams, ResourceParams
+from dbt_pumpkin import storage as storage_module
+from dbt_pumpkin.params import ProjectParams, ResourceParams, StorageParams
 from dbt_pumpkin.pumpkin import Pumpkin
+from dbt_pumpkin.storage import ParallelDiskStorage
 
 from .mock import mock_project
 
@@ -80,3 +82,27 @@ def test_synchronize(project_path):
     )
 
     pumpkin.synchronize(dry_run=False)
+
+
+def test_synchronize_parallel_storage_closed(project_path, monkeypatch):
+    monkeypatch.setattr(storage_module, "_MIN_FILES_PER_WORKER", 1)
+    closed = []
+    close = ParallelDiskStorage.close
+
+    def spy_close(self):
+        closed.append(self)
+        close(self)
+
+    monkeypatch.setattr(ParallelDiskStorage, "close", spy_close)
+
+    pumpkin = Pumpkin(
+        project_params=ProjectParams(project_dir=str(project_path), profiles_dir=str(project_path)),
+        resource_params=ResourceParams(),
+        storage_params=StorageParams(workers=2),
+    )
+
+    pumpkin.synchronize(dry_run=False)
+
+    # Worker processes are stopped once files are saved
+    assert len(closed) == 1
+    assert closed[0]._executor is None  # noqa: SLF001
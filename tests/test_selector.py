@@ -0,0 +1,363 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+from dbt.cli.main import dbtRunner, dbtRunnerResult
+
+from dbt_pumpkin.data import ResourceType
+from dbt_pumpkin.exception import PumpkinError, UnsupportedSelectorError
+from dbt_pumpkin.loader import ResourceLoader
+from dbt_pumpkin.manifest import read_compact_manifest
+from dbt_pumpkin.params import ProjectParams, ResourceParams
+from dbt_pumpkin.selector import ResourceSelector, SelectionCriteria
+
+from .mock import mock_project
+
+
+@pytest.fixture(scope="module")
+def project_dir() -> Path:
+    return mock_project(
+        files={
+            "dbt_project.yml": """\
+                name: my_pumpkin
+                version: 1.0.0
+                profile: test_pumpkin
+                models:
+                  my_pumpkin:
+                    marts:
+                      +materialized: table
+                      +tags: ["marts", "daily"]
+            """,
+            "models/staging/_sources.yml": """\
+                version: 2
+                sources:
+                  - name: pumpkin
+                    schema: main_sources
+                    tags: ["raw"]
+                    tables:
+                      - name: customers
+                      - name: orders
+                  - name: other
+                    tables:
+                      - name: events
+            """,
+            "models/staging/_schema.yml": """\
+                version: 2
+                models:
+                  - name: stg_customers
+                    columns:
+                      - name: id
+                        tests:
+                          - not_null
+            """,
+            "models/staging/stg_customers.sql": "select * from {{ source('pumpkin', 'customers') }}",
+            "models/staging/stg_orders.sql": """\
+                {{ config(tags=["hourly"], group="sales") }}
+                select * from {{ source('pumpkin', 'orders') }}
+            """,
+            "models/marts/customers.sql": """\
+                select * from {{ ref('stg_customers') }} join {{ ref('stg_orders') }} using (id)
+            """,
+            "models/marts/customer_stats.sql": "select * from {{ ref('customers') }}",
+            "models/events.sql": "select * from {{ source('other', 'events') }}",
+            "models/metricflow_time_spine.sql": "select cast('2024-01-01' as date) as date_day",
+            "models/exposures.yml": """\
+                version: 2
+                exposures:
+                  - name: dashboard
+                    type: dashboard
+                    tags: ["reporting"]
+                    owner:
+                      name: pumpkin
+                    depends_on:
+                      - ref('events')
+                      - ref('stg_orders')
+            """,
+            "models/marts/_semantic_models.yml": """\
+                version: 2
+                models:
+                  - name: metricflow_time_spine
+                    time_spine:
+                      standard_granularity_column: date_day
+                    columns:
+                      - name: date_day
+                        granularity: day
+                semantic_models:
+                  - name: customer_stats
+                    model: ref('customer_stats')
+                    defaults:
+                      agg_time_dimension: created_at
+                    entities:
+                      - name: customer
+                        type: primary
+                        expr: id
+                    dimensions:
+                      - name: created_at
+                        type: time
+                        type_params:
+                          time_granularity: day
+                    measures:
+                      - name: customer_count
+                        agg: count
+                        expr: id
+                metrics:
+                  - name: customer_count
+                    label: Customers
+                    type: simple
+                    tags: ["finance"]
+                    type_params:
+                      measure: customer_count
+            """,
+            "models/groups.yml": """\
+                version: 2
+                groups:
+                  - name: sales
+                    owner:
+                      name: pumpkin
+            """,
+            "seeds/seed_countries.csv": """\
+                id,name
+                1,Westeros
+            """,
+            "snapshots/customers_snapshot.sql": """\
+                {% snapshot customers_snapshot %}
+                {{ config(unique_key='id', target_schema='snapshots', strategy='check', check_cols='all') }}
+                    select * from {{ ref('customers') }}
+                {% endsnapshot %}
+            """,
+        },
+        local_packages={
+            "extra": {
+                "dbt_project.yml": """\
+                    name: extra
+                    version: 0.1.0
+                    profile: test_pumpkin
+                """,
+                "models/extra_customers.sql": "select * from {{ ref('my_pumpkin', 'customers') }}",
+            },
+        },
+    )
+
+
+@pytest.fixture(scope="module")
+def manifest(project_dir):
+    res: dbtRunnerResult = dbtRunner().invoke(
+        ["parse", "--project-dir", str(project_dir), "--profiles-dir", str(project_dir)]
+    )
+    assert res.success
+    return res.result
+
+
+@pytest.fixture
+def selector(manifest, project_dir) -> ResourceSelector:
+    return ResourceSelector(manifest, "my_pumpkin", project_dir)
+
+
+@pytest.fixture
+def compact_selector(manifest, project_dir) -> ResourceSelector:
+    compact_manifest = read_compact_manifest(project_dir / "target" / "manifest.json", "my_pumpkin")
+    return ResourceSelector(compact_manifest, "my_pumpkin", project_dir)
+
+
+def dbt_list(manifest, project_dir: Path, select: list[str], exclude: list[str]) -> set[str]:
+    args = ["list", "--project-dir", str(project_dir), "--profiles-dir", str(project_dir), "--output", "json"]
+    for s in select:
+        args += ["--select", s]
+    for e in exclude:
+        args += ["--exclude", e]
+
+    res: dbtRunnerResult = dbtRunner(manifest).invoke(args)
+    assert res.success
+
+    return {json.loads(r)["unique_id"] for r in res.result}
+
+
+def supported_only(manifest, unique_ids: set[str]) -> set[str]:
+    nodes = {**manifest.nodes, **manifest.sources}
+    return {i for i in unique_ids if i in nodes and str(nodes[i].resource_type) in ResourceType.values()}
+
+
+SELECTIONS = [
+    ([], []),
+    (["stg_customers"], []),
+    (["my_pumpkin.staging.*"], []),
+    (["staging"], []),
+    (["customers"], []),
+    (["stg_customers stg_orders"], []),
+    (["stg_customers", "stg_orders"], []),
+    (["+customers"], []),
+    (["1+customers"], []),
+    (["customers+"], []),
+    (["customers+1"], []),
+    (["@stg_orders"], []),
+    (["tag:marts"], []),
+    (["tag:raw"], []),
+    (["tag:d*"], []),
+    (["tag:marts,tag:daily"], []),
+    (["tag:marts,customers"], []),
+    (["source:pumpkin"], []),
+    (["source:pumpkin.orders"], []),
+    (["source:*"], []),
+    (["source:pumpkin+"], []),
+    (["path:models/staging"], []),
+    (["models/marts"], []),
+    (["path:models/staging/_schema.yml"], []),
+    (["file:stg_orders.sql"], []),
+    (["stg_orders.sql"], []),
+    (["package:extra"], []),
+    (["package:this"], []),
+    (["config.materialized:table"], []),
+    (["config.tags:hourly"], []),
+    (["resource_type:seed"], []),
+    (["resource_type:snapshot"], []),
+    (["group:sales"], []),
+    ([], ["tag:marts"]),
+    (["+customer_stats"], ["source:*"]),
+    (["+extra_customers"], []),
+    (["stg_customers+"], ["package:extra"]),
+    (["resource_type:model"], ["package:extra staging"]),
+    # Exposures and metrics link models in the graph
+    (["@events"], []),
+    (["+tag:reporting"], []),
+    (["+tag:finance"], []),
+    (["resource_type:exposure+"], []),
+    (["customers+", "resource_type:metric+"], ["tag:marts"]),
+]
+
+
+@pytest.mark.parametrize(("select", "exclude"), SELECTIONS)
+def test_same_as_dbt_list(manifest, project_dir, selector, select, exclude):
+    expected = supported_only(manifest, dbt_list(manifest, project_dir, select, exclude))
+    actual = supported_only(manifest, selector.select(select, exclude))
+
+    assert actual == expected
+
+
+@pytest.mark.parametrize(("select", "exclude"), SELECTIONS)
+def test_compact_manifest_same_as_dbt_list(manifest, project_dir, compact_selector, select, exclude):
+    expected = supported_only(manifest, dbt_list(manifest, project_dir, select, exclude))
+    actual = supported_only(manifest, compact_selector.select(select, exclude))
+
+    assert actual == expected
+
+
+def test_compact_manifest_selects_parents_through_package_nodes(compact_selector):
+    assert compact_selector.select(["+extra_customers"], None) == {
+        "model.extra.extra_customers",
+        "model.my_pumpkin.customers",
+        "model.my_pumpkin.stg_customers",
+        "model.my_pumpkin.stg_orders",
+        "source.my_pumpkin.pumpkin.customers",
+        "source.my_pumpkin.pumpkin.orders",
+    }
+
+
+def test_select_all_when_no_selectors(manifest, selector):
+    assert selector.select(None, None) == (
+        set(manifest.nodes.keys())
+        | set(manifest.sources.keys())
+        | set(manifest.exposures.keys())
+        | set(manifest.metrics.keys())
+        | set(manifest.semantic_models.keys())
+    )
+
+
+def test_graph_includes_exposures(compact_selector):
+    assert compact_selector.select(["@events"], None) == {
+        "model.my_pumpkin.events",
+        "model.my_pumpkin.stg_orders",
+        "source.my_pumpkin.other.events",
+        "source.my_pumpkin.pumpkin.orders",
+        "exposure.my_pumpkin.dashboard",
+    }
+
+
+@pytest.fixture(scope="module")
+def default_selector_project_dir() -> Path:
+    return mock_project(
+        files={
+            "dbt_project.yml": """\
+                name: my_pumpkin
+                version: 1.0.0
+                profile: test_pumpkin
+            """,
+            "selectors.yml": """\
+                selectors:
+                  - name: staging
+                    default: true
+                    definition:
+                      method: fqn
+                      value: staging
+            """,
+            "models/staging/stg_customers.sql": "select 1 as id",
+            "models/customers.sql": "select * from {{ ref('stg_customers') }}",
+        },
+    )
+
+
+def test_default_selector_unsupported(default_selector_project_dir):
+    manifest = (
+        dbtRunner()
+        .invoke(
+            [
+                "parse",
+                "--project-dir",
+                str(default_selector_project_dir),
+                "--profiles-dir",
+                str(default_selector_project_dir),
+            ]
+        )
+        .result
+    )
+    selector = ResourceSelector(manifest, "my_pumpkin", default_selector_project_dir)
+
+    with pytest.raises(UnsupportedSelectorError):
+        selector.select(None, None)
+
+    # Selection given explicitly overrides the default selector
+    assert selector.select(None, ["staging"]) == {"model.my_pumpkin.customers"}
+
+
+def test_default_selector_same_as_dbt_list(default_selector_project_dir):
+    project_dir = default_selector_project_dir
+    loader = ResourceLoader(
+        project_params=ProjectParams(project_dir=str(project_dir), profiles_dir=str(project_dir)),
+        resource_params=ResourceParams(),
+    )
+    manifest = loader.load_manifest()
+
+    actual = {i.unique_id for ids in loader.list_all_resource_ids().values() for i in ids}
+    assert actual == supported_only(manifest, dbt_list(manifest, project_dir, [], []))
+    assert actual == {"model.my_pumpkin.stg_customers"}
+
+
+@pytest.mark.parametrize("raw", ["state:modified", "result:error+", "tag:marts,state:new"])
+def test_unsupported_method(selector, raw):
+    with pytest.raises(UnsupportedSelectorError):
+        selector.select([raw], None)
+
+
+def test_unsupported_method_in_exclude(selector):
+    with pytest.raises(UnsupportedSelectorError):
+        selector.select(None, ["source_status:fresher"])
+
+
+def test_parse_criteria():
+    assert SelectionCriteria.parse("2+config.materialized:table+3") == SelectionCriteria(
+        raw="2+config.materialized:table+3",
+        method="config",
+        arguments=("materialized",),
+        value="table",
+        parents=True,
+        parents_depth=2,
+        children=True,
+        children_depth=3,
+        childrens_parents=False,
+    )
+
+
+def test_parse_criteria_incompatible_operators():
+    with pytest.raises(PumpkinError):
+        SelectionCriteria.parse("@customers+")
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import socket
+import stat
+import threading
+
+import pytest
+
+from dbt_pumpkin.exception import PumpkinError
+from dbt_pumpkin.params import ProjectParams
+from dbt_pumpkin.server import PumpkinServer, send_request
+
+from .mock import mock_project
+
+
+@pytest.fixture
+def project_path():
+    return mock_project(
+        files={
+            "dbt_project.yml": """\
+                name: test_pumpkin
+                version: "0.1.0"
+                profile: test_pumpkin
+                models:
+                  test_pumpkin:
+                    +dbt-pumpkin-path: _models.yml
+            """,
+            "models/customers.sql": "select 1 as id",
+        },
+        build=True,
+    )
+
+
+@pytest.fixture
+def pumpkin_server(project_path) -> PumpkinServer:
+    return PumpkinServer(ProjectParams(project_dir=str(project_path), profiles_dir=str(project_path)))
+
+
+def test_manifest_reused_until_files_changed(pumpkin_server, project_path):
+    assert pumpkin_server.execute({"command": "relocate", "dry_run": True}) == {"success": True}
+    manifest = pumpkin_server._manifest  # noqa: SLF001
+
+    assert pumpkin_server.execute({"command": "bootstrap", "dry_run": True}) == {"success": True}
+    assert pumpkin_server._manifest is manifest  # noqa: SLF001
+
+    (project_path / "models" / "orders.sql").write_text("select 1 as id")
+
+    assert pumpkin_server.execute({"command": "bootstrap", "dry_run": False}) == {"success": True}
+    assert pumpkin_server._manifest is not manifest  # noqa: SLF001
+    assert (project_path / "models" / "_models.yml").is_file()
+
+
+@pytest.mark.parametrize("request_body", [{}, {"command": "unknown"}])
+def test_unknown_command(pumpkin_server, request_body):
+    assert pumpkin_server.execute(request_body)["success"] is False
+
+
+@pytest.mark.parametrize(
+    ("request_body", "error"),
+    [
+        (["relocate"], "Request must be a JSON object"),
+        ({"command": "relocate", "select": "customers"}, "select must be a list of strings"),
+        ({"command": "relocate", "exclude": [1]}, "exclude must be a list of strings"),
+        ({"command": "relocate", "select": {"customers": True}}, "select must be a list of strings"),
+        ({"command": "relocate", "dry_run": "false"}, "dry_run must be a boolean"),
+    ],
+)
+def test_malformed_request(pumpkin_server, request_body, error):
+    assert pumpkin_server.execute(request_body) == {"success": False, "error": error}
+    # Request is rejected before project is parsed
+    assert pumpkin_server._manifest is None  # noqa: SLF001
+
+
+def test_failed_command(project_path):
+    pumpkin_server = PumpkinServer(ProjectParams(project_dir=str(project_path / "absent")))
+
+    response = pumpkin_server.execute({"command": "bootstrap"})
+
+    assert response["success"] is False
+    assert response["error"]
+
+
+def test_serve(pumpkin_server, project_path):
+    socket_path = pumpkin_server.locate_socket()
+    assert socket_path == project_path / "target" / "dbt_pumpkin.sock"
+    # Left by a server which wasn't shut down
+    with socket.socket(socket.AF_UNIX) as stale_socket:
+        stale_socket.bind(str(socket_path))
+
+    ready = threading.Event()
+    servers = []
+
+    def on_ready(server):
+        servers.append(server)
+        ready.set()
+
+    thread = threading.Thread(target=pumpkin_server.serve, args=(socket_path, on_ready), daemon=True)
+    thread.start()
+    assert ready.wait(10)
+
+    try:
+        # Only the current user can connect
+        assert stat.S_IMODE(socket_path.stat().st_mode) == 0o600
+        assert send_request(socket_path, {"command": "relocate", "dry_run": True}, timeout=60) == {"success": True}
+        assert send_request(socket_path, {"command": "unknown"}, timeout=60)["success"] is False
+        assert send_request(socket_path, {"command": "relocate", "select": "customers"}, timeout=60) == {
+            "success": False,
+            "error": "select must be a list of strings",
+        }
+    finally:
+        servers[0].shutdown()
+        thread.join(10)
+
+    assert not socket_path.exists()
+
+
+def test_serve_not_socket(pumpkin_server, tmp_path):
+    socket_path = tmp_path / "dbt_pumpkin.sock"
+    socket_path.write_text("")
+
+    with pytest.raises(PumpkinError, match="Not a socket"):
+        pumpkin_server.serve(socket_path)
+
+    assert socket_path.is_file()
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import textwrap
+from pathlib import Path
+
+import pytest
+import yaml
+from ruamel.yaml import YAML
+
+from dbt_pumpkin.splice import YamlSplicer
+
+SCHEMA = textwrap.dedent("""\
+    version: 2
+
+    models:
+        # Customers
+        -   name: customers
+            columns:
+                -   name: id
+                    data_type: "integer"  # primary key
+
+        -   name: orders
+            description: |
+                Orders
+                of customers
+            columns:
+                -   name: id
+    # Seeds
+
+    seeds:
+        -   name: countries
+""")
+
+
+@pytest.fixture
+def splicer() -> YamlSplicer:
+    return YamlSplicer(YAML(typ="rt"))
+
+
+def load(splicer: YamlSplicer, text: str, path: Path = Path("schema.yml")) -> dict:
+    content = YAML(typ="rt").load(text)
+    splicer.record(path, content, text)
+    return content
+
+
+def test_splice_unchanged(splicer):
+    content = load(splicer, SCHEMA)
+    assert splicer.splice(Path("schema.yml"), content) == SCHEMA
+
+
+def test_splice_changed_resource(splicer):
+    content = load(splicer, SCHEMA)
+    content["models"][1]["columns"].append({"name": "customer_id", "data_type": "integer"})
+
+    assert splicer.splice(Path("schema.yml"), content) == textwrap.dedent("""\
+        version: 2
+
+        models:
+            # Customers
+            -   name: customers
+                columns:
+                    -   name: id
+                        data_type: "integer"  # primary key
+
+            - name: orders
+              description: |
+                Orders
+                of customers
+              columns:
+                  - name: id
+                  - name: customer_id
+                    data_type: integer
+        # Seeds
+
+        seeds:
+            -   name: countries
+    """)
+
+
+def test_splice_moved_resource(splicer):
+    content = load(splicer, SCHEMA)
+    other_content = load(splicer, "version: 2\nmodels:\n- name: payments\n", Path("other.yml"))
+    other_content["models"].append(content["models"].pop(0))
+
+    actual = splicer.splice(Path("schema.yml"), content)
+    assert "name: customers" not in actual
+    assert "    -   name: orders\n" in actual
+    assert yaml.safe_load(actual)["models"] == [
+        {"name": "orders", "description": "Orders\nof customers\n", "columns": [{"name": "id"}]}
+    ]
+
+    actual = splicer.splice(Path("other.yml"), other_content)
+    assert actual.startswith("version: 2\nmodels:\n- name: payments\n- name: customers\n")
+    assert yaml.safe_load(actual)["models"] == [
+        {"name": "payments"},
+        {"name": "customers", "columns": [{"name": "id", "data_type": "integer"}]},
+    ]
+
+
+def test_splice_not_possible(splicer):
+    content = load(splicer, SCHEMA)
+    content["sources"] = [{"name": "raw"}]
+    assert splicer.splice(Path("schema.yml"), content) is None
+
+    content = load(splicer, SCHEMA)
+    content["seeds"].pop()
+    assert splicer.splice(Path("schema.yml"), content) is None
+
+    content = load(splicer, "version: 2\nmodels: [{name: customers}]\n")
+    content["models"][0]["description"] = "Customers"
+    assert splicer.splice(Path("schema.yml"), content) is None
+
+    # Not recorded
+    assert splicer.splice(Path("schema.yml"), content) is None
+
+
+def test_splice_moved_resource_keeps_own_comments(splicer):
+    content = load(
+        splicer,
+        textwrap.dedent("""\
+            version: 2
+            models:
+            - name: customers
+              columns:
+              - name: id
+                # primary key
+                data_type: integer
+            """),
+    )
+    other_content = load(
+        splicer,
+        textwrap.dedent("""\
+            version: 2
+            models:
+            - name: orders
+            # primary key
+            - name: payments
+            """),
+        Path("other.yml"),
+    )
+    other_content["models"].append(content["models"].pop(0))
+    content["models"].append(other_content["models"].pop(0))
+
+    # Gap comment of the removed Resource stays in its file, comment of the moved Resource stays in the Resource
+    assert splicer.splice(Path("other.yml"), other_content) == textwrap.dedent("""\
+        version: 2
+        models:
+        - name: payments
+        - name: customers
+          columns:
+          - name: id
+            # primary key
+            data_type: integer
+        # primary key
+        """)
+    assert splicer.splice(Path("schema.yml"), content) == textwrap.dedent("""\
+        version: 2
+        models:
+        - name: orders
+        """)
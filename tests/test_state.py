@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from dbt_pumpkin.data import Resource, ResourceConfig, ResourceID, ResourceType
+from dbt_pumpkin.params import ProjectParams, ResourceParams
+from dbt_pumpkin.pumpkin import Pumpkin
+from dbt_pumpkin.state import ProjectState, locate_project_dir
+
+from .mock import mock_project
+
+
+@pytest.fixture
+def project_path() -> Path:
+    return mock_project(
+        files={
+            "dbt_project.yml": """\
+                name: test_pumpkin
+                version: "0.1.0"
+                profile: test_pumpkin
+                models:
+                  test_pumpkin:
+                    +dbt-pumpkin-path: _models.yml
+            """,
+            "models/customers.sql": "select 1 as id",
+            "models/orders.sql": "select 1 as id",
+        },
+    )
+
+
+def model(name: str, yaml_path_template: str = "_models.yml") -> Resource:
+    return Resource(
+        unique_id=ResourceID(f"model.test_pumpkin.{name}"),
+        name=name,
+        source_name=None,
+        database="dev",
+        schema="main",
+        identifier=name,
+        type=ResourceType.MODEL,
+        path=Path(f"models/{name}.sql"),
+        yaml_path=None,
+        columns=[],
+        config=ResourceConfig(
+            yaml_path_template=yaml_path_template, numeric_precision_and_scale=False, string_length=False
+        ),
+    )
+
+
+def touch_later(path: Path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_locate_project_dir(project_path, monkeypatch):
+    monkeypatch.chdir(project_path / "models")
+    assert locate_project_dir(ProjectParams()) == project_path
+    assert locate_project_dir(ProjectParams(project_dir="other")) == Path("other")
+
+
+def test_project_unchanged(project_path):
+    state = ProjectState(project_path, "bootstrap", "key")
+    assert not state.is_project_unchanged()
+
+    state.save([])
+    assert (project_path / "target" / "dbt_pumpkin_state.json").is_file()
+    assert ProjectState(project_path, "bootstrap", "key").is_project_unchanged()
+    assert not ProjectState(project_path, "bootstrap", "other_key").is_project_unchanged()
+    assert not ProjectState(project_path, "relocate", "key").is_project_unchanged()
+
+    # Not project files
+    (project_path / "dev.duckdb").write_text("changed")
+    (project_path / "target" / "run_results.json").write_text("{}")
+    assert ProjectState(project_path, "bootstrap", "key").is_project_unchanged()
+
+    touch_later(project_path / "models" / "customers.sql")
+    assert not ProjectState(project_path, "bootstrap", "key").is_project_unchanged()
+
+
+def test_select_unchanged(project_path):
+    customers, orders = model("customers"), model("orders")
+
+    state = ProjectState(project_path, "synchronize", "key")
+    assert state.select_unchanged([customers, orders]) == set()
+    state.save([customers, orders])
+
+    (project_path / "models" / "orders.sql").write_text("select 2 as id")
+
+    state = ProjectState(project_path, "synchronize", "key")
+    assert state.select_unchanged([customers, orders]) == {customers.unique_id}
+    assert state.select_unchanged([model("customers", "_{name}.yml")]) == set()
+
+
+def test_incremental_bootstrap(project_path, monkeypatch):
+    from dbt_pumpkin.loader import ResourceLoader
+
+    skipped: list[set[ResourceID]] = []
+    skip_resources = ResourceLoader.skip_resources
+
+    def spy_skip_resources(self, resource_ids: set[ResourceID]):
+        skipped.append(resource_ids)
+        skip_resources(self, resource_ids)
+
+    monkeypatch.setattr(ResourceLoader, "skip_resources", spy_skip_resources)
+
+    pumpkin = Pumpkin(
+        project_params=ProjectParams(project_dir=str(project_path), profiles_dir=str(project_path)),
+        resource_params=ResourceParams(),
+    )
+
+    assert len(pumpkin.bootstrap(dry_run=False, incremental=True).actions) == 2
+    assert skipped == [set()]
+
+    # Nothing is loaded if no file changed
+    assert pumpkin.bootstrap(dry_run=False, incremental=True).actions == []
+    assert skipped == [set()]
+
+    (project_path / "models" / "payments.sql").write_text("select 1 as id")
+
+    assert len(pumpkin.bootstrap(dry_run=False, incremental=True).actions) == 1
+    assert skipped[-1] == {ResourceID("model.test_pumpkin.customers"), ResourceID("model.test_pumpkin.orders")}
@@ -1,3 +1,4 @@
+import os
 import platform
 import textwrap
 from pathlib import Path
@@ -5,7 +6,9 @@ from pathlib import Path
 import yaml
 
 from dbt_pumpkin.data import YamlFormat
-from dbt_pumpkin.storage import DiskStorage
+from dbt_pumpkin import storage as storage_module
+from dbt_pumpkin.cache import YamlCache
+from dbt_pumpkin.storage import DiskStorage, ParallelDiskStorage
 
 
 def test_load_yaml(tmp_path: Path):
@@ -22,6 +25,29 @@ def test_load_yaml(tmp_path: Path):
     assert files == {Path("schema.yml"): {"version": 2, "models": [{"name": "my_model"}]}}
 
 
+def test_load_prefetched_yaml(tmp_path: Path):
+    (tmp_path / "schema.yml").write_text("version: 2\n")
+
+    storage = DiskStorage(tmp_path, yaml_format=None)
+    storage.prefetch_yaml({Path("schema.yml"), Path("absent.yml")})
+    assert storage.load_yaml({Path("schema.yml"), Path("absent.yml")}) == {Path("schema.yml"): {"version": 2}}
+
+    # Prefetched content is used only once
+    (tmp_path / "schema.yml").write_text("version: 3\n")
+    assert storage.load_yaml({Path("schema.yml")}) == {Path("schema.yml"): {"version": 3}}
+
+
+def test_cancel_prefetch(tmp_path: Path):
+    (tmp_path / "schema.yml").write_text("version: 2\n")
+
+    storage = DiskStorage(tmp_path, yaml_format=None)
+    storage.prefetch_yaml({Path("schema.yml")})
+    storage.cancel_prefetch({Path("schema.yml")})
+
+    (tmp_path / "schema.yml").write_text("version: 3\n")
+    assert storage.load_yaml({Path("schema.yml")}) == {Path("schema.yml"): {"version": 3}}
+
+
 def test_save_yaml(tmp_path: Path):
     storage = DiskStorage(tmp_path, yaml_format=None)
 
@@ -190,6 +216,19 @@ def test_roundtrip_preserve_quotes(tmp_path: Path):
     assert content == actual
 
 
+def test_save_yaml_skips_unchanged_file(tmp_path: Path):
+    schema_file = tmp_path / "schema.yml"
+    schema_file.write_text("version: 2\nmodels:\n- name: my_model  # comment\n")
+    os.utime(schema_file, ns=(0, 0))
+
+    storage = DiskStorage(tmp_path, yaml_format=None)
+    storage.save_yaml(storage.load_yaml({Path("schema.yml")}))
+    assert schema_file.stat().st_mtime_ns == 0
+
+    storage.save_yaml({Path("schema.yml"): {"version": 2}})
+    assert schema_file.read_text() == "version: 2\n"
+
+
 def test_save_yaml_deletes_if_content_is_none(tmp_path: Path):
     schema_file = tmp_path / "schema.yml"
     schema_file.write_text(
@@ -213,3 +252,184 @@ def test_save_yaml_does_nothing_if_content_is_none_no_file(tmp_path: Path):
     storage = DiskStorage(tmp_path, yaml_format=None)
     storage.save_yaml({Path("schema.yml"): None})
     assert not schema_file.exists()
+
+
+def test_parallel_storage_same_as_serial(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(storage_module, "_MIN_FILES_PER_WORKER", 2)
+
+    content = textwrap.dedent("""\
+        # Models
+        version: 2
+        models:
+            - name: my_model   # comment
+              description: "quoted"
+              columns:
+                  - name: id
+                    tests: [not_null, unique]
+    """)
+    files = {Path(f"models/schema_{i}.yml") for i in range(10)}
+    yaml_format = YamlFormat(indent=4, offset=2, preserve_quotes=True)
+
+    for root in ["serial", "parallel"]:
+        (tmp_path / root / "models").mkdir(parents=True)
+        for file in files:
+            (tmp_path / root / file).write_text(content)
+
+    serial = DiskStorage(tmp_path / "serial", yaml_format)
+    parallel = ParallelDiskStorage(tmp_path / "parallel", yaml_format, workers=3)
+
+    for storage in [serial, parallel]:
+        loaded = storage.load_yaml(files | {Path("models/absent.yml")})
+        assert set(loaded) == files
+        for file_content in loaded.values():
+            file_content["models"][0]["columns"].append({"name": "name"})
+        loaded[Path("models/schema_0.yml")] = None
+        storage.save_yaml(loaded)
+        storage.close()
+
+    assert not (tmp_path / "parallel" / "models" / "schema_0.yml").exists()
+    for file in files - {Path("models/schema_0.yml")}:
+        assert (tmp_path / "parallel" / file).read_bytes() == (tmp_path / "serial" / file).read_bytes()
+
+
+def test_parallel_storage_reuses_worker_processes(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(storage_module, "_MIN_FILES_PER_WORKER", 1)
+
+    files = {Path(f"schema_{i}.yml") for i in range(4)}
+    for file in files:
+        (tmp_path / file).write_text("version: 2\n")
+
+    storage = ParallelDiskStorage(tmp_path, None, workers=2)
+    try:
+        loaded = storage.load_yaml(files)
+        executor = storage._executor  # noqa: SLF001
+        storage.save_yaml(loaded)
+        assert storage.load_yaml(files) == loaded
+        assert storage._executor is executor  # noqa: SLF001
+        # Workers aren't forked
+        assert executor._mp_context.get_start_method() != "fork"  # noqa: SLF001
+    finally:
+        storage.close()
+
+    assert storage._executor is None  # noqa: SLF001
+
+
+def test_load_yaml_cached(tmp_path: Path):
+    content = textwrap.dedent("""\
+        version: 2
+        models:
+          - name: my_model  # comment
+    """)
+    yaml_cache = YamlCache(tmp_path / "target" / "yaml", max_size=1024 * 1024)
+
+    for root in ["not_cached", "cached"]:
+        (tmp_path / root).mkdir()
+        (tmp_path / root / "schema.yml").write_text(content)
+
+    DiskStorage(tmp_path / "cached", None, yaml_cache).load_yaml({Path("schema.yml")})
+    assert len(list((tmp_path / "target" / "yaml").iterdir())) == 1
+
+    for root, cache in [("not_cached", None), ("cached", yaml_cache)]:
+        storage = DiskStorage(tmp_path / root, None, cache)
+        files = storage.load_yaml({Path("schema.yml")})
+        files[Path("schema.yml")]["models"][0]["description"] = "My model"
+        storage.save_yaml(files)
+
+    cached_content = (tmp_path / "cached" / "schema.yml").read_text()
+    assert cached_content == (tmp_path / "not_cached" / "schema.yml").read_text()
+    assert DiskStorage(tmp_path / "cached", None, yaml_cache).load_yaml({Path("schema.yml")}) == {
+        Path("schema.yml"): {"version": 2, "models": [{"name": "my_model", "description": "My model"}]}
+    }
+
+
+def test_save_yaml_minimal_edits(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(storage_module, "_MIN_FILES_PER_WORKER", 1)
+
+    content = textwrap.dedent("""\
+        version: 2
+        models:
+          -   name: customers
+              columns:
+                  - name: id
+          -   name: orders
+    """)
+    files = {Path("schema_1.yml"), Path("schema_2.yml")}
+    for file in files:
+        (tmp_path / file).write_text(content)
+
+    for storage in [
+        DiskStorage(tmp_path, None, minimal_edits=True),
+        ParallelDiskStorage(tmp_path, None, workers=2, minimal_edits=True),
+    ]:
+        loaded = storage.load_yaml(files)
+        for file_content in loaded.values():
+            file_content["models"][1]["columns"] = [{"name": "id"}]
+        storage.save_yaml(loaded)
+        storage.close()
+
+        for file in files:
+            assert (tmp_path / file).read_text() == textwrap.dedent("""\
+                version: 2
+                models:
+                  -   name: customers
+                      columns:
+                          - name: id
+                  - name: orders
+                    columns:
+                      - name: id
+            """)
+            (tmp_path / file).write_text(content)
+
+
+def test_save_yaml_minimal_edits_keeps_comment_columns(tmp_path: Path):
+    (tmp_path / "schema.yml").write_text(
+        textwrap.dedent("""\
+            version: 2
+            models:
+              - name: customers  # keep
+                columns:
+                  - name: id  # primary key
+              - name: orders
+        """)
+    )
+    storage = DiskStorage(tmp_path, None, minimal_edits=True)
+
+    saved = []
+    # Sequences are indented differently than configured, the Resource is changed twice the same way
+    for description in ["Customers", None, "Customers"]:
+        content = storage.load_yaml({Path("schema.yml")})
+        model = content[Path("schema.yml")]["models"][0]
+        if description:
+            model["description"] = description
+        else:
+            del model["description"]
+        storage.save_yaml(content)
+        saved.append((tmp_path / "schema.yml").read_bytes())
+
+    assert saved[0] == saved[2]
+    assert b"  - name: customers  # keep\n" in saved[2]
+    assert b"      - name: id  # primary key\n" in saved[2]
+
+
+def test_load_yaml_read_only(tmp_path: Path):
+    (tmp_path / "schema.yml").write_text("version: 2  # comment\nmodels:\n  - name: my_model\n")
+
+    storage = DiskStorage(tmp_path, yaml_format=None, minimal_edits=True)
+    files = storage.load_yaml({Path("schema.yml"), Path("absent.yml")}, read_only=True)
+
+    assert files == {Path("schema.yml"): {"version": 2, "models": [{"name": "my_model"}]}}
+    assert type(files[Path("schema.yml")]) is dict
+
+
+def test_load_prefetched_read_only_yaml(tmp_path: Path):
+    (tmp_path / "schema.yml").write_text("version: 2\n")
+
+    storage = DiskStorage(tmp_path, yaml_format=None)
+    storage.prefetch_yaml({Path("schema.yml")}, read_only=True)
+    (tmp_path / "schema.yml").write_text("version: 2  # comment\n")
+
+    # Content prefetched read only is not used to change the file
+    files = storage.load_yaml({Path("schema.yml")})
+    files[Path("schema.yml")]["models"] = []
+    storage.save_yaml(files)
+    assert (tmp_path / "schema.yml").read_text() == "version: 2  # comment\nmodels: []\n"
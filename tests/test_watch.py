@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+import yaml
+
+from dbt_pumpkin.params import ProjectParams, ResourceParams
+from dbt_pumpkin.watch import WATCHED_PATHS, FileWatcher, ProjectWatch, select_changed
+
+from .mock import mock_project
+
+
+@pytest.fixture
+def project_path() -> Path:
+    return mock_project(
+        files={
+            "dbt_project.yml": """\
+                name: test_pumpkin
+                version: "0.1.0"
+                profile: test_pumpkin
+                models:
+                  test_pumpkin:
+                    +dbt-pumpkin-path: _models.yml
+            """,
+            "models/customers.sql": "select 1 as id",
+            "models/staging/stg_customers.sql": "select 1 as id",
+        },
+    )
+
+
+def test_file_watcher(project_path):
+    watcher = FileWatcher(project_path, WATCHED_PATHS)
+    assert watcher.poll() == set()
+
+    (project_path / "models" / "orders.sql").write_text("select 1 as id")
+    (project_path / "models" / "customers.sql").write_text("select 2 as id")
+    (project_path / "models" / "staging" / "stg_customers.sql").unlink()
+    (project_path / "analyses").mkdir()
+    (project_path / "analyses" / "ignored.sql").write_text("select 1")
+
+    assert watcher.poll() == {
+        Path("models/orders.sql"),
+        Path("models/customers.sql"),
+        Path("models/staging/stg_customers.sql"),
+    }
+    assert watcher.poll() == set()
+
+
+@pytest.mark.parametrize(
+    ("select", "changed", "expected"),
+    [
+        (None, {Path("models/a.sql"), Path("models/_schema.yml")}, ["path:models/_schema.yml", "path:models/a.sql"]),
+        (None, {Path("dbt_project.yml"), Path("models/a.sql")}, None),
+        (["tag:a"], {Path("dbt_project.yml")}, ["tag:a"]),
+        (["tag:a tag:b"], {Path("models/a.sql")}, ["tag:a,path:models/a.sql", "tag:b,path:models/a.sql"]),
+    ],
+)
+def test_select_changed(select, changed, expected):
+    assert select_changed(select, changed) == expected
+
+
+def test_apply_changed_only(project_path):
+    watch = ProjectWatch(
+        ProjectParams(project_dir=str(project_path), profiles_dir=str(project_path)), ResourceParams(select=[])
+    )
+
+    watch.apply({Path("models/staging/stg_customers.sql")}, dry_run=False)
+
+    assert not (project_path / "models" / "_models.yml").exists()
+    staging_yml = yaml.safe_load((project_path / "models" / "staging" / "_models.yml").read_text())
+    assert [m["name"] for m in staging_yml["models"]] == ["stg_customers"]
+
+    watch.apply(None, dry_run=False)
+
+    assert (project_path / "models" / "_models.yml").exists()